@@ -1,6 +1,10 @@
 from player import Player, defaultdict, Colors, OwnershipDegree, TradeOffer
 import heapq
-from copy import copy, deepcopy
+import time
+from copy import copy
+from itertools import combinations, permutations
+from markov import load_marginal_income_gains
+from transposition import TranspositionTable, property_bit, get_mask_spaces
 
 
 # TODO: don't print colors if one of them is mortgaged
@@ -8,17 +12,34 @@ from copy import copy, deepcopy
 # TODO: somehow ai players building on properties they don't have monopolies for
 
 class AIPlayer(Player):
-    def __init__(self, player_number, token, trade_threshold=1000):
+    # trade_node_budget/trade_time_budget: optional cap on nodes expanded / seconds spent per decide_trade call
+    # development_reserve: money to keep in hand when building, so building doesn't leave the player short for rent
+    def __init__(self, player_number, token, trade_threshold=1000, trade_node_budget=None, trade_time_budget=None, development_reserve=0):
         super().__init__(player_number, token)
         self.trade_threshold = trade_threshold # the dollar limit of negative difference in gains that the player is willing to allow in a trade.
         # the lower the limit, the less likely the player will be willing to trade. if negative, the player will only trade when they gain more than the other player gains
-        self.analyzed_properties = set() # used for deciding trades
-        self.analyzed_sales = set() # used for deciding mortgages
-        self.analyzed_builds = set() # used for deciding builds
+        self.trade_node_budget = trade_node_budget
+        self.trade_time_budget = trade_time_budget
+        self.trade_nodes = 0 # nodes expanded by the current (or last) decide_trade call
+        self.trade_deadline = None
+        self.best_trade_gain = 0 # best gain found so far by the current trade search, used for pruning
+        self.trade_decisions = 0
+        self.total_trade_nodes = 0
+        self.analyzed_properties = TranspositionTable() # used for deciding trades, keyed by property mask
+        self.offerable_properties = {} # board space -> property, for the trade search's masks
+        self.mortgage_plan_states = 0 # plans kept by the decide_mortgage_plan calls of the last decide_mortgage
+        self.house_sale_states = 0 # plans kept by the last decide_house_sales call
+        self.development_reserve = development_reserve # money resolve_development keeps back rather than build with
+        self.development_states = 0 # plans kept by the last decide_development_plan call
         self.marginal_income_gains = self.init_marginal_income_gains()
 
     def init_marginal_income_gains(self):
         marginal_income = defaultdict(int) # dictionary of colors keyed to array where index+1 is marginal gain for that house
+        solved = load_marginal_income_gains()
+        if solved is not None:
+            marginal_income.update(solved)
+            return marginal_income
+        # fallback when numpy isn't installed and the tables haven't been cached yet
         marginal_income[Colors.BROWN] = [0.34, 1.14, 3.43, 3.99, 4.56]
         marginal_income[Colors.LIGHTBLUE] = [1.35, 4.13, 12.81, 9.36, 10.32]
         marginal_income[Colors.PINK] = [2.39, 7.97, 23.04, 13.74, 10.76]
@@ -29,33 +50,30 @@ class AIPlayer(Player):
         marginal_income[Colors.DARKBLUE] = [4.90, 16.96, 32.31, 11.25, 11.25]
         return marginal_income
         
-    def calculate_available_capital(self, mortgage_degree):
-        # doesn't calculate money gained from selling houses, maybe add option to do so
-        return self.money + self.calculate_mortgage_yield(mortgage_degree)[0]
-
+    # money on hand plus what mortgaging colors owned to at most mortgage_degree would raise, and
+    # optionally what selling every house would (not counting the mortgages on the cleared properties)
+    def calculate_available_capital(self, mortgage_degree, sell_houses=False):
+        capital = self.money + self.get_mortgage_yield(mortgage_degree)
+        if sell_houses:
+            capital += self.house_sale_value
+        return capital
+
+    # doesn't think about houses; properties with houses are left out
     def calculate_mortgage_yield(self, max_degree):
-        # doesn't think about houses
-        total = 0
-        properties = []
-        for property in self.properties.values():
-            degree = self.get_degree_of_ownership(property.color)
-            if property.is_mortgaged or degree.value > max_degree.value or (property.can_develop and property.num_houses > 0):
-                continue
-            total += property.mortgage_amount
-            properties.append(property)
-        return total, properties
+        return self.get_mortgage_yield(max_degree), self.get_mortgageable_properties(max_degree)
 
 
     def decide_mortgage(self, amount):
+        self.mortgage_plan_states = 0
         if len(self.properties) == 0 or len(self.mortgaged_property_names) == len(self.properties) or self.money >= amount:
             return
         
         # first, mortgage properties without houses
         mortgage_degrees = [OwnershipDegree.ONE, OwnershipDegree.ALMOST_MONOPOLY, OwnershipDegree.MONOPOLY]
         for degree in mortgage_degrees:
-            mortgage_yield, properties = self.calculate_mortgage_yield(degree)
-            if mortgage_yield + self.money >= amount or degree == OwnershipDegree.MONOPOLY: # if at final degree, must mortgage
-                properties_to_mortgage, _ = self.decide_mortgage_recurse(set(properties), defaultdict(list), amount - self.money, 0)
+            if self.get_mortgage_yield(degree) + self.money >= amount or degree == OwnershipDegree.MONOPOLY: # if at final degree, must mortgage
+                _, properties = self.calculate_mortgage_yield(degree)
+                properties_to_mortgage, _ = self.decide_mortgage_plan(properties, amount - self.money)
                 for property_set in properties_to_mortgage.values():
                     for property in property_set:
                         self.properties[property.name].mortgage()
@@ -64,89 +82,163 @@ class AIPlayer(Player):
             return
         
         # then, sell houses
-        self.analyzed_sales = set()
-        _, houses_by_color, _ = self.sell_houses_recurse(amount - self.money, defaultdict(int), 0)
-        for color in houses_by_color.keys():
-            properties = self.properties_by_set[color]
-            for _ in range(houses_by_color[color]):
-                for property in properties:
-                    property.sell_house()
+        rounds_by_color, _ = self.decide_house_sales(amount - self.money)
+        for color, rounds in rounds_by_color.items():
+            self.sell_house_rounds(color, rounds)
         if self.money >= amount:
             return
         
         # then, mortgage properties that have had their houses sold
         _, properties = self.calculate_mortgage_yield(OwnershipDegree.MONOPOLY)
-        properties_to_mortgage, _ = self.decide_mortgage_recurse(set(properties), defaultdict(list), amount - self.money, 0)
+        properties_to_mortgage, _ = self.decide_mortgage_plan(properties, amount - self.money)
         for property_set in properties_to_mortgage.values():
             for property in property_set:
                 self.properties[property.name].mortgage()
 
 
-    def decide_mortgage_recurse(self, available_properties, properties_to_mortgage, amount, loss_in_worth):
+    # picks the properties to mortgage to raise amount with the least loss in worth. properties are
+    # mortgaged one at a time until amount is covered (or none are left), and each one loses its worth
+    # given how many of its color were mortgaged before it. rather than trying every order, this goes
+    # color by color keeping the cheapest plan for each (amount raised, last property's mortgage) state.
+    # returns a dict of the properties to mortgage by color, and the total loss in worth
+    def decide_mortgage_plan(self, available_properties, amount):
+        properties_to_mortgage = defaultdict(list)
         if amount <= 0 or len(available_properties) == 0:
+            return properties_to_mortgage, 0
+
+        properties_by_color = defaultdict(list)
+        for property in sorted(available_properties):
+            properties_by_color[property.color].append(property)
+        options_by_color = [self.get_mortgage_options(properties) for properties in properties_by_color.values()]
+
+        if sum(property.mortgage_amount for property in available_properties) < amount:
+            # not enough to cover it, so everything ends up mortgaged
+            loss_in_worth = 0
+            for options in options_by_color:
+                _, _, loss, order = options[-1]
+                loss_in_worth += loss
+                for property in order:
+                    properties_to_mortgage[property.color].append(property)
             return properties_to_mortgage, loss_in_worth
-        
+
+        # the property that covers the amount is mortgaged last, so everything before it must raise less
+        # than amount. states are keyed by (amount raised before the last property, last property's mortgage)
+        states = {(0, 0): (0, [])}
+        for options in options_by_color:
+            new_states = {}
+            for (raised, last), (loss, orders) in states.items():
+                for option_raised, option_last, option_loss, order in options:
+                    if last and option_last:
+                        continue
+                    new_raised = raised + option_raised
+                    if new_raised >= amount:
+                        continue
+                    key = (new_raised, last or option_last)
+                    new_loss = loss + option_loss
+                    if key not in new_states or new_loss < new_states[key][0]:
+                        new_states[key] = (new_loss, orders + [order] if order else orders)
+            states = new_states
+            self.mortgage_plan_states += len(states)
+
         min_loss_in_worth = float('inf')
-        best_properties_to_mortgage = deepcopy(properties_to_mortgage)
-
-        for property in available_properties:
-            new_available_properties = set(available_properties)
-            new_available_properties.remove(property)
-            new_loss_in_worth = loss_in_worth + self.calculate_property_worth(self.player_number, property, -len(properties_to_mortgage[property.color]))
-            new_properties_to_mortgage = deepcopy(properties_to_mortgage)
-            new_properties_to_mortgage[property.color].append(property)
-            new_amount = amount - property.mortgage_amount
-            properties_to_mortgage_result, loss_in_worth_result = self.decide_mortgage_recurse(new_available_properties, new_properties_to_mortgage, new_amount, new_loss_in_worth)
-            if loss_in_worth_result < min_loss_in_worth:
-                min_loss_in_worth = loss_in_worth_result
-                best_properties_to_mortgage = deepcopy(properties_to_mortgage_result)
-
-        return best_properties_to_mortgage, min_loss_in_worth
+        best_orders = []
+        for (raised, last), (loss, orders) in states.items():
+            if last and raised + last >= amount and loss < min_loss_in_worth:
+                min_loss_in_worth = loss
+                best_orders = orders
+        for order in best_orders:
+            for property in order:
+                properties_to_mortgage[property.color].append(property)
+        return properties_to_mortgage, min_loss_in_worth
+
+    # every way to mortgage some of a color's properties, as (amount raised not counting the last
+    # property, last property's mortgage or 0 if none is marked last, loss in worth, order).
+    # the last option is always all of them with none marked last
+    def get_mortgage_options(self, properties):
+        # a property's loss depends on how many of its color were mortgaged before it
+        losses = {property: [self.calculate_property_worth(self.player_number, property, -i) for i in range(len(properties))] for property in properties}
+        options = [(0, 0, 0, [])]
+        for size in range(1, len(properties) + 1):
+            for subset in combinations(properties, size):
+                raised = sum(property.mortgage_amount for property in subset)
+                for last in subset:
+                    others = [property for property in subset if property != last]
+                    loss, order = self.get_cheapest_mortgage_order(others, losses)
+                    options.append((raised - last.mortgage_amount, last.mortgage_amount, loss + losses[last][size - 1], order + [last]))
+                loss, order = self.get_cheapest_mortgage_order(list(subset), losses)
+                options.append((raised, 0, loss, order))
+        return options
+
+    def get_cheapest_mortgage_order(self, properties, losses):
+        min_loss = float('inf')
+        best_order = []
+        for order in permutations(properties):
+            loss = sum(losses[property][i] for i, property in enumerate(order))
+            if loss < min_loss:
+                min_loss = loss
+                best_order = list(order)
+        return min_loss, best_order
     
-    # houses_by_color: number of houses to sell by color
-    # marginal_income: negative number indicating how much income will change from sale of houses
-    # amount_left: positive number indicating how much money is still needed
-    def sell_houses_recurse(self, amount_left, houses_by_color, marginal_income):
-        if amount_left <= 0:
-            return amount_left, houses_by_color, marginal_income
-        if self.sell_already_analyzed(houses_by_color):
-            return amount_left, best_houses_by_color, -float('inf')
-                
-        best_houses_by_color = copy(houses_by_color)
-        max_marginal_income = marginal_income
-        min_amount_left = amount_left
-        self.add_to_analyzed_sales(houses_by_color)
-
-        for color in self.get_buildable_colors():
-            property = self.properties_by_set[color][0]
-            num_houses = property.num_houses - houses_by_color[color]
-            if num_houses == 0: # already sold all we can
-                continue
-            sell_amount = (property.build_cost // 2) * len(self.properties_by_set[color])
-
-            new_houses_by_color = copy(houses_by_color)
-            new_houses_by_color[color] += 1
-            new_marginal_income = marginal_income - self.marginal_income_gains[color][property.num_houses - new_houses_by_color[color]]
-            amount_left_result, houses_by_color_result, marginal_income_result = self.sell_houses_recurse(amount_left - sell_amount, new_houses_by_color, new_marginal_income)
-            # want to minimize amount_left until 0 - once past zero, maximize marginal_income
-            if (min_amount_left <= 0 and amount_left_result <= 0) or min_amount_left == amount_left_result:
-                if marginal_income_result > max_marginal_income:
-                    amount_left = amount_left_result
-                    max_marginal_income = marginal_income_result
-                    best_houses_by_color = copy(houses_by_color_result)
-            elif amount_left_result < min_amount_left:
-                amount_left = amount_left_result
-                max_marginal_income = marginal_income_result
-                best_houses_by_color = copy(houses_by_color_result)
-
-        return min_amount_left, best_houses_by_color, max_marginal_income
-
-    def add_to_analyzed_sales(self, houses_by_color):
-        sale_combo = "".join([f"{color.value}{houses_by_color[color]}" for color in houses_by_color.keys()])
-        self.analyzed_sales.add(sale_combo)
-    def sell_already_analyzed(self, houses_by_color):
-        sale_combo = "".join([f"{color.value}{houses_by_color[color]}" for color in houses_by_color.keys()])
-        return sale_combo in self.analyzed_sales
+    # picks how many rounds of houses to sell from each color to raise amount with the least loss in
+    # marginal income. a round sells one house from each of the color's most built properties, so sets
+    # stay evenly built. this is a knapsack over (color, rounds sold) that keeps the cheapest plan for
+    # each amount raised so far, capped at amount, so its size doesn't depend on how many houses there
+    # are. if selling everything doesn't raise amount, everything is sold.
+    # returns rounds to sell by color, and the marginal income lost
+    def decide_house_sales(self, amount):
+        rounds_by_color = defaultdict(int)
+        self.house_sale_states = 0
+        if amount <= 0:
+            return rounds_by_color, 0
+        colors = self.get_buildable_colors()
+        states = {0: (0, ())} # amount raised (capped at amount) -> (income lost, rounds sold of each color so far)
+        for color in colors:
+            options = self.get_house_sale_options(color)
+            new_states = {}
+            for raised, (loss, rounds) in states.items():
+                for color_rounds, (color_raised, color_loss) in enumerate(options):
+                    new_raised = min(raised + color_raised, amount)
+                    new_loss = loss + color_loss
+                    # ties keep the first plan found, which sells fewer rounds of the earlier colors
+                    if new_raised not in new_states or new_loss < new_states[new_raised][0]:
+                        new_states[new_raised] = (new_loss, rounds + (color_rounds,))
+            # a plan that raises less for at least as much lost income can never end up better
+            states = {}
+            min_loss = float('inf')
+            for raised in sorted(new_states, reverse=True):
+                if new_states[raised][0] < min_loss:
+                    states[raised] = new_states[raised]
+                    min_loss = new_states[raised][0]
+            self.house_sale_states += len(states)
+        loss, rounds = states[amount] if amount in states else states[max(states)]
+        for color, color_rounds in zip(colors, rounds):
+            if color_rounds > 0:
+                rounds_by_color[color] = color_rounds
+        return rounds_by_color, loss
+
+    # (money raised, marginal income lost) from selling 0, 1, 2... rounds of a color's houses
+    def get_house_sale_options(self, color):
+        properties = self.properties_by_set[color]
+        houses = [property.num_houses for property in properties]
+        sale_price = properties[0].build_cost // 2
+        options = [(0, 0)]
+        raised = 0
+        loss = 0
+        while max(houses) > 0:
+            level = max(houses)
+            raised += houses.count(level) * sale_price
+            loss += self.marginal_income_gains[color][level - 1]
+            houses = [num_houses - 1 if num_houses == level else num_houses for num_houses in houses]
+            options.append((raised, loss))
+        return options
+
+    def sell_house_rounds(self, color, rounds):
+        properties = self.properties_by_set[color]
+        for _ in range(rounds):
+            level = max(property.num_houses for property in properties)
+            for property in properties:
+                if property.num_houses == level:
+                    property.sell_house()
 
     def decide_unmortgage(self):
         budget = self.money - 300
@@ -198,62 +290,83 @@ class AIPlayer(Player):
     def resolve_development(self):
         if self.money < 200 or len(self.get_buildable_colors()) == 0:
             return
-        self.analyzed_builds = set()
-        houses_by_color, marginal_income = self.resolve_development_recurse(self.money, defaultdict(int), 0)
-        if marginal_income < 0:
-            return
-        for color in houses_by_color.keys():
-            properties = self.properties_by_set[color]
-            for _ in range(houses_by_color[color]):
-                for property in properties:
-                    property.build_house()
-
-    def resolve_development_recurse(self, money_left, houses_by_color, marginal_income):
-        best_houses_by_color = copy(houses_by_color)
-        max_marginal_income = -float('inf')
-
-        # not sure if this is best way to do it, but returns negative marginal income at base cases
-        if self.build_already_analyzed(houses_by_color) or money_left < 0:
-            return best_houses_by_color, max_marginal_income
-        
-        max_marginal_income = marginal_income
-        self.add_to_analyzed_builds(houses_by_color)
-        
-        for color in self.get_buildable_colors():
-            properties = self.properties_by_set[color]
-            # check to see if any are mortgaged
-            mortgaged = False
+        rounds_by_color, _ = self.decide_development_plan(self.money, self.development_reserve)
+        for color, rounds in rounds_by_color.items():
+            self.build_house_rounds(color, rounds)
+
+    # picks how many rounds of houses to build on each color for the most marginal income, spending
+    # at most money - reserve. a round builds one house on each of the color's least built properties,
+    # so sets stay evenly built. this is a knapsack over (color, rounds built) that keeps the best plan
+    # for each amount spent, so it takes time in proportion to (money - reserve) / 50 per color.
+    # returns rounds to build by color, and the marginal income gained
+    def decide_development_plan(self, money, reserve=0):
+        rounds_by_color = defaultdict(int)
+        self.development_states = 0
+        budget = money - reserve
+        if budget <= 0:
+            return rounds_by_color, 0
+        colors = [color for color in self.get_buildable_colors() if not any(property.is_mortgaged for property in self.properties_by_set[color])]
+        states = {0: (0, ())} # amount spent -> (income gained, rounds built of each color so far)
+        for color in colors:
+            options = self.get_house_build_options(color)
+            new_states = {}
+            for spent, (gain, rounds) in states.items():
+                for color_rounds, (color_cost, color_gain) in enumerate(options):
+                    new_spent = spent + color_cost
+                    if new_spent > budget:
+                        break
+                    new_gain = gain + color_gain
+                    # ties keep the first plan found, which builds fewer rounds on the earlier colors
+                    if new_spent not in new_states or new_gain > new_states[new_spent][0]:
+                        new_states[new_spent] = (new_gain, rounds + (color_rounds,))
+            # a plan that spends more for no more income can never end up better
+            states = {}
+            max_gain = -float('inf')
+            for spent in sorted(new_states):
+                if new_states[spent][0] > max_gain:
+                    states[spent] = new_states[spent]
+                    max_gain = new_states[spent][0]
+            self.development_states += len(states)
+        gain, rounds = max(states.values(), key=lambda state: state[0])
+        for color, color_rounds in zip(colors, rounds):
+            if color_rounds > 0:
+                rounds_by_color[color] = color_rounds
+        return rounds_by_color, gain
+
+    # (money spent, marginal income gained) from building 0, 1, 2... rounds of houses on a color
+    def get_house_build_options(self, color):
+        properties = self.properties_by_set[color]
+        houses = [property.num_houses for property in properties]
+        build_cost = properties[0].build_cost
+        options = [(0, 0)]
+        spent = 0
+        gain = 0
+        while min(houses) < 5:
+            level = min(houses)
+            spent += houses.count(level) * build_cost
+            gain += self.marginal_income_gains[color][level]
+            houses = [num_houses + 1 if num_houses == level else num_houses for num_houses in houses]
+            options.append((spent, gain))
+        return options
+
+    def build_house_rounds(self, color, rounds):
+        properties = self.properties_by_set[color]
+        for _ in range(rounds):
+            level = min(property.num_houses for property in properties)
             for property in properties:
-                if property.is_mortgaged:
-                    mortgaged = True
-                    break
-            if mortgaged:
-                continue
-
-            property = properties[0]
-            num_houses = property.num_houses + houses_by_color[color]
-            if num_houses == 5: # already built all we can
-                continue
-            build_cost = property.build_cost * len(self.properties_by_set[color])
-
-            new_houses_by_color = copy(houses_by_color)
-            new_houses_by_color[color] += 1
-            new_marginal_income = marginal_income + self.marginal_income_gains[color][property.num_houses + new_houses_by_color[color] - 1]
-            houses_by_color_result, marginal_income_result = self.resolve_development_recurse(money_left - build_cost, new_houses_by_color, new_marginal_income)
-            if marginal_income_result > max_marginal_income:
-                max_marginal_income = marginal_income_result
-                best_houses_by_color = copy(houses_by_color_result)
-
-        return best_houses_by_color, max_marginal_income
-        
-    def add_to_analyzed_builds(self, houses_by_color):
-        build_combo = "".join([f"{color.value}{houses_by_color[color]}" for color in houses_by_color.keys()])
-        self.analyzed_builds.add(build_combo)
-    def build_already_analyzed(self, houses_by_color):
-        build_combo = "".join([f"{color.value}{houses_by_color[color]}" for color in houses_by_color.keys()])
-        return build_combo in self.analyzed_builds
+                if property.num_houses == level:
+                    property.build_house()
     
     def decide_trade(self):
+        self.trade_nodes = 0
+        self.trade_deadline = None if self.trade_time_budget is None else time.perf_counter() + self.trade_time_budget
+        try:
+            self.decide_trade_offers()
+        finally:
+            self.trade_decisions += 1
+            self.total_trade_nodes += self.trade_nodes
+
+    def decide_trade_offers(self):
         property_queue = []
         # find properties to request
         for color in self.properties_by_set.keys():
@@ -270,10 +383,11 @@ class AIPlayer(Player):
             trade_offer = TradeOffer(self.player_number, recipient)
             trade_offer.recipient_bundle.properties.append(property_to_request)
             recipient_gain = -1 * self.calculate_property_worth(recipient, property_to_request)
-            properties_to_offer = set(self.properties.values())
-            self.analyzed_properties = set()
+            self.offerable_properties = {property.board_space: property for property in self.properties.values()}
+            self.analyzed_properties.clear()
+            self.best_trade_gain = 0 # trades that don't gain anything get dropped below anyway
             
-            properties_to_offer, total_gain, total_recipient_gain = self.decide_trade_recurse(recipient, properties_to_offer, defaultdict(list), gain, recipient_gain)
+            properties_to_offer, total_gain, total_recipient_gain = self.decide_trade_recurse(recipient, self.owned_mask, defaultdict(list), gain, recipient_gain)
             
             # see if trade is bad
             if total_gain <= 0 or total_recipient_gain < -100:
@@ -295,16 +409,25 @@ class AIPlayer(Player):
                 trade_offer.recipient_bundle.money += adjustment
             if self.trade_matrix.has_been_declined_previously(trade_offer):
                 continue
+            if not self.will_propose_trade_offer(trade_offer):
+                continue
             if self.trade_matrix.resolve_trade(trade_offer):
                 return # make a request until a trade happens or all options are expended
             
-    # available_properties: set
+    # available_properties: mask of the board spaces we could still offer
     # properties_to_offer: dict of properties organized by color
-    def decide_trade_recurse(self, recipient, available_properties, properties_to_offer, gain, recipient_gain):
-        if gain <= 0 or recipient_gain >= -100 or len(available_properties) == 0 or self.trade_already_analyzed(properties_to_offer):
+    # key: mask of the board spaces in properties_to_offer (see transposition.py)
+    def decide_trade_recurse(self, recipient, available_properties, properties_to_offer, gain, recipient_gain, key=0):
+        if recipient_gain >= -100:
+            if gain > self.best_trade_gain:
+                self.best_trade_gain = gain
+            return properties_to_offer, gain, recipient_gain
+        # offering more only lowers our gain, so a branch already at or below the best trade found can't beat it
+        if gain <= self.best_trade_gain or available_properties == 0 or key in self.analyzed_properties or self.trade_budget_exhausted():
             return properties_to_offer, gain, recipient_gain
         
-        self.add_to_analyzed_trades(properties_to_offer)
+        self.analyzed_properties.add(key)
+        self.trade_nodes += 1
         
         # want to add properties to trade until opponent gain is at least above -100
         # want to minimize gain difference
@@ -313,16 +436,24 @@ class AIPlayer(Player):
         best_recipient_gain = recipient_gain
         best_properties_to_offer = properties_to_offer
 
-        for property in available_properties:
+        # try giving up the properties we value least first, so good trades are found early and prune more
+        candidates = []
+        for space in get_mask_spaces(available_properties):
+            property = self.offerable_properties[space]
+            loss = self.calculate_property_worth(self.player_number, property, -len(properties_to_offer[property.color]))
+            candidates.append((loss, property))
+        candidates.sort()
+
+        for loss, property in candidates:
             # update new values
-            new_available_properties = set(available_properties)
-            new_available_properties.remove(property)
-            new_gain = gain - self.calculate_property_worth(self.player_number, property, -len(properties_to_offer[property.color]))
+            new_available_properties = available_properties & ~property_bit(property)
+            new_gain = gain - loss
             new_recipient_gain = recipient_gain + self.calculate_property_worth(recipient, property, len(properties_to_offer[property.color]))
-            new_properties_to_offer = deepcopy(properties_to_offer)
-            new_properties_to_offer[property.color].append(property)
+            # only this color's list changes; deepcopy would copy the properties (and everything they reference) too
+            new_properties_to_offer = copy(properties_to_offer)
+            new_properties_to_offer[property.color] = properties_to_offer[property.color] + [property]
 
-            properties_to_offer_result, gain_result, recipient_gain_result = self.decide_trade_recurse(recipient, new_available_properties, new_properties_to_offer, new_gain, new_recipient_gain)
+            properties_to_offer_result, gain_result, recipient_gain_result = self.decide_trade_recurse(recipient, new_available_properties, new_properties_to_offer, new_gain, new_recipient_gain, key | property_bit(property))
             gain_diff = gain - gain_result
             if recipient_gain_result >= -100 and gain_diff < min_gain_diff:
                 min_gain_diff = gain_diff
@@ -331,6 +462,11 @@ class AIPlayer(Player):
                 best_properties_to_offer = properties_to_offer_result
         
         return best_properties_to_offer, best_gain, best_recipient_gain
+
+    def trade_budget_exhausted(self):
+        if self.trade_node_budget is not None and self.trade_nodes >= self.trade_node_budget:
+            return True
+        return self.trade_deadline is not None and time.perf_counter() >= self.trade_deadline
     
     def copy_default_dict_list(self, item):
         new_item = defaultdict(list)
@@ -338,22 +474,6 @@ class AIPlayer(Player):
             new_item[key] = item[key]
         return new_item
     
-    def add_to_analyzed_trades(self, properties):
-        property_names = []
-        for property_list in properties.values():
-            for property in property_list:
-                property_names.append(property.name)
-        names = ''.join(property_names)
-        self.analyzed_properties.add(names)
-
-    def trade_already_analyzed(self, properties):
-        property_names = []
-        for property_list in properties.values():
-            for property in property_list:
-                property_names.append(property.name)
-        names = ''.join(property_names)
-        return names in self.analyzed_properties
-
     def attempt_trade_for_goojf_card(self):
         # TODO: add check for how much money. if less than 50, will need to mortgage something anyways probably
         other_players = self.trade_matrix.get_other_players_with_goojf_cards(self)
@@ -371,6 +491,10 @@ class AIPlayer(Player):
             heapq.heappush(properties, (-worth, property))
         return properties
 
+    # last check on an offer this player has built, before it's made
+    def will_propose_trade_offer(self, trade_offer: TradeOffer):
+        return True
+
     def will_accept_trade_offer(self, trade_offer: TradeOffer):
         gain = trade_offer.initiator_bundle.money - trade_offer.recipient_bundle.money
         initiator_gain = trade_offer.recipient_bundle.money - trade_offer.initiator_bundle.money
@@ -407,7 +531,16 @@ class AIPlayer(Player):
 
         return gain > 0 and initiator_gain - gain < self.trade_threshold
 
+    # worths only change when real estate, houses or mortgages do, so they're cached per game until then
     def calculate_property_worth(self, owner, property, modifier=0):
+        key = (owner, property.board_space, modifier)
+        worth = self.trade_matrix.worth_cache.get(key, self.trade_matrix.last_version)
+        if worth is None:
+            worth = self.evaluate_property_worth(owner, property, modifier)
+            self.trade_matrix.worth_cache.add(key, worth)
+        return worth
+
+    def evaluate_property_worth(self, owner, property, modifier=0):
             # calculates worth of a property for a player if they were to own it
             worth = property.cost
             if property.owner == None or property.owner.player_number != owner:
@@ -0,0 +1,370 @@
+import argparse
+import time
+from enums import DeckType, LocationKeys
+from cards import init_card_effects
+from compact_state import get_board_tables, NUM_SPACES, STARTING_MONEY, PROPERTY, RAILROAD, UTILITY
+from markov import CardProbe, JAIL, VISITING_JAIL, JAIL_TURNS
+import events
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Plays many games at once as NumPy arrays, one row per game, for statistics like landing frequencies
+# and game lengths. Every game uses the same fixed policy: buy any property or railroad the player
+# can pay for in cash, never buy utilities, and never auction, build, mortgage or trade. Dice, jail,
+# doubles, rent, taxes and both card decks follow the same rules as the object engine in board.py,
+# and a game ends when the player whose turn it is goes bankrupt or the turn limit is reached.
+
+SIMULATION_MAX_TURNS = 1000
+BATCH_SIZE = 10000
+MAX_CARD_MOVES = 3 # chance can move back 3 onto community chest, which can move again
+STAY = -1 # card destination meaning the player doesn't move
+JAIL_FEE = 50
+GO_MONEY = 200
+LUXURY_TAX = 100
+INCOME_TAX_LIMIT = 200
+
+# what happens on landing, by board space
+NOTHING = 0
+REAL_ESTATE = 1
+CHANCE = 2
+COMMUNITY_CHEST = 3
+INCOME_TAX = 4
+LUXURY = 5
+GO_TO_JAIL = 6
+
+
+class MoneyProbe(CardProbe):
+    # records how a card moves the player and what it does to their money and an opponent's
+    def __init__(self, board_space):
+        super().__init__(board_space)
+        self.opponent = OpponentProbe()
+        self.players = [self, self.opponent]
+        self.money = 0
+        self.advances = False # advancing collects $200 for passing go, moving back doesn't
+        self.double_if_owned = False
+
+    def advance(self, player, space, double_if_owned=False):
+        self.destination = space
+        self.advances = True
+        self.double_if_owned = double_if_owned
+
+    def add_money(self, amount, other_actions=True):
+        self.money += amount
+
+    def charge(self, amount):
+        self.money -= amount
+
+class OpponentProbe():
+    def __init__(self):
+        self.player_number = 1
+        self.money = 0
+
+    def add_money(self, amount, other_actions=True):
+        self.money += amount
+
+    def charge(self, amount):
+        self.money -= amount
+
+
+class BatchDeck():
+    # a deck's card effects as tables indexed by [board space, card]
+    def __init__(self, deck_type, location_key, tables):
+        effects = init_card_effects(deck_type)
+        self.size = len(effects)
+        self.destinations = np.full((NUM_SPACES, self.size), STAY, dtype=np.int16)
+        self.advances = np.zeros((NUM_SPACES, self.size), dtype=bool)
+        self.double_rent = np.zeros((NUM_SPACES, self.size), dtype=bool)
+        self.money = np.zeros(self.size, dtype=np.int32) # paid to the drawer before transfers
+        self.transfers = np.zeros(self.size, dtype=np.int32) # paid by the drawer to each other player
+        self.goojf = -1 # the card that isn't returned to the deck
+        sinks = events.bus.sinks
+        events.bus.set_sinks([]) # the probes aren't real players
+        try:
+            for space, key in enumerate(tables.keys):
+                if key != location_key:
+                    continue
+                for card, effect in enumerate(effects):
+                    probe = MoneyProbe(space)
+                    if not effect(probe, probe):
+                        self.goojf = card
+                    if probe.destination is not None:
+                        self.destinations[space, card] = probe.destination
+                    self.advances[space, card] = probe.advances
+                    self.double_rent[space, card] = probe.double_if_owned
+                    self.transfers[card] = probe.opponent.money
+                    self.money[card] = probe.money + probe.opponent.money
+        finally:
+            events.bus.set_sinks(sinks)
+
+    # shuffled draw order for each game
+    def shuffle(self, rng, num_games):
+        return rng.permuted(np.tile(np.arange(self.size, dtype=np.int8), (num_games, 1)), axis=1)
+
+    def draw(self, order, pointers, removed, rows):
+        cards = order[rows, pointers[rows] % self.size]
+        skip = removed[rows] & (cards == self.goojf)
+        if skip.any():
+            pointers[rows[skip]] += 1
+            cards[skip] = order[rows[skip], pointers[rows[skip]] % self.size]
+        pointers[rows] += 1
+        return cards
+
+
+class BatchTables():
+    # static board tables in the shapes the batch engine indexes them with
+    def __init__(self):
+        tables = get_board_tables()
+        actions = {LocationKeys.CHANCE: CHANCE, LocationKeys.COMMUNITY_CHEST: COMMUNITY_CHEST, LocationKeys.INCOME_TAX: INCOME_TAX,
+                   LocationKeys.LUXURY_TAX: LUXURY, LocationKeys.GO_TO_JAIL: GO_TO_JAIL}
+        self.actions = np.array([REAL_ESTATE if tables.kinds[space] != 0 else actions.get(key, NOTHING) for space, key in enumerate(tables.keys)], dtype=np.int8)
+        self.kinds = np.array(tables.kinds, dtype=np.int8)
+        self.costs = np.array(tables.costs, dtype=np.int32)
+        self.base_rents = np.array([rent[0] if rent else 0 for rent in tables.rents], dtype=np.int32)
+        self.buyable = (self.kinds == PROPERTY) | (self.kinds == RAILROAD)
+        # the spaces in each space's color set, padded with -1 to the largest set
+        set_size = max(len(spaces) for spaces in tables.color_spaces.values())
+        self.members = np.full((NUM_SPACES, set_size), -1, dtype=np.int16)
+        self.set_sizes = np.zeros(NUM_SPACES, dtype=np.int8)
+        for spaces in tables.color_spaces.values():
+            for space in spaces:
+                self.members[space, :len(spaces)] = spaces
+                self.set_sizes[space] = len(spaces)
+        self.names = tables.names
+        self.chance = BatchDeck(DeckType.CHANCE, LocationKeys.CHANCE, tables)
+        self.community_chest = BatchDeck(DeckType.COMMUNITY_CHEST, LocationKeys.COMMUNITY_CHEST, tables)
+
+_batch_tables = None
+
+def get_batch_tables():
+    global _batch_tables
+    if _batch_tables is None:
+        _batch_tables = BatchTables()
+    return _batch_tables
+
+
+class BatchGames():
+    # leave_jail: use a goojf card or pay $50 to leave jail straight away, as the ai does while no
+    # opponent has a monopoly; otherwise players stay in jail until they roll doubles or serve their time
+    def __init__(self, num_games, num_players=4, rng=None, max_turns=SIMULATION_MAX_TURNS, leave_jail=True):
+        if np is None:
+            raise ImportError("numpy is required for the batch engine")
+        self.tables = get_batch_tables()
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.num_games = num_games
+        self.num_players = num_players
+        self.max_turns = max_turns
+        self.leave_jail = leave_jail
+        self.positions = np.zeros((num_games, num_players), dtype=np.int16)
+        self.cash = np.full((num_games, num_players), STARTING_MONEY, dtype=np.int32)
+        self.property_values = np.zeros((num_games, num_players), dtype=np.int32) # cost of real estate held, for income tax
+        self.jail_counters = np.zeros((num_games, num_players), dtype=np.int8)
+        self.goojf_cards = np.zeros((num_games, num_players), dtype=np.int8)
+        self.owners = np.zeros((num_games, NUM_SPACES), dtype=np.int8) # player index + 1, 0 if unowned
+        self.current = np.full(num_games, num_players - 1, dtype=np.int64)
+        self.doubles = np.zeros(num_games, dtype=np.int8)
+        self.turns = np.zeros(num_games, dtype=np.int32)
+        self.over = np.zeros(num_games, dtype=bool)
+        self.losers = np.full(num_games, -1, dtype=np.int8) # player index, -1 if the turn limit was reached
+        self.landings = np.zeros(NUM_SPACES, dtype=np.int64) # landings on each space across all games
+        self.chance_order = self.tables.chance.shuffle(self.rng, num_games)
+        self.chance_pointers = np.zeros(num_games, dtype=np.int64)
+        self.chance_removed = np.zeros(num_games, dtype=bool)
+        self.community_chest_order = self.tables.community_chest.shuffle(self.rng, num_games)
+        self.community_chest_pointers = np.zeros(num_games, dtype=np.int64)
+        self.community_chest_removed = np.zeros(num_games, dtype=bool)
+
+    def play(self):
+        while self.step():
+            pass
+        return self
+
+    # plays one roll in every unfinished game; returns False once they're all over
+    def step(self):
+        rows = np.flatnonzero(~self.over)
+        if len(rows) == 0:
+            return False
+        players = self.current[rows]
+        turn_over = (self.doubles[rows] == 0) | (self.jail_counters[rows, players] > 0)
+        out_of_turns = turn_over & (self.turns[rows] >= self.max_turns)
+        if out_of_turns.any():
+            self.over[rows[out_of_turns]] = True
+            keep = ~out_of_turns
+            rows, players, turn_over = rows[keep], players[keep], turn_over[keep]
+            if len(rows) == 0:
+                return False
+        players = np.where(turn_over, (players + 1) % self.num_players, players)
+        self.current[rows] = players
+        self.turns[rows] += turn_over
+
+        dice = self.rng.integers(1, 7, size=(2, len(rows)))
+        totals = dice[0] + dice[1]
+        rolled_doubles = dice[0] == dice[1]
+
+        # jail
+        jailed = self.jail_counters[rows, players] > 0
+        leaving = jailed & rolled_doubles
+        if self.leave_jail:
+            use_card = jailed & ~leaving & (self.goojf_cards[rows, players] > 0)
+            self.goojf_cards[rows[use_card], players[use_card]] -= 1
+            pay = jailed & ~leaving & ~use_card & (self.cash[rows, players] >= JAIL_FEE)
+            leaving |= use_card | pay
+        else:
+            pay = np.zeros(len(rows), dtype=bool)
+        served = jailed & ~leaving & (self.jail_counters[rows, players] == 1)
+        pay |= served
+        leaving |= served
+        self.cash[rows[pay], players[pay]] -= JAIL_FEE
+        staying = jailed & ~leaving
+        self.jail_counters[rows[staying], players[staying]] -= 1
+        self.jail_counters[rows[leaving], players[leaving]] = 0
+        self.positions[rows[leaving], players[leaving]] = VISITING_JAIL
+
+        # doubles; leaving jail never grants another roll
+        self.doubles[rows] = np.where(jailed, 0, np.where(rolled_doubles, self.doubles[rows] + 1, 0))
+        third = ~jailed & (self.doubles[rows] >= 3)
+        self.send_to_jail(rows[third], players[third])
+
+        moving = ~staying & ~third
+        rows, players, totals = rows[moving], players[moving], totals[moving]
+        starts = self.positions[rows, players]
+        spaces = (starts + totals) % NUM_SPACES
+        self.cash[rows, players] += np.where(spaces <= starts, GO_MONEY, 0).astype(np.int32)
+        self.land(rows, players, spaces, totals, np.zeros(len(rows), dtype=bool))
+
+        bankrupt = self.cash[rows, players] < 0
+        self.over[rows[bankrupt]] = True
+        self.losers[rows[bankrupt]] = players[bankrupt]
+        return True
+
+    def send_to_jail(self, rows, players):
+        self.positions[rows, players] = JAIL
+        self.jail_counters[rows, players] = JAIL_TURNS
+        self.doubles[rows] = 0
+
+    # resolves the current players of the given games landing on spaces, following card moves
+    def land(self, rows, players, spaces, totals, double_rent):
+        tables = self.tables
+        for _ in range(MAX_CARD_MOVES + 1):
+            if len(rows) == 0:
+                break
+            self.positions[rows, players] = spaces
+            self.landings += np.bincount(spaces, minlength=NUM_SPACES)
+            actions = tables.actions[spaces]
+
+            jailed = actions == GO_TO_JAIL
+            self.send_to_jail(rows[jailed], players[jailed])
+            taxed = actions == LUXURY
+            self.cash[rows[taxed], players[taxed]] -= LUXURY_TAX
+            taxed = actions == INCOME_TAX
+            if taxed.any():
+                worths = self.cash[rows[taxed], players[taxed]] + self.property_values[rows[taxed], players[taxed]]
+                self.cash[rows[taxed], players[taxed]] -= np.minimum(INCOME_TAX_LIMIT, (worths * 0.1).astype(np.int32))
+            owned = actions == REAL_ESTATE
+            if owned.any():
+                self.land_on_real_estate(rows[owned], players[owned], spaces[owned], totals[owned], double_rent[owned])
+
+            # cards; only the games whose card moves the player go round again
+            moved = np.zeros(len(rows), dtype=bool)
+            destinations = np.full(len(rows), STAY, dtype=np.int64)
+            for action, deck, order, pointers, removed in (
+                    (CHANCE, tables.chance, self.chance_order, self.chance_pointers, self.chance_removed),
+                    (COMMUNITY_CHEST, tables.community_chest, self.community_chest_order, self.community_chest_pointers, self.community_chest_removed)):
+                drawing = np.flatnonzero(actions == action)
+                if len(drawing) == 0:
+                    continue
+                card_rows, card_players, card_spaces = rows[drawing], players[drawing], spaces[drawing]
+                cards = deck.draw(order, pointers, removed, card_rows)
+                drew_goojf = cards == deck.goojf
+                removed[card_rows[drew_goojf]] = True
+                self.goojf_cards[card_rows[drew_goojf], card_players[drew_goojf]] += 1
+                transfers = deck.transfers[cards]
+                self.cash[card_rows] += transfers[:, None]
+                self.cash[card_rows, card_players] += deck.money[cards] - transfers * self.num_players
+                card_destinations = deck.destinations[card_spaces, cards]
+                to_jail = card_destinations == JAIL
+                self.send_to_jail(card_rows[to_jail], card_players[to_jail])
+                moves = (card_destinations != STAY) & ~to_jail
+                passes_go = moves & deck.advances[card_spaces, cards] & (card_destinations <= card_spaces)
+                self.cash[card_rows[passes_go], card_players[passes_go]] += GO_MONEY
+                moved[drawing[moves]] = True
+                destinations[drawing[moves]] = card_destinations[moves]
+                double_rent[drawing] = deck.double_rent[card_spaces, cards]
+            rows, players, spaces, totals, double_rent = rows[moved], players[moved], destinations[moved], totals[moved], double_rent[moved]
+
+    def land_on_real_estate(self, rows, players, spaces, totals, double_rent):
+        tables = self.tables
+        owners = self.owners[rows, spaces].astype(np.int64)
+
+        buying = (owners == 0) & tables.buyable[spaces] & (self.cash[rows, players] >= tables.costs[spaces])
+        self.owners[rows[buying], spaces[buying]] = players[buying] + 1
+        self.cash[rows[buying], players[buying]] -= tables.costs[spaces[buying]]
+        self.property_values[rows[buying], players[buying]] += tables.costs[spaces[buying]]
+
+        paying = (owners != 0) & (owners != players + 1)
+        if not paying.any():
+            return
+        rows, players, spaces, totals, double_rent, owners = rows[paying], players[paying], spaces[paying], totals[paying], double_rent[paying], owners[paying]
+        members = tables.members[spaces]
+        held = ((self.owners[rows[:, None], members] == owners[:, None]) & (members >= 0)).sum(axis=1)
+        full_set = held == tables.set_sizes[spaces]
+        kinds = tables.kinds[spaces]
+        rents = np.where(full_set, 2, 1) * tables.base_rents[spaces]
+        railroad_rents = (25 << np.maximum(held - 1, 0)) * np.where(double_rent, 2, 1)
+        rents = np.where(kinds == RAILROAD, railroad_rents, rents)
+        rents = np.where(kinds == UTILITY, totals * np.where(full_set | double_rent, 10, 4), rents).astype(np.int32)
+        self.cash[rows, players] -= rents
+        self.cash[rows, owners - 1] += rents # each game appears once, so there are no repeated indices
+
+
+class BatchResult():
+    def __init__(self, turns, losers, landings):
+        self.turns = turns # turns played by each game
+        self.losers = losers # bankrupt player index in each game, -1 if the turn limit was reached
+        self.landings = landings # landings on each space across all games
+
+    def get_landing_frequencies(self):
+        return self.landings / max(self.landings.sum(), 1)
+
+# plays num_games fixed-policy games in batches of batch_size and merges their statistics
+def simulate_batch(num_games, num_players=4, max_turns=SIMULATION_MAX_TURNS, seed=None, batch_size=BATCH_SIZE, leave_jail=True):
+    rng = np.random.default_rng(seed)
+    turns = []
+    losers = []
+    landings = np.zeros(NUM_SPACES, dtype=np.int64)
+    for start in range(0, num_games, batch_size):
+        games = BatchGames(min(batch_size, num_games - start), num_players, rng, max_turns, leave_jail).play()
+        turns.append(games.turns)
+        losers.append(games.losers)
+        landings += games.landings
+    return BatchResult(np.concatenate(turns), np.concatenate(losers), landings)
+
+def print_batch_summary(result, elapsed):
+    num_games = len(result.turns)
+    finished = result.losers >= 0
+    print(f"Games: {num_games} ({finished.sum()} ended in bankruptcy)")
+    print(f"Turns: mean {result.turns.mean():.1f}, median {np.median(result.turns):.0f}, "
+          f"10th-90th percentile {np.percentile(result.turns, 10):.0f}-{np.percentile(result.turns, 90):.0f}")
+    print(f"Elapsed: {elapsed:.2f}s ({num_games / max(elapsed, 1e-9) * 60:.0f} games/min)")
+    print("Landings per space:")
+    for name, frequency in zip(get_batch_tables().names, result.get_landing_frequencies()):
+        print(f"\t{name}: {frequency * 100:.2f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play many fixed-policy games at once with NumPy")
+    parser.add_argument('-g', '--games', type=int, default=BATCH_SIZE, help='Number of games to play')
+    parser.add_argument('-p', '--players', type=int, default=4, help='Players per game')
+    parser.add_argument('-t', '--max-turns', type=int, default=SIMULATION_MAX_TURNS, help='Turn limit per game')
+    parser.add_argument('-b', '--batch-size', type=int, default=BATCH_SIZE, help='Games held in memory at once')
+    parser.add_argument('-s', '--seed', type=int, default=None, help='Seed for the dice and decks')
+    parser.add_argument('-l', '--stay-in-jail', action="store_true", help='Stay in jail instead of paying to leave')
+    args = parser.parse_args()
+
+    if np is None:
+        print("numpy is required for the batch engine")
+    else:
+        start = time.perf_counter()
+        result = simulate_batch(args.games, args.players, args.max_turns, args.seed, args.batch_size, not args.stay_in_jail)
+        print_batch_summary(result, time.perf_counter() - start)
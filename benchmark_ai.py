@@ -0,0 +1,208 @@
+import argparse
+import json
+import sys
+import time
+from enums import LocationKeys as L
+from board import Board, create_ai_players
+from compact_state import CompactState, get_board_tables
+from player import TradeOffer
+import settings
+import events
+
+# Times the ai's decision entry points (decide_trade, decide_mortgage, resolve_development and
+# will_accept_trade_offer) on a library of canned positions, from a handful of deeds to 20+ with
+# several monopolies, and counts the nodes each search expanded. Results can be written as json and
+# checked against an earlier run, so a change that slows the search down or makes it expand more
+# nodes shows up as a regression.
+
+# name -> (money, deeds) for each of 4 players, where a deed is a LocationKeys or (LocationKeys, houses, mortgaged).
+# the decisions are made by player 1
+POSITIONS = {
+    "opening": [
+        (1340, [L.MEDITERRANEAN, L.READING_RR]),
+        (1400, [L.ORIENTAL]),
+        (1360, [L.ST_CHARLES]),
+        (1500, []),
+    ],
+    "early": [
+        (1020, [L.BALTIC, L.VERMONT, L.STATES, L.KENTUCKY, L.ELECTRIC]),
+        (1060, [L.ORIENTAL, L.ST_JAMES, L.ILLINOIS, L.PENNSYLVANIA_RR]),
+        (980, [L.CONNECTICUT, L.VIRGINIA, L.ATLANTIC, L.PACIFIC]),
+        (1150, [L.MEDITERRANEAN, L.TENNESSEE, L.PARK_PLACE]),
+    ],
+    "first_monopoly": [
+        (640, [L.ST_JAMES, L.TENNESSEE, L.NEW_YORK, L.BALTIC, L.READING_RR, L.VENTNOR]),
+        (420, [(L.ORIENTAL, 1, False), (L.VERMONT, 1, False), (L.CONNECTICUT, 1, False), L.ILLINOIS]),
+        (900, [L.ST_CHARLES, L.STATES, L.KENTUCKY, L.PACIFIC, L.SHORT_LINE]),
+        (760, [L.MEDITERRANEAN, L.VIRGINIA, L.MARVIN, L.BOARDWALK, L.WATER]),
+    ],
+    "midgame": [
+        (380, [(L.ST_JAMES, 2, False), (L.TENNESSEE, 2, False), (L.NEW_YORK, 2, False),
+               L.KENTUCKY, L.INDIANA, L.ILLINOIS, L.READING_RR, L.PENNSYLVANIA_RR, L.BO_RR,
+               (L.BALTIC, 0, True), (L.ELECTRIC, 0, True)]),
+        (520, [(L.ORIENTAL, 3, False), (L.VERMONT, 3, False), (L.CONNECTICUT, 3, False), L.PACIFIC, L.ATLANTIC]),
+        (700, [L.ST_CHARLES, L.STATES, L.VIRGINIA, L.SHORT_LINE, L.MARVIN]),
+        (450, [L.MEDITERRANEAN, L.NORTH_CAROLINA, L.PARK_PLACE, L.WATER, (L.VENTNOR, 0, True)]),
+    ],
+    "late": [
+        (900, [(L.ST_JAMES, 4, False), (L.TENNESSEE, 4, False), (L.NEW_YORK, 4, False),
+               (L.KENTUCKY, 3, False), (L.INDIANA, 3, False), (L.ILLINOIS, 3, False),
+               (L.ST_CHARLES, 2, False), (L.STATES, 2, False), (L.VIRGINIA, 2, False),
+               L.READING_RR, L.PENNSYLVANIA_RR, L.BO_RR, L.SHORT_LINE,
+               L.ELECTRIC, L.WATER, L.BALTIC, L.ORIENTAL, L.ATLANTIC, (L.PACIFIC, 0, True), (L.PARK_PLACE, 0, True)]),
+        (350, [L.MEDITERRANEAN, L.VERMONT, L.VENTNOR, L.MARVIN, L.BOARDWALK]),
+        (280, [L.CONNECTICUT, L.NORTH_CAROLINA, L.PENNSYLVANIA]),
+        (510, []),
+    ],
+    "endgame": [
+        (60, [(L.ST_JAMES, 5, False), (L.TENNESSEE, 5, False), (L.NEW_YORK, 5, False),
+              (L.KENTUCKY, 5, False), (L.INDIANA, 5, False), (L.ILLINOIS, 5, False),
+              (L.ST_CHARLES, 4, False), (L.STATES, 4, False), (L.VIRGINIA, 4, False),
+              (L.MEDITERRANEAN, 3, False), (L.BALTIC, 3, False),
+              (L.ATLANTIC, 2, False), (L.VENTNOR, 2, False), (L.MARVIN, 2, False),
+              L.READING_RR, L.PENNSYLVANIA_RR, L.BO_RR, L.SHORT_LINE, L.ELECTRIC, L.WATER,
+              (L.ORIENTAL, 0, True), (L.PACIFIC, 0, True), (L.PARK_PLACE, 0, True)]),
+        (140, [L.VERMONT, L.CONNECTICUT, L.BOARDWALK]),
+        (90, [L.NORTH_CAROLINA, L.PENNSYLVANIA]),
+        (20, []),
+    ],
+}
+
+DECISIONS = ("decide_trade", "decide_mortgage", "resolve_development", "will_accept_trade_offer")
+DEVELOPMENT_MONEY = 1500 # money given to the player before resolve_development, so it has something to build with
+MORTGAGE_SHARE = 0.6 # decide_mortgage is asked for the player's money plus this much of what it could raise
+
+
+# builds the position on a fresh board of ai players; returns the players in turn order
+def create_position(name):
+    specs = POSITIONS[name]
+    players, _ = create_ai_players(len(specs))
+    board = Board(players)
+    spaces = {key: space for space, key in enumerate(get_board_tables().keys)}
+    state = CompactState(len(players))
+    for i, (money, deeds) in enumerate(specs):
+        state.cash[i] = money
+        for deed in deeds:
+            key, houses, mortgaged = deed if isinstance(deed, tuple) else (deed, 0, False)
+            state.owners[spaces[key]] = i + 1
+            state.houses[spaces[key]] = houses
+            state.mortgaged[spaces[key]] = mortgaged
+    state.apply_to(board)
+    return players
+
+# player 2 offers two of its deeds and $100 for one of player 1's, preferring deeds without houses
+def create_trade_offer(players):
+    player, other = players[0], players[1]
+    trade_offer = TradeOffer(other.player_number, player.player_number)
+    offered = sorted((property for property in other.properties.values() if not property.can_develop or property.num_houses == 0), key=lambda property: property.board_space)
+    requested = sorted((property for property in player.properties.values() if not property.can_develop or property.num_houses == 0), key=lambda property: property.board_space)
+    trade_offer.initiator_bundle.properties.extend(offered[:2])
+    trade_offer.initiator_bundle.money = 100
+    trade_offer.recipient_bundle.properties.extend(requested[:1])
+    return trade_offer
+
+def get_liquidation_value(player):
+    total = 0
+    for property in player.properties.values():
+        if property.is_mortgaged:
+            continue
+        total += property.mortgage_amount
+        if property.can_develop:
+            total += property.num_houses * property.build_cost // 2
+    return total
+
+# sets up a fresh position, makes the decision once and returns (seconds, nodes expanded). nodes is
+# None for will_accept_trade_offer, which adds up worths rather than searching
+def run_decision(name, decision):
+    players = create_position(name)
+    player = players[0]
+    if decision == "decide_trade":
+        start = time.perf_counter()
+        player.decide_trade()
+        return time.perf_counter() - start, player.trade_nodes
+    if decision == "decide_mortgage":
+        amount = player.money + int(get_liquidation_value(player) * MORTGAGE_SHARE)
+        start = time.perf_counter()
+        player.decide_mortgage(amount)
+        return time.perf_counter() - start, player.mortgage_plan_states + player.house_sale_states
+    if decision == "resolve_development":
+        player.money += DEVELOPMENT_MONEY
+        start = time.perf_counter()
+        player.resolve_development()
+        return time.perf_counter() - start, player.development_states
+    trade_offer = create_trade_offer(players)
+    start = time.perf_counter()
+    player.will_accept_trade_offer(trade_offer)
+    return time.perf_counter() - start, None
+
+def run_benchmarks(runs, positions=None, decisions=DECISIONS):
+    headless, sinks = settings.headless, events.bus.sinks
+    settings.headless = True
+    events.bus.set_sinks([])
+    results = []
+    try:
+        for name in positions or POSITIONS:
+            deeds = len(POSITIONS[name][0][1])
+            for decision in decisions:
+                times = []
+                nodes = 0
+                for _ in range(runs):
+                    elapsed, nodes = run_decision(name, decision)
+                    times.append(elapsed * 1000)
+                results.append({
+                    "position": name,
+                    "decision": decision,
+                    "deeds": deeds,
+                    "runs": runs,
+                    "mean_ms": sum(times) / runs,
+                    "min_ms": min(times),
+                    "max_ms": max(times),
+                    "nodes": nodes,
+                })
+    finally:
+        settings.headless = headless
+        events.bus.set_sinks(sinks)
+    return results
+
+# results that expanded more nodes than the baseline, or got slower by more than tolerance (a fraction of the baseline's mean)
+def find_regressions(results, baseline, tolerance):
+    previous = {(result["position"], result["decision"]): result for result in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get((result["position"], result["decision"]))
+        if old is None:
+            continue
+        if result["nodes"] is not None and old["nodes"] is not None and result["nodes"] > old["nodes"]:
+            regressions.append((result, f"nodes {old['nodes']} -> {result['nodes']}"))
+        elif result["mean_ms"] > old["mean_ms"] * (1 + tolerance):
+            regressions.append((result, f"mean {old['mean_ms']:.3f}ms -> {result['mean_ms']:.3f}ms"))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark ai decisions on canned positions")
+    parser.add_argument('-r', '--runs', type=int, default=5, help='Times to make each decision, each on a fresh position')
+    parser.add_argument('-p', '--position', action='append', choices=list(POSITIONS), help='Only run this position (can be repeated)')
+    parser.add_argument('-d', '--decision', action='append', choices=DECISIONS, help='Only time this decision (can be repeated)')
+    parser.add_argument('-o', '--output', help='Write the results to this json file')
+    parser.add_argument('-b', '--baseline', help='json results of an earlier run to check for regressions against')
+    parser.add_argument('-t', '--tolerance', type=float, default=0.5, help='How much slower than the baseline a mean time can get before it counts as a regression')
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.runs, args.position, args.decision or DECISIONS)
+    print(f"{'position':<16} {'decision':<24} {'deeds':>5} {'mean (ms)':>10} {'min (ms)':>10} {'max (ms)':>10} {'nodes':>7}")
+    for result in results:
+        print(f"{result['position']:<16} {result['decision']:<24} {result['deeds']:>5} {result['mean_ms']:10.3f} {result['min_ms']:10.3f} {result['max_ms']:10.3f} {'-' if result['nodes'] is None else result['nodes']:>7}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"runs": args.runs, "results": results}, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = find_regressions(results, json.load(file)["results"], args.tolerance)
+        for result, reason in regressions:
+            print(f"Regression in {result['position']} {result['decision']}: {reason}")
+        if len(regressions) > 0:
+            sys.exit(1)
+        print("No regressions")
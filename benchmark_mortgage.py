@@ -0,0 +1,85 @@
+import argparse
+import random
+import time
+from collections import defaultdict
+from copy import deepcopy
+from enums import OwnershipDegree
+from board import Board, create_ai_players
+from transposition import property_bit
+
+# Times AIPlayer.decide_mortgage_plan against portfolios of increasing size, and for small
+# portfolios checks it against the exhaustive permutation search it replaced.
+
+
+def exhaustive_mortgage_plan(player, available_properties, properties_to_mortgage, amount, loss_in_worth):
+    # the original decide_mortgage_recurse, kept as a reference
+    if amount <= 0 or len(available_properties) == 0:
+        return properties_to_mortgage, loss_in_worth
+
+    min_loss_in_worth = float('inf')
+    best_properties_to_mortgage = deepcopy(properties_to_mortgage)
+
+    for property in available_properties:
+        new_available_properties = set(available_properties)
+        new_available_properties.remove(property)
+        new_loss_in_worth = loss_in_worth + player.calculate_property_worth(player.player_number, property, -len(properties_to_mortgage[property.color]))
+        new_properties_to_mortgage = deepcopy(properties_to_mortgage)
+        new_properties_to_mortgage[property.color].append(property)
+        new_amount = amount - property.mortgage_amount
+        properties_to_mortgage_result, loss_in_worth_result = exhaustive_mortgage_plan(player, new_available_properties, new_properties_to_mortgage, new_amount, new_loss_in_worth)
+        if loss_in_worth_result < min_loss_in_worth:
+            min_loss_in_worth = loss_in_worth_result
+            best_properties_to_mortgage = deepcopy(properties_to_mortgage_result)
+
+    return best_properties_to_mortgage, min_loss_in_worth
+
+def give_property(player, property):
+    # hand over a deed without triggering the player's trade/build decisions
+    property.owner = player
+    player.properties[property.name] = property
+    player.properties_by_set[property.color].append(property)
+    player.owned_mask |= property_bit(property)
+    player.trade_matrix.refresh_color(player.player_number, property.color)
+    player.refresh_ledger(property.color)
+
+def create_position(num_properties, rng):
+    players, _ = create_ai_players(2)
+    board = Board(players)
+    real_estate = [location for location in board.locations.values() if hasattr(location, "mortgage_amount")]
+    player = players[0]
+    for property in rng.sample(real_estate, num_properties):
+        give_property(player, property)
+    _, properties = player.calculate_mortgage_yield(OwnershipDegree.MONOPOLY)
+    amount = rng.randint(1, sum(property.mortgage_amount for property in properties) + 100)
+    return player, properties, amount
+
+def time_call(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - start) / repeat, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark ai mortgage decisions by portfolio size")
+    parser.add_argument('-m', '--max-properties', type=int, default=20, help='Largest portfolio to time')
+    parser.add_argument('-e', '--max-exhaustive', type=int, default=7, help='Largest portfolio to check against the exhaustive search')
+    parser.add_argument('-p', '--positions', type=int, default=5, help='Random positions per portfolio size')
+    parser.add_argument('-s', '--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'deeds':>5} {'planner (ms)':>13} {'exhaustive (ms)':>16}")
+    for num_properties in range(1, args.max_properties + 1):
+        planner_total = 0
+        exhaustive_total = 0
+        for _ in range(args.positions):
+            player, properties, amount = create_position(num_properties, rng)
+            elapsed, (_, loss) = time_call(lambda: player.decide_mortgage_plan(properties, amount), 3)
+            planner_total += elapsed
+            if num_properties <= args.max_exhaustive:
+                elapsed, (_, expected_loss) = time_call(lambda: exhaustive_mortgage_plan(player, set(properties), defaultdict(list), amount, 0), 1)
+                exhaustive_total += elapsed
+                assert loss == expected_loss, f"planner loss {loss} != exhaustive loss {expected_loss}"
+        exhaustive = f"{exhaustive_total / args.positions * 1000:16.3f}" if num_properties <= args.max_exhaustive else f"{'-':>16}"
+        print(f"{num_properties:>5} {planner_total / args.positions * 1000:13.3f} {exhaustive}")
@@ -2,17 +2,26 @@ from abc import abstractmethod
 from collections import defaultdict
 import random
 import argparse
+import json
+import sys
 import time
-from enums import DeckType, Colors, LocationKeys
+from enums import DeckType, Colors, LocationKeys, PlayerTokens
+from transposition import property_bit
+from board_spec import SPACES, BOARD_SPACES, PROPERTIES, RAILROADS, UTILITIES, RAILROAD_COST, UTILITY_COST, PROPERTY_RENTS, RAILROAD_RENTS, UTILITY_MULTIPLIERS
 from player import Player
 from humanplayer import HumanPlayer
 from aiplayer import AIPlayer
+from expectimaxplayer import ExpectimaxPlayer
+from mctsplayer import MCTSPlayer
 from cards import Deck
 from trade_matrix import TradeMatrix
 import settings
+from events import emit, RentPaid, PropertyBought, PropertyMortgaged, PropertyUnmortgaged, HouseBuilt, HouseSold, PassedGo, Landed, AuctionStarted, AuctionDropped, BidPlaced, AuctionWon, SentToJail, LeftJail, TurnStarted, InJail, DiceRolled, StayedInJail, ThirdDoubles, Moving, GameOver
+import events
 
 JAIL_BOARD_SPACE = 40
 VISITING_JAIL_BOARD_SPACE = 10
+SIMULATION_MAX_TURNS = 1000
 
 
 class Location():
@@ -46,17 +55,13 @@ class RealEstate(Location):
         
         if self.owner is not None:
             rent = self.calculate_rent(board, double_if_owned)
-            print(f"Player {player.player_number} must pay ${rent} rent to player {self.owner.player_number}")
-            if not settings.fast:
-                time.sleep(0.5)
+            emit(RentPaid, player.player_number, self.owner.player_number, self, rent)
             player.charge(rent)
             self.owner.add_money(rent)
 
         elif self.owner is None:
             if player.decide_purchase(self):
-                print(f"Player {player.player_number} buys {self.name_colored}")
-                if not settings.fast:
-                    time.sleep(0.5)
+                emit(PropertyBought, player.player_number, self)
                 player.charge(self.cost)
                 player.gain_real_estate(self)
             else:
@@ -68,24 +73,31 @@ class RealEstate(Location):
         pass
 
     def mortgage(self):
-        print(f"Player {self.owner.player_number} mortgages {self.name_colored}")
-        if not settings.fast:
-            time.sleep(0.5)
+        emit(PropertyMortgaged, self.owner.player_number, self)
         self.is_mortgaged = True
         self.owner.add_money(self.mortgage_amount, False)
         self.owner.mortgaged_property_names.add(self.name)
+        self.owner.mortgaged_mask |= property_bit(self)
+        self.owner.trade_matrix.record_mortgage_change(self.owner.player_number)
+        self.owner.refresh_ledger(self.color)
 
     def unmortgage(self):
-        print(f"Player {self.owner.player_number} unmortgages {self.name_colored}")
-        if not settings.fast:
-            time.sleep(0.5)
+        emit(PropertyUnmortgaged, self.owner.player_number, self)
         self.owner.charge(self.unmortgage_amount)
         self.is_mortgaged = False
         self.owner.mortgaged_property_names.remove(self.name)
+        self.owner.mortgaged_mask &= ~property_bit(self)
+        self.owner.trade_matrix.record_mortgage_change(self.owner.player_number)
+        self.owner.refresh_ledger(self.color)
     
     def __lt__(self,other):
         return self.name < other.name
 
+    # hash by board space rather than id so sets of properties iterate in the same order
+    # in every process, which keeps seeded games reproducible
+    def __hash__(self):
+        return self.board_space
+
 class Property(RealEstate):
     def __init__(self, name, board_space, cost, color, build_cost, rent):
         super().__init__(name, board_space, cost, color, True)
@@ -94,45 +106,46 @@ class Property(RealEstate):
         self.num_houses = 0
     
     def calculate_rent(self, board, double_if_owned=False):
+        rents = PROPERTY_RENTS[self.board_space]
         if self.num_houses > 0:
-            return self.rent[self.num_houses]
-        if self.owner.has_full_set(self.color):
-            return self.rent[0] * 2
-        return self.rent[0]
+            return rents[self.num_houses][False]
+        return rents[0][self.owner.has_full_set(self.color)]
 
     def build_house(self):
-        print(f"Player {self.owner.player_number} builds a house on {self.name_colored}")
-        if not settings.fast:
-            time.sleep(0.5)
+        emit(HouseBuilt, self.owner.player_number, self)
         self.owner.charge(self.build_cost)
         self.num_houses += 1
+        self.owner.developed_mask |= property_bit(self)
+        self.owner.trade_matrix.refresh_color(self.owner.player_number, self.color)
+        self.owner.refresh_ledger(self.color)
 
     def sell_house(self):
-        print(f"Player {self.owner.player_number} sells a house on {self.name_colored}")
-        if not settings.fast:
-            time.sleep(0.5)
+        emit(HouseSold, self.owner.player_number, self)
         self.owner.add_money(self.build_cost // 2, False)
         self.num_houses -= 1
+        if self.num_houses == 0:
+            self.owner.developed_mask &= ~property_bit(self)
+        self.owner.trade_matrix.refresh_color(self.owner.player_number, self.color)
+        self.owner.refresh_ledger(self.color)
             
 
 class Railroad(RealEstate):
     def __init__(self, name, board_space):
-        super().__init__(name, board_space, 200, Colors.RR, False)
+        super().__init__(name, board_space, RAILROAD_COST, Colors.RR, False)
 
     def calculate_rent(self, board, double=False):
-        num_rrs = len(self.owner.properties_by_set[Colors.RR])
-        rent = 25 * (2**(num_rrs-1)) # 25, 50, 100, 200
+        rent = RAILROAD_RENTS[len(self.owner.properties_by_set[Colors.RR])]
         return rent*2 if double else rent
 
 class Utility(RealEstate):
     def __init__(self, name, board_space):
-        super().__init__(name, board_space, 150, Colors.UTILITY, False)
+        super().__init__(name, board_space, UTILITY_COST, Colors.UTILITY, False)
 
     def calculate_rent(self, board, override):
         # override can happen from chance roll
-        if self.owner.has_full_set(self.color) or override:
-            return 10 * board.roll_total
-        return 4 * board.roll_total
+        if override:
+            return UTILITY_MULTIPLIERS[-1] * board.roll_total
+        return UTILITY_MULTIPLIERS[len(self.owner.properties_by_set[self.color])] * board.roll_total
         
 def nothing(player: Player, board, double_if_owned=False):
     return
@@ -155,128 +168,104 @@ def draw_community_chest(player: Player, board, double_if_owned=False):
 
 
 class Board():
-    def __init__(self, players):
+    def __init__(self, players, rng=random):
         self.players = players
         self.locations = self.init_locations()
         self.spaces = self.init_spaces()
-        self.chance_deck = Deck(DeckType.CHANCE)
-        self.community_chest_deck = Deck(DeckType.COMMUNITY_CHEST)
+        self.chance_deck = Deck(DeckType.CHANCE, rng)
+        self.community_chest_deck = Deck(DeckType.COMMUNITY_CHEST, rng)
         self.roll_total = 0
+        self.space_locations = [self.locations[key] for key in self.spaces] # location on each board space
+        self.real_estate = [location for location in self.space_locations if isinstance(location, RealEstate)] # in board order
+        self.real_estate_indices = {property: i for i, property in enumerate(self.real_estate)}
 
     # map of each *unique* location and their "land" functions. 
     # keyed to LocationKeys enum
     def init_locations(self):
-        return {
-            LocationKeys.GO: Location(LocationKeys.GO.value, 0, nothing),
-            LocationKeys.MEDITERRANEAN: Property(LocationKeys.MEDITERRANEAN.value, 1, 60, Colors.BROWN, 50, [2, 10, 30, 90, 160, 250]),
-            LocationKeys.COMMUNITY_CHEST: Location(LocationKeys.COMMUNITY_CHEST.value, 2, draw_community_chest),
-            LocationKeys.BALTIC: Property(LocationKeys.BALTIC.value, 3, 60, Colors.BROWN, 50, [4, 20, 60, 180, 320, 450]),
-            LocationKeys.INCOME_TAX: Location(LocationKeys.INCOME_TAX.value, 4, income_tax),
-            LocationKeys.READING_RR: Railroad(LocationKeys.READING_RR.value, 5),
-            LocationKeys.ORIENTAL: Property(LocationKeys.ORIENTAL.value, 6, 100, Colors.LIGHTBLUE, 50, [6, 30, 90, 270, 400, 550]),
-            LocationKeys.CHANCE: Location(LocationKeys.CHANCE.value, 7, draw_chance),
-            LocationKeys.VERMONT: Property(LocationKeys.VERMONT.value, 8, 100, Colors.LIGHTBLUE, 50, [6, 30, 90, 270, 400, 550]),
-            LocationKeys.CONNECTICUT: Property(LocationKeys.CONNECTICUT.value, 9, 120, Colors.LIGHTBLUE, 50, [8, 40, 100, 300, 450, 600]),
-            LocationKeys.VISITING_JAIL: Location(LocationKeys.VISITING_JAIL.value, 10, nothing),
-            LocationKeys.ST_CHARLES: Property(LocationKeys.ST_CHARLES.value, 11, 140, Colors.PINK, 100, [10, 50, 150, 450, 625, 750]),
-            LocationKeys.ELECTRIC: Utility(LocationKeys.ELECTRIC.value, 12),
-            LocationKeys.STATES: Property(LocationKeys.STATES.value, 13, 140, Colors.PINK, 100, [10, 50, 150, 450, 625, 750]),
-            LocationKeys.VIRGINIA: Property(LocationKeys.VIRGINIA.value, 14, 160, Colors.PINK, 100, [12, 60, 180, 500, 700, 900]),
-            LocationKeys.PENNSYLVANIA_RR: Railroad(LocationKeys.PENNSYLVANIA_RR.value, 15),
-            LocationKeys.ST_JAMES: Property(LocationKeys.ST_JAMES.value, 16, 180, Colors.ORANGE, 100, [14, 70, 200, 550, 750, 950]),
-            LocationKeys.TENNESSEE: Property(LocationKeys.TENNESSEE.value, 18, 180, Colors.ORANGE, 100, [14, 70, 200, 550, 750, 950]),
-            LocationKeys.NEW_YORK: Property(LocationKeys.NEW_YORK.value, 19, 200, Colors.ORANGE, 100, [16, 80, 220, 600, 800, 1000]),
-            LocationKeys.FREE_PARKING: Location(LocationKeys.FREE_PARKING.value, 20, nothing),
-            LocationKeys.KENTUCKY: Property(LocationKeys.KENTUCKY.value, 21, 220, Colors.RED, 150, [18, 90, 250, 700, 875, 1050]),
-            LocationKeys.INDIANA: Property(LocationKeys.INDIANA.value, 23, 220, Colors.RED, 150, [18, 90, 250, 700, 875, 1050]),
-            LocationKeys.ILLINOIS: Property(LocationKeys.ILLINOIS.value, 24, 240, Colors.RED, 150, [20, 100, 300, 750, 925, 1100]),
-            LocationKeys.BO_RR: Railroad(LocationKeys.BO_RR.value, 25),
-            LocationKeys.ATLANTIC: Property(LocationKeys.ATLANTIC.value, 26, 260, Colors.YELLOW, 150, [22, 110, 330, 800, 975, 1150]),
-            LocationKeys.VENTNOR: Property(LocationKeys.VENTNOR.value, 27, 260, Colors.YELLOW, 150, [22, 110, 330, 800, 975, 1150]),
-            LocationKeys.WATER: Utility(LocationKeys.WATER.value, 28),
-            LocationKeys.MARVIN: Property(LocationKeys.MARVIN.value, 29, 280, Colors.YELLOW, 150, [24, 120, 360, 850, 1025, 1200]),
-            LocationKeys.GO_TO_JAIL: Location(LocationKeys.GO_TO_JAIL.value, 30, go_to_jail),
-            LocationKeys.PACIFIC: Property(LocationKeys.PACIFIC.value, 31, 300, Colors.GREEN, 200, [26, 130, 390, 900, 1100, 1275]),
-            LocationKeys.NORTH_CAROLINA: Property(LocationKeys.NORTH_CAROLINA.value, 32, 300, Colors.GREEN, 200, [26, 130, 390, 900, 1100, 1275]),
-            LocationKeys.PENNSYLVANIA: Property(LocationKeys.PENNSYLVANIA.value, 34, 320, Colors.GREEN, 200, [28, 150, 450, 1000, 1200, 1400]),
-            LocationKeys.SHORT_LINE: Railroad(LocationKeys.SHORT_LINE.value, 35),
-            LocationKeys.PARK_PLACE: Property(LocationKeys.PARK_PLACE.value, 37, 350, Colors.DARKBLUE, 200, [35, 175, 500, 1100, 1300, 1500]),
-            LocationKeys.LUXURY_TAX: Location(LocationKeys.LUXURY_TAX.value, 38, luxury_tax),
-            LocationKeys.BOARDWALK: Property(LocationKeys.BOARDWALK.value, 39, 400, Colors.DARKBLUE, 200, [50, 200, 600, 1400, 1700, 2000]),
+        land_functions = {
+            LocationKeys.COMMUNITY_CHEST: draw_community_chest,
+            LocationKeys.INCOME_TAX: income_tax,
+            LocationKeys.CHANCE: draw_chance,
+            LocationKeys.GO_TO_JAIL: go_to_jail,
+            LocationKeys.LUXURY_TAX: luxury_tax,
         }
+        locations = {}
+        for key, board_space in BOARD_SPACES.items():
+            if key in PROPERTIES:
+                cost, color, build_cost, rent = PROPERTIES[key]
+                locations[key] = Property(key.value, board_space, cost, color, build_cost, list(rent))
+            elif key in RAILROADS:
+                locations[key] = Railroad(key.value, board_space)
+            elif key in UTILITIES:
+                locations[key] = Utility(key.value, board_space)
+            else:
+                locations[key] = Location(key.value, board_space, land_functions.get(key, nothing))
+        return locations
 
     # list of each board space, in order. each value is a LocationKey enum, 
     # which can be used to access the actual location in the locations dict
     def init_spaces(self):
-        return [
-            LocationKeys.GO,
-            LocationKeys.MEDITERRANEAN,
-            LocationKeys.COMMUNITY_CHEST,
-            LocationKeys.BALTIC,
-            LocationKeys.INCOME_TAX,
-            LocationKeys.READING_RR,
-            LocationKeys.ORIENTAL,
-            LocationKeys.CHANCE,
-            LocationKeys.VERMONT,
-            LocationKeys.CONNECTICUT,
-            LocationKeys.VISITING_JAIL,
-            LocationKeys.ST_CHARLES,
-            LocationKeys.ELECTRIC,
-            LocationKeys.STATES,
-            LocationKeys.VIRGINIA,
-            LocationKeys.PENNSYLVANIA_RR,
-            LocationKeys.ST_JAMES,
-            LocationKeys.COMMUNITY_CHEST,
-            LocationKeys.TENNESSEE,
-            LocationKeys.NEW_YORK,
-            LocationKeys.FREE_PARKING,
-            LocationKeys.KENTUCKY,
-            LocationKeys.CHANCE,
-            LocationKeys.INDIANA,
-            LocationKeys.ILLINOIS,
-            LocationKeys.BO_RR,
-            LocationKeys.ATLANTIC,
-            LocationKeys.VENTNOR,
-            LocationKeys.WATER,
-            LocationKeys.MARVIN,
-            LocationKeys.GO_TO_JAIL,
-            LocationKeys.PACIFIC,
-            LocationKeys.NORTH_CAROLINA,
-            LocationKeys.COMMUNITY_CHEST,
-            LocationKeys.PENNSYLVANIA,
-            LocationKeys.SHORT_LINE,
-            LocationKeys.CHANCE,
-            LocationKeys.PARK_PLACE,
-            LocationKeys.LUXURY_TAX,
-            LocationKeys.BOARDWALK
-        ]
+        return list(SPACES)
+
+    def snapshot(self):
+        indices = self.real_estate_indices
+        players = []
+        for player in self.players:
+            # holdings keep the players' own orderings, since the ai iterates them when breaking ties
+            players.append((player.money, player.board_space, player.jail_counter, player.goojf_cards,
+                            tuple(indices[property] for property in player.properties.values()),
+                            tuple((color, tuple(indices[property] for property in properties)) for color, properties in player.properties_by_set.items()),
+                            tuple(indices[player.properties[name]] for name in player.mortgaged_property_names)))
+        houses = tuple(property.num_houses if property.can_develop else 0 for property in self.real_estate)
+        mortgages = tuple(property.is_mortgaged for property in self.real_estate)
+        return BoardSnapshot(tuple(players), houses, mortgages, self.chance_deck.snapshot(), self.community_chest_deck.snapshot(), self.roll_total)
+
+    def restore(self, snapshot):
+        real_estate = self.real_estate
+        for property, houses, mortgaged in zip(real_estate, snapshot.houses, snapshot.mortgages):
+            property.owner = None
+            property.is_mortgaged = mortgaged
+            if property.can_develop:
+                property.num_houses = houses
+        for player, (money, board_space, jail_counter, goojf_cards, owned, sets, mortgaged) in zip(self.players, snapshot.players):
+            player.money = money
+            player.board_space = board_space
+            player.jail_counter = jail_counter
+            player.goojf_cards = goojf_cards
+            player.properties = {}
+            for i in owned:
+                real_estate[i].owner = player
+                player.properties[real_estate[i].name] = real_estate[i]
+            player.properties_by_set = defaultdict(list)
+            for color, set_indices in sets:
+                player.properties_by_set[color] = [real_estate[i] for i in set_indices]
+            player.mortgaged_property_names = set(real_estate[i].name for i in mortgaged)
+            player.rebuild_masks()
+        self.chance_deck.restore(snapshot.chance_deck)
+        self.community_chest_deck.restore(snapshot.community_chest_deck)
+        self.roll_total = snapshot.roll_total
 
     def get_space(self, location_key):
-        return self.locations[location_key].board_space
+        return BOARD_SPACES[location_key]
 
     # advance player to specified space (index). if passes go, collect 200
     def advance(self, player: Player, space, double_if_owned=False):
         if player.board_space >= space:
-            print(f"Player {player.player_number} passes Go")
-            if not settings.fast:
-                time.sleep(0.5)
+            emit(PassedGo, player.player_number)
             player.add_money(200)
         self.land(player, space, double_if_owned)
 
     # send player directly to space index
     def land(self, player: Player, space, double_if_owned=False):
         player.board_space = space
-        print(f"Player {player.player_number} lands on {self.locations[self.spaces[space]].name_colored}")
-        if not settings.fast:
-            time.sleep(0.5)
-        auction = self.locations[self.spaces[space]].land(player, self, double_if_owned)
+        location = self.space_locations[space]
+        emit(Landed, player.player_number, location)
+        auction = location.land(player, self, double_if_owned)
         if auction:
-            self.perform_auction(self.locations[self.spaces[space]], player)
+            self.perform_auction(location, player)
     
     def perform_auction(self, location, player):
-        print(f"Performing auction for {location.name_colored}")
-        if not settings.fast:
-            time.sleep(0.5)
+        emit(AuctionStarted, location)
         # add players to bid queue
         current_player_i = player.player_number - 1
         bid_queue = []
@@ -292,165 +281,366 @@ class Board():
                 break
             bid = player.decide_bid(location, current_bid)
             if bid < current_bid + 10: # must do at least $10 increments
-                print(f"Player {player.player_number} drops out of the auction")
-                if not settings.fast:
-                    time.sleep(0.5)
+                emit(AuctionDropped, player.player_number)
                 continue
-            print(f"Player {player.player_number} bids ${bid}")
-            if not settings.fast:
-                time.sleep(0.5)
+            emit(BidPlaced, player.player_number, bid)
             highest_bidder = player
             current_bid = bid
             bid_queue.append(player)
+        for bidder in self.players:
+            bidder.end_auction(location)
         
         if current_bid == 0:
             return
         
-        print(f"Player {highest_bidder.player_number} wins the auction")
-        if not settings.fast:
-            time.sleep(0.5)
+        emit(AuctionWon, highest_bidder.player_number, location, current_bid)
         highest_bidder.charge(current_bid)
         highest_bidder.gain_real_estate(location)
         
 
     def send_to_jail(self, player: Player):
         # for the purposes of this simulation, jail is off the board
-        print(f"Player {player.player_number} goes to jail")
-        if not settings.fast:
-            time.sleep(0.5)
+        emit(SentToJail, player.player_number)
         player.board_space = JAIL_BOARD_SPACE
         player.jail_counter = 3
     
     def get_out_of_jail(self, player: Player):
-        print(f"Player {player.player_number} gets out of jail")
-        if not settings.fast:
-            time.sleep(0.5)
+        emit(LeftJail, player.player_number)
         player.board_space = VISITING_JAIL_BOARD_SPACE # puts them on board space 10
         player.jail_counter = 0
 
 
+class GameResult():
+    def __init__(self, winner, loser, turns, worths):
+        self.winner = winner # player number of the richest player at the end of the game
+        self.loser = loser # player number of the bankrupt player, None if the turn limit was reached
+        self.turns = turns
+        self.worths = worths # final total worth keyed by player number
+
+    def to_dict(self):
+        return {
+            "winner": self.winner,
+            "loser": self.loser,
+            "turns": self.turns,
+            "worths": self.worths,
+        }
+
+
+class BoardSnapshot():
+    # flat copy of everything on the board that changes during a game. players holds, for each player
+    # in turn order, (money, board space, jail counter, goojf cards, owned, owned by color, mortgaged),
+    # where properties are referred to by their index in Board.real_estate. houses and mortgages are
+    # indexed like Board.real_estate, and decks are card indices in draw order
+    __slots__ = ("players", "houses", "mortgages", "chance_deck", "community_chest_deck", "roll_total")
+
+    def __init__(self, players, houses, mortgages, chance_deck, community_chest_deck, roll_total):
+        self.players = players
+        self.houses = houses
+        self.mortgages = mortgages
+        self.chance_deck = chance_deck
+        self.community_chest_deck = community_chest_deck
+        self.roll_total = roll_total
+
+
+class GameSnapshot():
+    __slots__ = ("board", "ownership_versions", "turns", "curr_player_i", "doubles", "is_over", "loser", "rng_state", "pending_decisions")
+
+    # pending_decisions: (decisions pending, trade pending) for each player in turn order
+    def __init__(self, board, ownership_versions, turns, curr_player_i, doubles, is_over, loser, rng_state, pending_decisions):
+        self.board = board
+        self.ownership_versions = ownership_versions
+        self.turns = turns
+        self.curr_player_i = curr_player_i
+        self.doubles = doubles
+        self.is_over = is_over
+        self.loser = loser
+        self.rng_state = rng_state
+        self.pending_decisions = pending_decisions
+
+
 class Game():
-    def __init__(self, players, trade_matrix):
-        self.board = Board(players)
+    # seed: seeds the game's own random number generator, which rolls the dice and shuffles the decks.
+    # a game with the same seed, players and human answers plays out exactly the same way.
+    # deferred_decisions: rather than trading, unmortgaging and building every time they get money or
+    # real estate, players only note that they have, and each of them makes one pass over those
+    # decisions at the end of the turn
+    def __init__(self, players, trade_matrix, seed=None, deferred_decisions=False):
+        self.seed = seed if seed is not None else random.randrange(2**32)
+        self.rng = random.Random(self.seed)
+        self.board = Board(players, self.rng)
         self.trade_matrix = trade_matrix
-        self.is_over = False    
+        self.is_over = False
+        self.turns = 0
+        self.curr_player_i = -1
+        self.doubles = 0 # doubles rolled so far in the current turn
+        self.loser = None
+        self.deferred_decisions = deferred_decisions
+        for player in players:
+            player.defer_decisions = deferred_decisions
         
-    def play(self):
-        doubles = 0
-        curr_player_i = -1
+    # max_turns: stop the game after this many player turns, even if no one has gone bankrupt
+    def play(self, max_turns=None):
         while not self.is_over:
-            if doubles == 0 or current_player.jail_counter > 0:
-                curr_player_i = (curr_player_i + 1) % len(self.board.players)
-                current_player = self.board.players[curr_player_i]
-                print(f"\nPlayer {current_player.player_number}'s turn")
-                if not settings.fast:
-                    time.sleep(0.5)
-            
+            if self.is_turn_over() and max_turns is not None and self.turns >= max_turns:
+                break
+            self.step()
+        return self.finish(max_turns)
+
+    # true between turns, when the next roll belongs to the next player
+    def is_turn_over(self):
+        return self.doubles == 0 or self.board.players[self.curr_player_i].jail_counter > 0
+
+    # plays a single roll of the dice
+    def step(self):
+        self.play_roll()
+        if self.deferred_decisions and not self.is_over and self.is_turn_over():
+            self.run_pending_decisions()
+
+    def play_roll(self):
+        if self.is_turn_over():
+            self.curr_player_i = (self.curr_player_i + 1) % len(self.board.players)
+            self.turns += 1
+            emit(TurnStarted, self.board.players[self.curr_player_i].player_number)
+        current_player = self.board.players[self.curr_player_i]
+        
+        if not settings.headless:
+            # not recorded by replays, since it doesn't change the game
             command = input("Press enter to continue game, or type p to see the board state: ")
             if command == "p":
                 self.print_game_state()
                 input("Press enter to continue game:")
-            
-            die1, die2 = self.roll_dice()
+        
+        die1, die2 = self.roll_dice()
 
-            if current_player.jail_counter > 0:
-                print(f"Player {current_player.player_number} is in jail")
-                if not settings.fast:
-                    time.sleep(0.5)
-                if current_player.will_get_out_of_jail() or die1 == die2: # in this function player will handle themselves
+        if current_player.jail_counter > 0:
+            emit(InJail, current_player.player_number)
+            if current_player.will_get_out_of_jail() or die1 == die2: # in this function player will handle themselves
+                self.board.get_out_of_jail(current_player)
+            else:
+                if current_player.jail_counter == 1:
+                    current_player.charge(50)
                     self.board.get_out_of_jail(current_player)
                 else:
-                    if current_player.jail_counter == 1:
-                        current_player.charge(50)
-                        self.board.get_out_of_jail(current_player)
-                    else:
-                        print(f"\nDie roll: {die1, die2}")
-                        if not settings.fast:
-                            time.sleep(0.5)
-                        current_player.jail_counter -= 1
-                        print(f"Player {current_player.player_number} is in jail for {current_player.jail_counter} more turns\n")
-                        if not settings.fast:
-                            time.sleep(0.5)
-                        continue
-            else: # if player wasn't in jail, doubles allow player to move again
-                if die1 == die2:
-                    doubles += 1
-                    if doubles >= 3:
-                        print(f"Player {current_player.player_number} rolled doubles for the third time and got sent to jail.\n")
-                        if not settings.fast:
-                            time.sleep(0.5)
-                        self.board.send_to_jail(current_player)
-                        doubles = 0
-                        continue
-                else:
-                    doubles = 0
-
-            print(f"\nDie roll: {die1, die2}")
-            if not settings.fast:
-                time.sleep(0.5)
-            next_space = (current_player.board_space + self.board.roll_total) % len(self.board.spaces)
-            print(f"Next space: {self.board.locations[self.board.spaces[next_space]].name_colored}")
-            if not settings.fast:
-                time.sleep(0.5)
-            self.board.advance(current_player, next_space)
-            if current_player.money < 0:
-                self.is_over = True
-
-        print(f"Game over: Player {current_player.player_number} lost")
-        if not settings.fast:
-            time.sleep(0.5)
-        print("Final Standings (total worth):")
-        if not settings.fast:
-            time.sleep(0.5)
-        for player in self.board.players:
-            print(f"Player {player.player_number} ({player.token}): ${player.calculate_total_worth()}")
-            if not settings.fast:
-                time.sleep(0.5)
+                    emit(DiceRolled, current_player.player_number, die1, die2)
+                    current_player.jail_counter -= 1
+                    emit(StayedInJail, current_player.player_number, current_player.jail_counter)
+                    return
+        else: # if player wasn't in jail, doubles allow player to move again
+            if die1 == die2:
+                self.doubles += 1
+                if self.doubles >= 3:
+                    emit(ThirdDoubles, current_player.player_number)
+                    self.board.send_to_jail(current_player)
+                    self.doubles = 0
+                    return
+            else:
+                self.doubles = 0
+
+        emit(DiceRolled, current_player.player_number, die1, die2)
+        next_space = (current_player.board_space + self.board.roll_total) % len(self.board.spaces)
+        emit(Moving, current_player.player_number, self.board.space_locations[next_space])
+        self.board.advance(current_player, next_space)
+        if current_player.money < 0:
+            self.is_over = True
+            self.loser = current_player.player_number
+
+    # the end of turn pass when decisions are deferred, in turn order from the player whose turn it was.
+    # decisions can leave other players with pending decisions (e.g. a trade's recipient gets real
+    # estate), so it goes round again until no one has any
+    def run_pending_decisions(self):
+        players = self.board.players[self.curr_player_i:] + self.board.players[:self.curr_player_i]
+        while any(player.decisions_pending for player in players):
+            for player in players:
+                if player.decisions_pending:
+                    player.run_pending_decisions()
+
+    # captures the whole position, so lookahead can play on and restore() can put it back
+    def snapshot(self):
+        pending_decisions = tuple((player.decisions_pending, player.trade_pending) for player in self.board.players)
+        return GameSnapshot(self.board.snapshot(), tuple(self.trade_matrix.ownership_versions.items()), self.turns, self.curr_player_i, self.doubles, self.is_over, self.loser, self.rng.getstate(), pending_decisions)
+
+    def restore(self, snapshot):
+        self.board.restore(snapshot.board)
+        self.trade_matrix.rebuild_index(snapshot.ownership_versions)
+        self.turns = snapshot.turns
+        self.curr_player_i = snapshot.curr_player_i
+        self.doubles = snapshot.doubles
+        self.is_over = snapshot.is_over
+        self.loser = snapshot.loser
+        self.rng.setstate(snapshot.rng_state)
+        for player, (decisions_pending, trade_pending) in zip(self.board.players, snapshot.pending_decisions):
+            player.decisions_pending = decisions_pending
+            player.trade_pending = trade_pending
+
+    def finish(self, max_turns=None):
         winner = self.board.players[0]
         for player in self.board.players:
-            self.trade_matrix.print_player_state(player.player_number)
             if player.money > winner.money:
                 winner = player
-        print(f"\nPlayer {winner.player_number} wins!")
-        if not settings.fast:
-            time.sleep(0.5)
-        
+        worths = {player.player_number: player.calculate_total_worth() for player in self.board.players}
+
+        emit(GameOver, self.loser, self.turns, max_turns)
+        if not settings.headless:
+            settings.display("Final Standings (total worth):")
+            for player in self.board.players:
+                settings.display(f"Player {player.player_number} ({player.token}): ${worths[player.player_number]}")
+            for player in self.board.players:
+                self.trade_matrix.print_player_state(player.player_number)
+            settings.display(f"\nPlayer {winner.player_number} wins!")
+
+        # release anything the players held for the game, e.g. the mcts ai's rollout pool
+        for player in self.board.players:
+            close = getattr(player, "close", None)
+            if close is not None:
+                close()
+
+        return GameResult(winner.player_number, self.loser, self.turns, worths)
 
     def roll_dice(self):
-        die1 = random.randint(1, 6)
-        die2 = random.randint(1, 6)
+        die1 = self.rng.randint(1, 6)
+        die2 = self.rng.randint(1, 6)
         self.board.roll_total = die1 + die2
         return die1, die2
 
     def print_game_state(self):
-        print("Board:")
-        if not settings.fast:
-            time.sleep(0.5)
+        settings.display("Board:")
         for i in range(len(self.board.spaces)):
             location = self.board.locations[self.board.spaces[i]]
             players = ""
             for player in self.board.players:
                 if player.board_space == i:
                     players += f"{player.token} "
-            print(f"{location.name_colored}: {players}")
+            settings.display(f"{location.name_colored}: {players}", pace=False)
         
         players_in_jail = ""
         for player in self.board.players:
             if player.jail_counter > 0:
                 players_in_jail += f"{player.token} "
-        print(f"Jail: {players_in_jail}")
-        if not settings.fast:
-            time.sleep(0.5)
+        settings.display(f"Jail: {players_in_jail}")
 
         for player in self.board.players:
             self.trade_matrix.print_player_state(player.player_number)
 
 
+PLAYER_CLASSES = {"human": HumanPlayer, "ai": AIPlayer, "expectimax": ExpectimaxPlayer, "mcts": MCTSPlayer}
+
+# player_kinds: (kind, token) for each player, in turn order, where kind is a key of PLAYER_CLASSES
+def create_players(player_kinds):
+    players = []
+    for i, (kind, token) in enumerate(player_kinds):
+        players.append(PLAYER_CLASSES[kind](i+1, token))
+    trade_matrix = TradeMatrix(players)
+    for player in players:
+        player.set_trade_matrix(trade_matrix)
+    return players, trade_matrix
+
+# expectimax_players: how many of the players, from player 1, use the lookahead ai (see expectimaxplayer.py)
+# mcts_players: how many of the players after those use the rollout ai (see mctsplayer.py)
+def create_ai_players(num_players, trade_threshold=1000, expectimax_players=0, mcts_players=0):
+    tokens = list(PlayerTokens)
+    players = []
+    for i in range(num_players):
+        if i < expectimax_players:
+            player_class = ExpectimaxPlayer
+        elif i < expectimax_players + mcts_players:
+            player_class = MCTSPlayer
+        else:
+            player_class = AIPlayer
+        players.append(player_class(i+1, tokens[i].value, trade_threshold))
+    trade_matrix = TradeMatrix(players)
+    for player in players:
+        player.set_trade_matrix(trade_matrix)
+    return players, trade_matrix
+
+# runs a full ai-only game with no prompts, printing or pauses.
+# sinks: event sinks to install for the game; by default nothing listens, so no events are built
+# seed: seeds the game's dice and decks (see Game); a random seed is picked if not given
+# deferred_decisions: players make one decision pass per turn (see Game)
+def simulate_game(num_players, trade_threshold=1000, max_turns=SIMULATION_MAX_TURNS, sinks=(), seed=None, expectimax_players=0, mcts_players=0, deferred_decisions=False):
+    headless = settings.headless
+    previous_sinks = events.bus.sinks
+    settings.headless = True
+    events.bus.set_sinks(sinks)
+    try:
+        players, trade_matrix = create_ai_players(num_players, trade_threshold, expectimax_players, mcts_players)
+        return Game(players, trade_matrix, seed, deferred_decisions).play(max_turns)
+    finally:
+        settings.headless = headless
+        events.bus.set_sinks(previous_sinks)
+
+def simulate(num_games, num_players, trade_threshold=1000, max_turns=SIMULATION_MAX_TURNS, sinks=(), expectimax_players=0, mcts_players=0, deferred_decisions=False):
+    return [simulate_game(num_players, trade_threshold, max_turns, sinks, expectimax_players=expectimax_players, mcts_players=mcts_players, deferred_decisions=deferred_decisions) for _ in range(num_games)]
+
+def print_simulation_summary(results, elapsed):
+    wins = defaultdict(int)
+    unfinished = 0
+    total_turns = 0
+    for result in results:
+        wins[result.winner] += 1
+        total_turns += result.turns
+        if result.loser is None:
+            unfinished += 1
+    print(f"Games: {len(results)} ({unfinished} hit the turn limit)")
+    for player_number in sorted(wins.keys()):
+        print(f"Player {player_number} wins: {wins[player_number]}")
+    print(f"Average turns: {total_turns / max(len(results), 1):.1f}")
+    print(f"Elapsed: {elapsed:.2f}s ({total_turns / max(elapsed, 1e-9):.1f} turns/s)")
+
+def run_simulate_command(argv):
+    parser = argparse.ArgumentParser(prog="board.py simulate", description="Run headless ai-only games")
+    parser.add_argument('-g', '--games', type=int, default=1, help='Number of games to simulate')
+    parser.add_argument('-p', '--players', type=int, choices=range(2, 9), default=4, help='Number of ai players per game')
+    parser.add_argument('-t', '--trade-threshold', type=int, default=1000, help='Trade threshold of each ai player')
+    parser.add_argument('-m', '--max-turns', type=int, default=SIMULATION_MAX_TURNS, help='Turn limit per game')
+    parser.add_argument('-o', '--output', help='Write each game result as a json line to this file')
+    parser.add_argument('-x', '--expectimax', type=int, default=0, help='Number of players, from player 1, that use the expectimax ai')
+    parser.add_argument('-c', '--mcts', type=int, default=0, help='Number of players, after the expectimax ones, that use the rollout (mcts) ai')
+    parser.add_argument('-d', '--deferred-decisions', action='store_true', help='Have players trade, unmortgage and build once at the end of each turn, rather than every time they get money or real estate')
+    parser.add_argument('-e', '--event-log', help='Append every event to this binary log (see game_log.py)')
+    parser.add_argument('--profile', help='Time each kind of decision and count search nodes and turn latencies (see profiling.py), writing them as json to this file')
+    args = parser.parse_args(argv)
+
+    sinks = []
+    if args.event_log:
+        from game_log import GameLogWriter
+        sinks.append(GameLogWriter(args.event_log))
+    if args.profile:
+        import profiling
+        profile = profiling.enable()
+    start = time.perf_counter()
+    try:
+        results = simulate(args.games, args.players, args.trade_threshold, args.max_turns, sinks, args.expectimax, args.mcts, args.deferred_decisions)
+    finally:
+        for sink in sinks:
+            sink.close()
+        if args.profile:
+            profiling.disable()
+    elapsed = time.perf_counter() - start
+
+    if args.output:
+        with open(args.output, "w") as file:
+            for result in results:
+                file.write(json.dumps(result.to_dict()) + "\n")
+    print_simulation_summary(results, elapsed)
+    if args.profile:
+        with open(args.profile, "w") as file:
+            file.write(profile.to_json())
+        profile.print_report()
+
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "simulate":
+        # run through the imported module, so the games use the same classes profiling.py instruments
+        import board
+        board.run_simulate_command(sys.argv[2:])
+        sys.exit()
+
     parser = argparse.ArgumentParser()
     parser.add_argument('n', choices=[str(i) for i in range(1, 9)]) # num players
     parser.add_argument('h', choices=[str(i) for i in range(1, 9)]) # num human players
     parser.add_argument('-f', '--fast', help='Turn on fast printing', action="store_true")
+    parser.add_argument('-s', '--seed', type=int, default=None, help='Seed for the dice and decks')
+    parser.add_argument('-r', '--record', help='Record a replay log of the game to this file (see replay.py)')
     args = parser.parse_args()
 
     settings.init()
@@ -459,28 +649,26 @@ if __name__ == "__main__":
     print(settings.fast)
 
     tokens = set(["battleship", "boot", "cannon", "horse", "iron", "racecar", "dog", "thimble", "top hat", "wheelbarrow"])
-    players = []
+    player_kinds = []
     num_players = int(args.n)
     num_humans = int(args.h)
 
-    for i in range(num_humans):
+    for i in range(num_players):
+        kind = "human" if i < num_humans else "ai"
         token = tokens.pop()
-        print(f"Player {i+1}: {token} (human)")
-        if not settings.fast:
-            time.sleep(0.5)
-        players.append(HumanPlayer(i+1, token))
-    for i in range(num_humans, num_players):
-        token = tokens.pop()
-        print(f"Player {i+1}: {token} (ai)")
-        if not settings.fast:
-            time.sleep(0.5)
-        players.append(AIPlayer(i+1, token))
-
-    trade_matrix = TradeMatrix(players)
-    for player in players:
-        player.set_trade_matrix(trade_matrix)
-    
-    game = Game(players, trade_matrix)
-    game.play()
+        settings.display(f"Player {i+1}: {token} ({kind})")
+        player_kinds.append((kind, token))
+
+    players, trade_matrix = create_players(player_kinds)
+    game = Game(players, trade_matrix, args.seed)
+    replay_log = None
+    if args.record:
+        from replay import ReplayLog
+        replay_log = ReplayLog.record(args.record, game.seed, player_kinds)
+    try:
+        game.play()
+    finally:
+        if replay_log is not None:
+            replay_log.close()
 
     
@@ -0,0 +1,137 @@
+from enums import Colors, LocationKeys, OwnershipDegree
+
+# The static layout of the board and the lookup tables derived from it, built once at import so the
+# game's hot paths index a table instead of recomputing or resolving the same facts on every call.
+
+# each board space, in order
+SPACES = (
+    LocationKeys.GO,
+    LocationKeys.MEDITERRANEAN,
+    LocationKeys.COMMUNITY_CHEST,
+    LocationKeys.BALTIC,
+    LocationKeys.INCOME_TAX,
+    LocationKeys.READING_RR,
+    LocationKeys.ORIENTAL,
+    LocationKeys.CHANCE,
+    LocationKeys.VERMONT,
+    LocationKeys.CONNECTICUT,
+    LocationKeys.VISITING_JAIL,
+    LocationKeys.ST_CHARLES,
+    LocationKeys.ELECTRIC,
+    LocationKeys.STATES,
+    LocationKeys.VIRGINIA,
+    LocationKeys.PENNSYLVANIA_RR,
+    LocationKeys.ST_JAMES,
+    LocationKeys.COMMUNITY_CHEST,
+    LocationKeys.TENNESSEE,
+    LocationKeys.NEW_YORK,
+    LocationKeys.FREE_PARKING,
+    LocationKeys.KENTUCKY,
+    LocationKeys.CHANCE,
+    LocationKeys.INDIANA,
+    LocationKeys.ILLINOIS,
+    LocationKeys.BO_RR,
+    LocationKeys.ATLANTIC,
+    LocationKeys.VENTNOR,
+    LocationKeys.WATER,
+    LocationKeys.MARVIN,
+    LocationKeys.GO_TO_JAIL,
+    LocationKeys.PACIFIC,
+    LocationKeys.NORTH_CAROLINA,
+    LocationKeys.COMMUNITY_CHEST,
+    LocationKeys.PENNSYLVANIA,
+    LocationKeys.SHORT_LINE,
+    LocationKeys.CHANCE,
+    LocationKeys.PARK_PLACE,
+    LocationKeys.LUXURY_TAX,
+    LocationKeys.BOARDWALK,
+)
+
+# (cost, color, build cost, rent by number of houses [base, 1, 2, 3, 4, hotel])
+PROPERTIES = {
+    LocationKeys.MEDITERRANEAN: (60, Colors.BROWN, 50, (2, 10, 30, 90, 160, 250)),
+    LocationKeys.BALTIC: (60, Colors.BROWN, 50, (4, 20, 60, 180, 320, 450)),
+    LocationKeys.ORIENTAL: (100, Colors.LIGHTBLUE, 50, (6, 30, 90, 270, 400, 550)),
+    LocationKeys.VERMONT: (100, Colors.LIGHTBLUE, 50, (6, 30, 90, 270, 400, 550)),
+    LocationKeys.CONNECTICUT: (120, Colors.LIGHTBLUE, 50, (8, 40, 100, 300, 450, 600)),
+    LocationKeys.ST_CHARLES: (140, Colors.PINK, 100, (10, 50, 150, 450, 625, 750)),
+    LocationKeys.STATES: (140, Colors.PINK, 100, (10, 50, 150, 450, 625, 750)),
+    LocationKeys.VIRGINIA: (160, Colors.PINK, 100, (12, 60, 180, 500, 700, 900)),
+    LocationKeys.ST_JAMES: (180, Colors.ORANGE, 100, (14, 70, 200, 550, 750, 950)),
+    LocationKeys.TENNESSEE: (180, Colors.ORANGE, 100, (14, 70, 200, 550, 750, 950)),
+    LocationKeys.NEW_YORK: (200, Colors.ORANGE, 100, (16, 80, 220, 600, 800, 1000)),
+    LocationKeys.KENTUCKY: (220, Colors.RED, 150, (18, 90, 250, 700, 875, 1050)),
+    LocationKeys.INDIANA: (220, Colors.RED, 150, (18, 90, 250, 700, 875, 1050)),
+    LocationKeys.ILLINOIS: (240, Colors.RED, 150, (20, 100, 300, 750, 925, 1100)),
+    LocationKeys.ATLANTIC: (260, Colors.YELLOW, 150, (22, 110, 330, 800, 975, 1150)),
+    LocationKeys.VENTNOR: (260, Colors.YELLOW, 150, (22, 110, 330, 800, 975, 1150)),
+    LocationKeys.MARVIN: (280, Colors.YELLOW, 150, (24, 120, 360, 850, 1025, 1200)),
+    LocationKeys.PACIFIC: (300, Colors.GREEN, 200, (26, 130, 390, 900, 1100, 1275)),
+    LocationKeys.NORTH_CAROLINA: (300, Colors.GREEN, 200, (26, 130, 390, 900, 1100, 1275)),
+    LocationKeys.PENNSYLVANIA: (320, Colors.GREEN, 200, (28, 150, 450, 1000, 1200, 1400)),
+    LocationKeys.PARK_PLACE: (350, Colors.DARKBLUE, 200, (35, 175, 500, 1100, 1300, 1500)),
+    LocationKeys.BOARDWALK: (400, Colors.DARKBLUE, 200, (50, 200, 600, 1400, 1700, 2000)),
+}
+RAILROADS = (LocationKeys.READING_RR, LocationKeys.PENNSYLVANIA_RR, LocationKeys.BO_RR, LocationKeys.SHORT_LINE)
+UTILITIES = (LocationKeys.ELECTRIC, LocationKeys.WATER)
+RAILROAD_COST = 200
+UTILITY_COST = 150
+
+RAILROAD_RENTS = (0, 25, 50, 100, 200) # by number of railroads owned
+UTILITY_MULTIPLIERS = (0, 4, 10) # times the dice roll, by number of utilities owned
+
+
+# board space of each location (the first, for chance and community chest)
+BOARD_SPACES = {}
+for space, key in enumerate(SPACES):
+    BOARD_SPACES.setdefault(key, space)
+
+def get_space_color(key):
+    if key in PROPERTIES:
+        return PROPERTIES[key][1]
+    if key in RAILROADS:
+        return Colors.RR
+    if key in UTILITIES:
+        return Colors.UTILITY
+    return Colors.WHITE
+
+SPACE_COLORS = tuple(get_space_color(key) for key in SPACES)
+
+# board spaces in each ownable color set, and the set sizes
+COLOR_SPACES = {}
+for space, color in enumerate(SPACE_COLORS):
+    if color != Colors.WHITE:
+        COLOR_SPACES.setdefault(color, []).append(space)
+COLOR_SPACES = {color: tuple(spaces) for color, spaces in COLOR_SPACES.items()}
+SET_SIZES = {color: len(spaces) for color, spaces in COLOR_SPACES.items()}
+COLOR_MASKS = {color: sum(1 << space for space in spaces) for color, spaces in COLOR_SPACES.items()} # as in transposition.property_mask
+
+# degree of ownership by color and number of properties held in it
+def get_ownership_degree(color, num_properties):
+    if num_properties == SET_SIZES[color]:
+        return OwnershipDegree.MONOPOLY
+    if num_properties == SET_SIZES[color] - 1:
+        # don't treat utility as almost monopoly
+        if color == Colors.UTILITY:
+            return OwnershipDegree.ONE
+        return OwnershipDegree.ALMOST_MONOPOLY
+    if num_properties == 0:
+        return OwnershipDegree.NONE
+    return OwnershipDegree.ONE
+
+OWNERSHIP_DEGREES = {color: tuple(get_ownership_degree(color, n) for n in range(size + 1)) for color, size in SET_SIZES.items()}
+
+# property rent by board space, then number of houses, then whether the owner has the full set
+PROPERTY_RENTS = {}
+for key, (_, _, _, rent) in PROPERTIES.items():
+    PROPERTY_RENTS[BOARD_SPACES[key]] = ((rent[0], rent[0] * 2),) + tuple((houses_rent, houses_rent) for houses_rent in rent[1:])
+
+# the next railroad and utility after each board space, going round past go
+def get_next_space(space, keys):
+    targets = [BOARD_SPACES[key] for key in keys]
+    for offset in range(1, len(SPACES) + 1):
+        if (space + offset) % len(SPACES) in targets:
+            return (space + offset) % len(SPACES)
+
+NEXT_RAILROAD = tuple(get_next_space(space, RAILROADS) for space in range(len(SPACES)))
+NEXT_UTILITY = tuple(get_next_space(space, UTILITIES) for space in range(len(SPACES)))
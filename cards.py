@@ -1,46 +1,37 @@
 import random
-import time
-import settings
+from events import emit, GoojfCardDrawn, MovedBack, RepairsAssessed, PaidEachPlayer, CollectedFromEachPlayer
 from enums import LocationKeys, DeckType
+from board_spec import BOARD_SPACES, NEXT_RAILROAD, NEXT_UTILITY
+
+GO = BOARD_SPACES[LocationKeys.GO]
+READING_RR = BOARD_SPACES[LocationKeys.READING_RR]
+ST_CHARLES = BOARD_SPACES[LocationKeys.ST_CHARLES]
+ILLINOIS = BOARD_SPACES[LocationKeys.ILLINOIS]
+BOARDWALK = BOARD_SPACES[LocationKeys.BOARDWALK]
 
 
 def chance0(player, board):
-    board.advance(player, board.get_space(LocationKeys.BOARDWALK))
+    board.advance(player, BOARDWALK)
     return True
 
 def chance1(player, board):
-    board.advance(player, board.get_space(LocationKeys.GO))
+    board.advance(player, GO)
     return True
 
 def chance2(player, board):
-    board.advance(player, board.get_space(LocationKeys.ILLINOIS))
+    board.advance(player, ILLINOIS)
     return True
     
 def chance3(player, board):
-    board.advance(player, board.get_space(LocationKeys.ST_CHARLES))
+    board.advance(player, ST_CHARLES)
     return True
 
 def chance4(player, board): # quantity: 2
-    if player.board_space < board.get_space(LocationKeys.READING_RR) \
-            or player.board_space >= board.get_space(LocationKeys.SHORT_LINE):
-        board.advance(player, board.get_space(LocationKeys.READING_RR), double_if_owned=True)
-    
-    elif player.board_space < board.get_space(LocationKeys.PENNSYLVANIA_RR):
-        board.advance(player, board.get_space(LocationKeys.PENNSYLVANIA_RR), double_if_owned=True)
-    
-    elif player.board_space < board.get_space(LocationKeys.BO_RR):
-        board.advance(player, board.get_space(LocationKeys.BO_RR), double_if_owned=True)
-    
-    elif player.board_space < board.get_space(LocationKeys.SHORT_LINE):
-        board.advance(player, board.get_space(LocationKeys.SHORT_LINE), double_if_owned=True)
+    board.advance(player, NEXT_RAILROAD[player.board_space], double_if_owned=True)
     return True
     
 def chance5(player, board):
-    if player.board_space < board.get_space(LocationKeys.ELECTRIC) \
-            or player.board_space >= board.get_space(LocationKeys.WATER):
-        board.advance(player, board.get_space(LocationKeys.ELECTRIC), double_if_owned=True)
-    else:
-        board.advance(player, board.get_space(LocationKeys.WATER), double_if_owned=True)
+    board.advance(player, NEXT_UTILITY[player.board_space], double_if_owned=True)
     return True
 
 def chance6(player, board):
@@ -48,16 +39,12 @@ def chance6(player, board):
     return True
     
 def chance7(player, board):
-    print(f"player {player.player_number} draws a Get Out Of Jail Free Card")
-    if not settings.fast:
-        time.sleep(0.5)
+    emit(GoojfCardDrawn, player.player_number)
     player.goojf_cards += 1
     return False
     
 def chance8(player, board):
-    print(f"player {player.player_number} moves back 3 spaces")
-    if not settings.fast:
-        time.sleep(0.5)
+    emit(MovedBack, player.player_number, 3)
     board.land(player, player.board_space - 3)
     return True
     
@@ -68,9 +55,7 @@ def chance9(player, board):
 def chance10(player, board):
     house_cost = 25
     hotel_cost = 100
-    print(f"player {player.player_number} must pay ${house_cost} for each house and ${hotel_cost} for each hotel")
-    if not settings.fast:
-        time.sleep(0.5)
+    emit(RepairsAssessed, player.player_number, house_cost, hotel_cost)
     total = 0
 
     for property in player.properties.values():
@@ -89,14 +74,12 @@ def chance11(player, board):
 
 
 def chance12(player, board):
-    board.advance(player, board.get_space(LocationKeys.READING_RR))
+    board.advance(player, READING_RR)
     return True
     
 def chance13(current_player, board):
-    print(f"player {current_player.player_number} must give each player $50")
-    if not settings.fast:
-        time.sleep(0.5)
     amount = 50
+    emit(PaidEachPlayer, current_player.player_number, amount)
     total = amount * (len(board.players) - 1)
     current_player.charge(total)
     for player in board.players:
@@ -111,7 +94,7 @@ def chance14(player, board):
 
 
 def comm_chest0(player, board):
-    board.advance(player, board.get_space(LocationKeys.GO))
+    board.advance(player, GO)
     return True
 
 def comm_chest1(player, board):
@@ -131,10 +114,8 @@ def comm_chest7(player, board):
     return True
     
 def comm_chest8(current_player, board):
-    print(f"player {current_player.player_number} gains $10 from each player")
-    if not settings.fast:
-        time.sleep(0.5)
     amount = 10
+    emit(CollectedFromEachPlayer, current_player.player_number, amount)
     for player in board.players:
         if player.player_number == current_player.player_number:
             continue
@@ -155,9 +136,7 @@ def comm_chest12(player, board):
     house_cost = 40
     hotel_cost = 115
     total = 0
-    print(f"player {player.player_number} must pay ${house_cost} for each house and ${hotel_cost} for each hotel")
-    if not settings.fast:
-        time.sleep(0.5)
+    emit(RepairsAssessed, player.player_number, house_cost, hotel_cost)
 
     for property in player.properties.values():
         if property.can_develop:
@@ -173,59 +152,72 @@ def comm_chest13(player, board):
     return True
 
 
+# each deck's card effects, in printed order and unshuffled
+def init_card_effects(type):
+    if type == DeckType.CHANCE:
+        return [
+            chance0,
+            chance1,
+            chance2,
+            chance3,
+            chance4,
+            chance4,
+            chance5,
+            chance6,
+            chance7,
+            chance8,
+            chance9,
+            chance10,
+            chance11,
+            chance12,
+            chance13,
+            chance14
+        ]
+    elif type == DeckType.COMMUNITY_CHEST:
+        return [
+            chance1,
+            comm_chest1,
+            comm_chest2,
+            comm_chest2,
+            chance6,
+            chance7,
+            chance9,
+            comm_chest6,
+            comm_chest6,
+            comm_chest6,
+            comm_chest7,
+            comm_chest8,
+            comm_chest10,
+            comm_chest11,
+            comm_chest12,
+            comm_chest13,
+        ]
+    return []
+
+
 class Card():
     def __init__(self, effect):
         self.do_effect = effect
         
 
 class Deck():
-    def __init__(self, type: DeckType):
-        self.cards = self.init_cards(type)
-
-    def init_cards(self, type):
-        cards = []
-        if type == DeckType.CHANCE:
-            cards = [
-                Card(chance0),
-                Card(chance1),
-                Card(chance2),
-                Card(chance3),
-                Card(chance4),
-                Card(chance4),
-                Card(chance5),
-                Card(chance6),
-                Card(chance7),
-                Card(chance8),
-                Card(chance9),
-                Card(chance10),
-                Card(chance11),
-                Card(chance12),
-                Card(chance13),
-                Card(chance14)
-            ]
-        elif type == DeckType.COMMUNITY_CHEST:
-            cards = [
-                Card(chance1),
-                Card(comm_chest1),
-                Card(comm_chest2),
-                Card(comm_chest2),
-                Card(chance6),
-                Card(chance7),
-                Card(chance9),
-                Card(comm_chest6),
-                Card(comm_chest6),
-                Card(comm_chest6),
-                Card(comm_chest7),
-                Card(comm_chest8),
-                Card(comm_chest10),
-                Card(comm_chest11),
-                Card(comm_chest12),
-                Card(comm_chest13),
-            ]
-
-        random.shuffle(cards)
+    # rng: the game's random number generator, so a seeded game shuffles the same way every time
+    def __init__(self, type: DeckType, rng=random):
+        self.cards = self.init_cards(type, rng)
+        self.all_cards = list(self.cards) # fixed order used to refer to cards by index in snapshots
+        self.card_indices = {card: i for i, card in enumerate(self.all_cards)}
+
+    def init_cards(self, type, rng=random):
+        cards = [Card(effect) for effect in init_card_effects(type)]
+        rng.shuffle(cards)
         return cards
 
+    def snapshot(self):
+        return tuple(self.card_indices[card] for card in self.cards)
+
+    def restore(self, snapshot):
+        self.cards = [self.all_cards[i] for i in snapshot]
+
     def draw(self, player, board):
         card = self.cards.pop(0)
         return_to_bottom = card.do_effect(player, board)
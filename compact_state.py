@@ -0,0 +1,200 @@
+from array import array
+from enums import Colors
+from board_spec import SPACES, SPACE_COLORS, COLOR_SPACES, PROPERTIES, RAILROADS, UTILITIES, RAILROAD_COST, UTILITY_COST, PROPERTY_RENTS, RAILROAD_RENTS, UTILITY_MULTIPLIERS
+
+# Array-backed game state: one slot per board space for owner, houses and mortgages, and one slot per
+# player for cash, position, jail turns and goojf cards. The static facts about each space (cost,
+# rents, color) live once per process in BoardTables, so holding thousands of states only costs the
+# arrays themselves.
+
+NUM_SPACES = 40
+NO_OWNER = 0 # owners are stored as player index + 1
+
+# kinds of space
+OTHER = 0
+PROPERTY = 1
+RAILROAD = 2
+UTILITY = 3
+
+STARTING_MONEY = 1500
+
+_board_tables = None
+
+
+class BoardTables():
+    # read-only tables indexed by board space, read off the board spec
+    def __init__(self):
+        kinds = []
+        costs = []
+        for key in SPACES:
+            if key in PROPERTIES:
+                kinds.append(PROPERTY)
+                costs.append(PROPERTIES[key][0])
+            elif key in RAILROADS:
+                kinds.append(RAILROAD)
+                costs.append(RAILROAD_COST)
+            elif key in UTILITIES:
+                kinds.append(UTILITY)
+                costs.append(UTILITY_COST)
+            else:
+                kinds.append(OTHER)
+                costs.append(0)
+        self.kinds = tuple(kinds)
+        self.keys = SPACES # LocationKeys by board space
+        self.names = tuple(key.value for key in SPACES)
+        self.colors = SPACE_COLORS
+        self.costs = tuple(costs)
+        # as RealEstate works them out
+        self.mortgage_amounts = tuple(cost // 2 for cost in costs)
+        self.unmortgage_amounts = tuple(int(cost // 2 * 1.1) for cost in costs)
+        self.build_costs = tuple(PROPERTIES[key][2] if key in PROPERTIES else 0 for key in SPACES)
+        self.rents = tuple(PROPERTIES[key][3] if key in PROPERTIES else None for key in SPACES)
+        self.color_spaces = COLOR_SPACES # color -> spaces in the set
+        self.real_estate_spaces = tuple(space for space, kind in enumerate(self.kinds) if kind != OTHER)
+
+# shared by every state in the process
+def get_board_tables():
+    global _board_tables
+    if _board_tables is None:
+        _board_tables = BoardTables()
+    return _board_tables
+
+
+class CompactState():
+    __slots__ = ("owners", "houses", "mortgaged", "cash", "positions", "jail_counters", "goojf_cards", "roll_total")
+
+    def __init__(self, num_players):
+        self.owners = array('b', bytes(NUM_SPACES))
+        self.houses = array('b', bytes(NUM_SPACES))
+        self.mortgaged = array('b', bytes(NUM_SPACES))
+        self.cash = array('d', [STARTING_MONEY] * num_players) # ai trade adjustments can leave fractional money
+        self.positions = array('b', bytes(num_players))
+        self.jail_counters = array('b', bytes(num_players))
+        self.goojf_cards = array('b', bytes(num_players))
+        self.roll_total = 0
+
+    @classmethod
+    def from_board(cls, board):
+        state = cls(len(board.players))
+        owner_indices = {player: i + 1 for i, player in enumerate(board.players)}
+        for property in board.real_estate:
+            space = property.board_space
+            if property.owner is not None:
+                state.owners[space] = owner_indices[property.owner]
+            state.mortgaged[space] = property.is_mortgaged
+            if property.can_develop:
+                state.houses[space] = property.num_houses
+        for i, player in enumerate(board.players):
+            state.cash[i] = player.money
+            state.positions[i] = player.board_space
+            state.jail_counters[i] = player.jail_counter
+            state.goojf_cards[i] = player.goojf_cards
+        state.roll_total = board.roll_total
+        return state
+
+    # the same, read off the players alone (in turn order), for code that only has the players to hand
+    @classmethod
+    def from_players(cls, players, roll_total=0):
+        state = cls(len(players))
+        for i, player in enumerate(players):
+            for property in player.properties.values():
+                space = property.board_space
+                state.owners[space] = i + 1
+                state.mortgaged[space] = property.is_mortgaged
+                if property.can_develop:
+                    state.houses[space] = property.num_houses
+            state.cash[i] = player.money
+            state.positions[i] = player.board_space
+            state.jail_counters[i] = player.jail_counter
+            state.goojf_cards[i] = player.goojf_cards
+        state.roll_total = roll_total
+        return state
+
+    # writes this state onto an object board; players' holdings are rebuilt in board order
+    def apply_to(self, board):
+        for i, player in enumerate(board.players):
+            money = self.cash[i]
+            player.money = int(money) if money.is_integer() else money
+            player.board_space = self.positions[i]
+            player.jail_counter = self.jail_counters[i]
+            player.goojf_cards = self.goojf_cards[i]
+            player.properties = {}
+            player.properties_by_set.clear()
+            player.mortgaged_property_names = set()
+        for property in board.real_estate:
+            space = property.board_space
+            property.is_mortgaged = bool(self.mortgaged[space])
+            if property.can_develop:
+                property.num_houses = self.houses[space]
+            owner = self.owners[space]
+            property.owner = board.players[owner - 1] if owner != NO_OWNER else None
+            if property.owner is not None:
+                property.owner.properties[property.name] = property
+                property.owner.properties_by_set[property.color].append(property)
+                if property.is_mortgaged:
+                    property.owner.mortgaged_property_names.add(property.name)
+        board.roll_total = self.roll_total
+        for player in board.players:
+            player.rebuild_masks()
+        if len(board.players) > 0:
+            board.players[0].trade_matrix.rebuild_index({})
+
+    def copy(self):
+        state = CompactState.__new__(CompactState)
+        state.owners = array('b', self.owners)
+        state.houses = array('b', self.houses)
+        state.mortgaged = array('b', self.mortgaged)
+        state.cash = array('d', self.cash)
+        state.positions = array('b', self.positions)
+        state.jail_counters = array('b', self.jail_counters)
+        state.goojf_cards = array('b', self.goojf_cards)
+        state.roll_total = self.roll_total
+        return state
+
+    # bytes held by this state's arrays
+    def get_size(self):
+        return sum(values.buffer_info()[1] * values.itemsize for values in
+                   (self.owners, self.houses, self.mortgaged, self.cash, self.positions, self.jail_counters, self.goojf_cards))
+
+    """
+    Queries, with the same rules as the object board
+    """
+    def get_owned_spaces(self, player_i):
+        owner = player_i + 1
+        return [space for space in get_board_tables().real_estate_spaces if self.owners[space] == owner]
+
+    def count_owned(self, player_i, color):
+        owner = player_i + 1
+        return sum(1 for space in get_board_tables().color_spaces[color] if self.owners[space] == owner)
+
+    def has_full_set(self, player_i, color):
+        owner = player_i + 1
+        return all(self.owners[space] == owner for space in get_board_tables().color_spaces[color])
+
+    def calculate_rent(self, space, double_if_owned=False):
+        tables = get_board_tables()
+        owner = self.owners[space]
+        if owner == NO_OWNER or self.mortgaged[space]:
+            return 0
+        kind = tables.kinds[space]
+        if kind == PROPERTY:
+            rents = PROPERTY_RENTS[space]
+            if self.houses[space] > 0:
+                return rents[self.houses[space]][False]
+            return rents[0][self.has_full_set(owner - 1, tables.colors[space])]
+        if kind == RAILROAD:
+            rent = RAILROAD_RENTS[self.count_owned(owner - 1, Colors.RR)]
+            return rent * 2 if double_if_owned else rent
+        if double_if_owned:
+            return UTILITY_MULTIPLIERS[-1] * self.roll_total
+        return UTILITY_MULTIPLIERS[self.count_owned(owner - 1, Colors.UTILITY)] * self.roll_total
+
+    def calculate_total_worth(self, player_i):
+        tables = get_board_tables()
+        total = self.cash[player_i]
+        for space in self.get_owned_spaces(player_i):
+            if self.mortgaged[space]:
+                total += tables.mortgage_amounts[space]
+            else:
+                total += tables.costs[space] + self.houses[space] * tables.build_costs[space]
+        return total
@@ -35,6 +35,9 @@ class Colors(Enum):
     UTILITY = "250"
     WHITE = "251"
 
+# colors that can be built on, in board order
+BUILDABLE_COLORS = [Colors.BROWN, Colors.LIGHTBLUE, Colors.PINK, Colors.ORANGE, Colors.RED, Colors.YELLOW, Colors.GREEN, Colors.DARKBLUE]
+
 # locations have the same value as their board space index, but for best practice,
 # use the Board class's board space variable to access locations instead. When needing
 # to go to a precise location, these can be used, as long as the destination isn't chance
@@ -0,0 +1,351 @@
+import time
+import settings
+
+# Game events are emitted through the module-level bus as `emit(EventType, *args)`. The event
+# object is only built, and its text only formatted, when a sink that wants events is installed,
+# so headless games with a NullSink skip all of that work.
+
+
+class Event():
+    __slots__ = ()
+    paced = True # whether the terminal sink pauses after showing this event
+
+    def describe(self):
+        return ""
+
+
+class PlayerEvent(Event):
+    __slots__ = ("player",)
+
+    def __init__(self, player):
+        self.player = player # player number
+
+
+class PropertyEvent(Event):
+    __slots__ = ("player", "location")
+
+    def __init__(self, player, location):
+        self.player = player
+        self.location = location
+
+
+class AmountEvent(Event):
+    __slots__ = ("player", "amount")
+
+    def __init__(self, player, amount):
+        self.player = player
+        self.amount = amount
+
+
+"""
+Turns and movement
+"""
+class TurnStarted(PlayerEvent):
+    __slots__ = ()
+    def describe(self):
+        return f"\nPlayer {self.player}'s turn"
+
+class DiceRolled(Event):
+    __slots__ = ("player", "die1", "die2")
+
+    def __init__(self, player, die1, die2):
+        self.player = player
+        self.die1 = die1
+        self.die2 = die2
+
+    def describe(self):
+        return f"\nDie roll: {self.die1, self.die2}"
+
+class Moving(PropertyEvent):
+    __slots__ = ()
+    def describe(self):
+        return f"Next space: {self.location.name_colored}"
+
+class PassedGo(PlayerEvent):
+    __slots__ = ()
+    def describe(self):
+        return f"Player {self.player} passes Go"
+
+class Landed(PropertyEvent):
+    __slots__ = ()
+    def describe(self):
+        return f"Player {self.player} lands on {self.location.name_colored}"
+
+class MovedBack(AmountEvent):
+    __slots__ = ()
+    def describe(self):
+        return f"player {self.player} moves back {self.amount} spaces"
+
+
+"""
+Jail
+"""
+class SentToJail(PlayerEvent):
+    __slots__ = ()
+    def describe(self):
+        return f"Player {self.player} goes to jail"
+
+class ThirdDoubles(PlayerEvent):
+    __slots__ = ()
+    def describe(self):
+        return f"Player {self.player} rolled doubles for the third time and got sent to jail.\n"
+
+class InJail(PlayerEvent):
+    __slots__ = ()
+    def describe(self):
+        return f"Player {self.player} is in jail"
+
+class StayedInJail(AmountEvent):
+    __slots__ = ()
+    def describe(self):
+        return f"Player {self.player} is in jail for {self.amount} more turns\n"
+
+class LeftJail(PlayerEvent):
+    __slots__ = ()
+    def describe(self):
+        return f"Player {self.player} gets out of jail"
+
+class GoojfCardDrawn(PlayerEvent):
+    __slots__ = ()
+    def describe(self):
+        return f"player {self.player} draws a Get Out Of Jail Free Card"
+
+
+"""
+Money
+"""
+class MoneyGained(Event):
+    __slots__ = ("player", "amount", "balance")
+
+    def __init__(self, player, amount, balance):
+        self.player = player
+        self.amount = amount
+        self.balance = balance
+
+    def describe(self):
+        return f"Player {self.player} gains ${self.amount} (${self.balance})"
+
+class MoneyLost(MoneyGained):
+    __slots__ = ()
+    def describe(self):
+        return f"Player {self.player} loses ${self.amount} (${self.balance})"
+
+class RentPaid(Event):
+    __slots__ = ("player", "owner", "location", "amount")
+
+    def __init__(self, player, owner, location, amount):
+        self.player = player
+        self.owner = owner
+        self.location = location
+        self.amount = amount
+
+    def describe(self):
+        return f"Player {self.player} must pay ${self.amount} rent to player {self.owner}"
+
+class RepairsAssessed(Event):
+    __slots__ = ("player", "house_cost", "hotel_cost")
+
+    def __init__(self, player, house_cost, hotel_cost):
+        self.player = player
+        self.house_cost = house_cost
+        self.hotel_cost = hotel_cost
+
+    def describe(self):
+        return f"player {self.player} must pay ${self.house_cost} for each house and ${self.hotel_cost} for each hotel"
+
+class PaidEachPlayer(AmountEvent):
+    __slots__ = ()
+    def describe(self):
+        return f"player {self.player} must give each player ${self.amount}"
+
+class CollectedFromEachPlayer(AmountEvent):
+    __slots__ = ()
+    def describe(self):
+        return f"player {self.player} gains ${self.amount} from each player"
+
+
+"""
+Real estate
+"""
+class PropertyBought(PropertyEvent):
+    __slots__ = ()
+    def describe(self):
+        return f"Player {self.player} buys {self.location.name_colored}"
+
+class PropertyMortgaged(PropertyEvent):
+    __slots__ = ()
+    def describe(self):
+        return f"Player {self.player} mortgages {self.location.name_colored}"
+
+class PropertyUnmortgaged(PropertyEvent):
+    __slots__ = ()
+    def describe(self):
+        return f"Player {self.player} unmortgages {self.location.name_colored}"
+
+class HouseBuilt(PropertyEvent):
+    __slots__ = ()
+    def describe(self):
+        return f"Player {self.player} builds a house on {self.location.name_colored}"
+
+class HouseSold(PropertyEvent):
+    __slots__ = ()
+    def describe(self):
+        return f"Player {self.player} sells a house on {self.location.name_colored}"
+
+
+"""
+Auctions
+"""
+class AuctionStarted(Event):
+    __slots__ = ("location",)
+
+    def __init__(self, location):
+        self.location = location
+
+    def describe(self):
+        return f"Performing auction for {self.location.name_colored}"
+
+class BidPlaced(AmountEvent):
+    __slots__ = ()
+    def describe(self):
+        return f"Player {self.player} bids ${self.amount}"
+
+class AuctionDropped(PlayerEvent):
+    __slots__ = ()
+    def describe(self):
+        return f"Player {self.player} drops out of the auction"
+
+class AuctionWon(Event):
+    __slots__ = ("player", "location", "amount")
+
+    def __init__(self, player, location, amount):
+        self.player = player
+        self.location = location
+        self.amount = amount
+
+    def describe(self):
+        return f"Player {self.player} wins the auction"
+
+
+"""
+Trades
+"""
+class TradeOffered(Event):
+    __slots__ = ("trade_offer",)
+    paced = False
+
+    def __init__(self, trade_offer):
+        self.trade_offer = trade_offer
+
+    def describe(self):
+        lines = [f"\nPlayer {self.trade_offer.initiator} offered to trade with player {self.trade_offer.recipient}. Here is the offer:"]
+        lines.extend(self.trade_offer.describe())
+        return "\n".join(lines)
+
+class TradeAccepted(Event):
+    __slots__ = ("initiator", "recipient")
+    paced = False
+
+    def __init__(self, initiator, recipient):
+        self.initiator = initiator
+        self.recipient = recipient
+
+    def describe(self):
+        return f"Player {self.recipient} accepted the trade"
+
+class TradeDeclined(TradeAccepted):
+    __slots__ = ()
+    def describe(self):
+        return f"Player {self.recipient} declined the trade"
+
+class PropertyTraded(Event):
+    __slots__ = ("player", "recipient", "location")
+    paced = False
+
+    def __init__(self, player, recipient, location):
+        self.player = player
+        self.recipient = recipient
+        self.location = location
+
+    def describe(self):
+        return f"Player {self.player} trades {self.location.name_colored} to player {self.recipient}"
+
+
+"""
+Game
+"""
+class GameOver(Event):
+    __slots__ = ("loser", "turns", "max_turns")
+
+    def __init__(self, loser, turns, max_turns):
+        self.loser = loser # None if the turn limit was reached
+        self.turns = turns
+        self.max_turns = max_turns
+
+    def describe(self):
+        if self.loser is None:
+            return f"Game over: turn limit of {self.max_turns} reached"
+        return f"Game over: Player {self.loser} lost"
+
+
+"""
+Sinks
+"""
+class Sink():
+    def handle(self, event):
+        pass
+
+# discards everything; the bus never builds events while only null sinks are installed
+class NullSink(Sink):
+    pass
+
+class TerminalSink(Sink):
+    def __init__(self, delay=0.5):
+        self.delay = delay # seconds to pause after paced events, unless settings.fast is on
+
+    def handle(self, event):
+        print(event.describe())
+        if event.paced and self.delay and not settings.fast:
+            time.sleep(self.delay)
+
+class RecordingSink(Sink):
+    def __init__(self):
+        self.events = []
+
+    def handle(self, event):
+        self.events.append(event)
+
+    def of_type(self, event_type):
+        return [event for event in self.events if isinstance(event, event_type)]
+
+    def clear(self):
+        self.events = []
+
+
+class EventBus():
+    def __init__(self, sinks=None):
+        self.sinks = []
+        self.set_sinks(sinks if sinks is not None else [TerminalSink()])
+
+    def set_sinks(self, sinks):
+        # null sinks aren't kept, so an empty list means nobody is listening
+        self.sinks = [sink for sink in sinks if not isinstance(sink, NullSink)]
+
+    def add_sink(self, sink):
+        if not isinstance(sink, NullSink):
+            self.sinks.append(sink)
+
+    def remove_sink(self, sink):
+        if sink in self.sinks:
+            self.sinks.remove(sink)
+
+    def publish(self, event):
+        for sink in self.sinks:
+            sink.handle(event)
+
+
+bus = EventBus()
+
+def emit(event_type, *args):
+    if bus.sinks:
+        bus.publish(event_type(*args))
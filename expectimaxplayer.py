@@ -0,0 +1,338 @@
+import time
+from aiplayer import AIPlayer
+from enums import LocationKeys, OwnershipDegree
+from board_spec import BOARD_SPACES, COLOR_SPACES, SPACE_COLORS, SET_SIZES, PROPERTY_RENTS, RAILROAD_RENTS, UTILITY_MULTIPLIERS
+from compact_state import CompactState, get_board_tables, NUM_SPACES, NO_OWNER, OTHER, PROPERTY, RAILROAD
+from markov import load_income_tables, JAIL, VISITING_JAIL, JAIL_TURNS
+
+# An ai that looks ahead over the dice for its buy, build, mortgage and jail decisions. Each option is
+# applied to a CompactState copy of the game, then scored by expectimax: chance nodes average over the
+# 11 dice sums by probability, and max nodes pick this player's best choice when the lookahead lands
+# it on an unowned property. Moves are played on the state and undone on the way back up, so a search
+# allocates nothing per node. The lookahead is simplified: each roll is a single move (no doubles
+# rerolls), cards are ignored, and opponents buy whatever they land on if they have the cash. Searches
+# deepen one roll at a time until the decision's time budget runs out, and the choice from the
+# deepest finished search is used, so a decision never takes much longer than its budget.
+# Trades and auction bids are left to AIPlayer.
+
+DICE_SUMS = tuple((total, (6 - abs(total - 7)) / 36) for total in range(2, 13)) # (sum, probability)
+DOUBLES_PROBABILITY = 1 / 36 # of each even sum
+JAIL_FEE = 50
+GO_SALARY = 200
+GO_TO_JAIL = BOARD_SPACES[LocationKeys.GO_TO_JAIL]
+TAXES = {BOARD_SPACES[LocationKeys.INCOME_TAX]: 200, BOARD_SPACES[LocationKeys.LUXURY_TAX]: 100}
+
+# static evaluation
+INCOME_TURNS = 10 # turns of expected rent from each opponent that a position is worth
+GOOJF_VALUE = 50
+UTILITY_ROLL = 7 # dice total used for utility rent
+SHORTFALL_COST = 0.1 # worth lost per dollar of negative cash that mortgages or house sales can cover
+BANKRUPTCY_PENALTY = 10000
+
+_landing_probabilities = None
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+# expected landings on each space per turn, from markov.py (uniform if numpy and the cache aren't there)
+def get_landing_probabilities():
+    global _landing_probabilities
+    if _landing_probabilities is None:
+        tables = load_income_tables()
+        _landing_probabilities = tuple(tables["landing_probabilities"]) if tables is not None else (1 / NUM_SPACES,) * NUM_SPACES
+    return _landing_probabilities
+
+# the spaces of color a round of building (level=min) or selling (level=max) works on, keeping the
+# houses even the way AIPlayer's build_house_rounds and sell_house_rounds do
+def get_round_spaces(state, color, level):
+    spaces = COLOR_SPACES[color]
+    houses = level(state.houses[space] for space in spaces)
+    return [space for space in spaces if state.houses[space] == houses]
+
+
+class ExpectimaxPlayer(AIPlayer):
+    # time_budget: seconds allowed per decision; max_depth: most rolls to look ahead
+    def __init__(self, player_number, token, trade_threshold=1000, time_budget=0.02, max_depth=4):
+        super().__init__(player_number, token, trade_threshold)
+        self.time_budget = time_budget
+        self.max_depth = max_depth
+        self.deadline = None
+        self.searches = 0
+        self.total_search_depth = 0 # of the deepest finished search, summed over searches
+        self.search_nodes = 0
+
+    """
+    Decisions
+    """
+    def decide_purchase(self, property):
+        if self.calculate_available_capital(OwnershipDegree.MONOPOLY, sell_houses=True) < property.cost: # what charge could raise at most
+            return False
+        self.start_decision()
+        state = self.get_state()
+        me = self.player_number - 1
+        bought = state.copy()
+        bought.owners[property.board_space] = me + 1
+        bought.cash[me] -= property.cost
+        return self.choose([(True, bought), (False, state)], self.get_next_mover(state))
+
+    def resolve_development(self):
+        if self.money < 200 or len(self.get_buildable_colors()) == 0:
+            return
+        self.start_decision()
+        state = self.get_state()
+        me = self.player_number - 1
+        tables = get_board_tables()
+        rounds = [] # one house on each of the color's least developed properties, in build order
+        while True:
+            options = [(None, state)]
+            for color in self.get_buildable_colors():
+                spaces = get_round_spaces(state, color, min)
+                cost = tables.build_costs[spaces[0]] * len(spaces)
+                if cost > state.cash[me] or state.houses[spaces[0]] >= 5 or any(state.mortgaged[space] for space in COLOR_SPACES[color]):
+                    continue
+                built = state.copy()
+                for space in spaces:
+                    built.houses[space] += 1
+                built.cash[me] -= cost
+                options.append((color, built))
+            if len(options) == 1:
+                break
+            color = self.choose(options, self.get_next_mover(state))
+            if color is None:
+                break
+            rounds.append(color)
+            state = dict(options)[color]
+        for color in rounds:
+            self.build_house_rounds(color, 1)
+
+    def decide_mortgage(self, amount):
+        if self.money >= amount or len(self.properties) == 0:
+            return
+        self.start_decision()
+        state = self.get_state()
+        me = self.player_number - 1
+        state.cash[me] -= amount # score positions as if the charge has gone through
+        tables = get_board_tables()
+        steps = [] # ("mortgage", space) or ("sell", color), in order
+        while state.cash[me] < 0:
+            options = []
+            for space in state.get_owned_spaces(me):
+                if state.mortgaged[space]:
+                    continue
+                if tables.kinds[space] == PROPERTY and any(state.houses[other] for other in COLOR_SPACES[tables.colors[space]]):
+                    continue # houses have to go before a color can be mortgaged
+                mortgaged = state.copy()
+                mortgaged.mortgaged[space] = 1
+                mortgaged.cash[me] += tables.mortgage_amounts[space]
+                options.append((("mortgage", space), mortgaged))
+            for color in self.get_buildable_colors():
+                spaces = get_round_spaces(state, color, max)
+                if state.houses[spaces[0]] == 0:
+                    continue
+                sold = state.copy()
+                for space in spaces:
+                    sold.houses[space] -= 1
+                    sold.cash[me] += tables.build_costs[space] // 2
+                options.append((("sell", color), sold))
+            if len(options) == 0:
+                break
+            step = self.choose(options, self.get_next_mover(state))
+            steps.append(step)
+            state = dict(options)[step]
+        for kind, target in steps:
+            if kind == "mortgage":
+                self.properties[tables.names[target]].mortgage()
+            else:
+                self.sell_house_rounds(target, 1)
+
+    def will_get_out_of_jail(self):
+        if self.goojf_cards == 0 and self.money < JAIL_FEE:
+            return False
+        self.start_decision()
+        state = self.get_state()
+        me = self.player_number - 1
+        left = state.copy()
+        left.positions[me] = VISITING_JAIL
+        left.jail_counters[me] = 0
+        if self.goojf_cards > 0:
+            left.goojf_cards[me] -= 1
+        else:
+            left.cash[me] -= JAIL_FEE
+        # either way this player rolls next
+        if not self.choose([(True, left), (False, state)], me):
+            return False
+        if self.goojf_cards > 0:
+            self.goojf_cards -= 1
+        else:
+            self.charge(JAIL_FEE)
+        return True
+
+    """
+    Search
+    """
+    def start_decision(self):
+        self.deadline = time.perf_counter() + self.time_budget
+
+    # the state of the game as this player sees it; players are indexed by player number - 1
+    def get_state(self):
+        players = [self.trade_matrix.players[number] for number in sorted(self.trade_matrix.players)]
+        return CompactState.from_players(players)
+
+    # decisions are mostly made on this player's own turn, so the lookahead starts with the next player
+    def get_next_mover(self, state):
+        return self.player_number % len(state.cash)
+
+    # options: (choice, state after making it) pairs. returns the choice with the best expectimax value
+    # from the deepest search that finished before the deadline
+    def choose(self, options, first_mover):
+        values = [self.evaluate(state) for _, state in options]
+        best = options[values.index(max(values))][0]
+        depth = 0
+        while depth < self.max_depth:
+            try:
+                values = [self.expect_roll(state, first_mover, depth + 1) for _, state in options]
+            except SearchTimeout:
+                break
+            depth += 1
+            best = options[values.index(max(values))][0]
+        self.searches += 1
+        self.total_search_depth += depth
+        return best
+
+    # chance node: the value of mover's next roll, averaged over the dice
+    def expect_roll(self, state, mover, depth):
+        if depth == 0:
+            return self.evaluate(state)
+        if time.perf_counter() >= self.deadline:
+            raise SearchTimeout()
+        self.search_nodes += 1
+
+        jail_counter = state.jail_counters[mover]
+        if jail_counter == 0:
+            value = 0
+            for total, probability in DICE_SUMS:
+                value += probability * self.expect_move(state, mover, state.positions[mover], total, depth)
+            return value
+
+        # doubles get out of jail free; otherwise stay, unless it's the last turn and the fee is paid
+        value = 0
+        for total, probability in DICE_SUMS:
+            if total % 2 == 0:
+                value += DOUBLES_PROBABILITY * self.expect_move(state, mover, VISITING_JAIL, total, depth)
+        if jail_counter == 1:
+            state.cash[mover] -= JAIL_FEE
+            for total, probability in DICE_SUMS:
+                other_probability = probability - DOUBLES_PROBABILITY if total % 2 == 0 else probability
+                value += other_probability * self.expect_move(state, mover, VISITING_JAIL, total, depth)
+            state.cash[mover] += JAIL_FEE
+        else:
+            state.jail_counters[mover] -= 1
+            value += (1 - 6 * DOUBLES_PROBABILITY) * self.expect_roll(state, (mover + 1) % len(state.cash), depth - 1)
+            state.jail_counters[mover] += 1
+        return value
+
+    # moves mover total spaces from start, scores the rest of the lookahead, then undoes the move
+    def expect_move(self, state, mover, start, total, depth):
+        tables = get_board_tables()
+        next_mover = (mover + 1) % len(state.cash)
+        saved_position = state.positions[mover]
+        saved_jail_counter = state.jail_counters[mover]
+        saved_cash = state.cash[mover]
+        saved_roll_total = state.roll_total
+
+        space = (start + total) % NUM_SPACES
+        state.positions[mover] = space
+        state.jail_counters[mover] = 0
+        state.roll_total = total
+        if space < start:
+            state.cash[mover] += GO_SALARY
+
+        value = None
+        bought = False
+        payee, rent = None, 0
+        if tables.kinds[space] != OTHER:
+            owner = state.owners[space]
+            cost = tables.costs[space]
+            if owner == NO_OWNER and state.cash[mover] >= cost:
+                if mover == self.player_number - 1:
+                    # max node: this player chooses whether to buy
+                    value = self.expect_roll(state, next_mover, depth - 1)
+                    state.owners[space] = mover + 1
+                    state.cash[mover] -= cost
+                    value = max(value, self.expect_roll(state, next_mover, depth - 1))
+                    state.owners[space] = NO_OWNER
+                else:
+                    state.owners[space] = mover + 1
+                    state.cash[mover] -= cost
+                    bought = True
+            elif owner != NO_OWNER and owner != mover + 1 and not state.mortgaged[space]:
+                payee, rent = owner - 1, state.calculate_rent(space)
+                state.cash[mover] -= rent
+                state.cash[payee] += rent
+        elif space == GO_TO_JAIL:
+            state.positions[mover] = JAIL
+            state.jail_counters[mover] = JAIL_TURNS
+        elif space in TAXES:
+            state.cash[mover] -= TAXES[space]
+
+        if value is None:
+            value = self.expect_roll(state, next_mover, depth - 1)
+
+        if bought:
+            state.owners[space] = NO_OWNER
+        state.positions[mover] = saved_position
+        state.jail_counters[mover] = saved_jail_counter
+        state.cash[mover] = saved_cash
+        if payee is not None:
+            state.cash[payee] -= rent
+        state.roll_total = saved_roll_total
+        return value
+
+    # static evaluation: this player's worth and expected rent, less the average of the other players'
+    def evaluate(self, state):
+        tables = get_board_tables()
+        landings = get_landing_probabilities()
+        owners = state.owners
+        num_players = len(state.cash)
+        set_counts = {} # (owner, color) -> properties held, mortgaged or not
+        for space in tables.real_estate_spaces:
+            owner = owners[space]
+            if owner != NO_OWNER:
+                key = (owner, SPACE_COLORS[space])
+                set_counts[key] = set_counts.get(key, 0) + 1
+
+        worths = [state.cash[i] + state.goojf_cards[i] * GOOJF_VALUE for i in range(num_players)]
+        liquid = [0] * num_players # what mortgages and house sales could still raise
+        incomes = [0] * num_players
+        for space in tables.real_estate_spaces:
+            owner = owners[space]
+            if owner == NO_OWNER:
+                continue
+            if state.mortgaged[space]:
+                worths[owner - 1] += tables.mortgage_amounts[space]
+                continue
+            color = SPACE_COLORS[space]
+            count = set_counts[(owner, color)]
+            houses = state.houses[space]
+            kind = tables.kinds[space]
+            if kind == PROPERTY:
+                rent = PROPERTY_RENTS[space][houses][count == SET_SIZES[color]]
+            elif kind == RAILROAD:
+                rent = RAILROAD_RENTS[count]
+            else:
+                rent = UTILITY_MULTIPLIERS[count] * UTILITY_ROLL
+            worths[owner - 1] += tables.costs[space] + houses * tables.build_costs[space]
+            liquid[owner - 1] += tables.mortgage_amounts[space] + houses * (tables.build_costs[space] // 2)
+            incomes[owner - 1] += rent * landings[space]
+
+        values = []
+        for i in range(num_players):
+            value = worths[i] + incomes[i] * (num_players - 1) * INCOME_TURNS
+            cash = state.cash[i]
+            if cash < 0:
+                value -= BANKRUPTCY_PENALTY if cash + liquid[i] < 0 else -cash * SHORTFALL_COST
+            values.append(value)
+        me = self.player_number - 1
+        return values[me] - (sum(values) - values[me]) / max(num_players - 1, 1)
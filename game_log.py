@@ -0,0 +1,187 @@
+import argparse
+import mmap
+import os
+import struct
+from collections import namedtuple, Counter
+from events import Sink, TurnStarted, DiceRolled, Moving, PassedGo, Landed, MovedBack, SentToJail, ThirdDoubles, InJail, StayedInJail, LeftJail, GoojfCardDrawn, MoneyGained, MoneyLost, RentPaid, RepairsAssessed, PaidEachPlayer, CollectedFromEachPlayer, PropertyBought, PropertyMortgaged, PropertyUnmortgaged, HouseBuilt, HouseSold, AuctionStarted, BidPlaced, AuctionDropped, AuctionWon, TradeOffered, TradeAccepted, TradeDeclined, PropertyTraded, GameOver
+
+# Binary event logs for large simulation batches. A log is a short header followed by fixed-width
+# little-endian records, one per event:
+#
+#   game    uint32   index of the game in the log, counted from 0
+#   turn    uint32   turn of that game the event happened in (0 before the first turn)
+#   event   uint8    event type id, the index into EVENT_TYPES
+#   player  uint8    player number the event is about, 0 if none
+#   other   uint8    second player number (rent owner, trade recipient), 0 if none
+#   space   uint8    board space involved, NO_SPACE if none
+#   value1  float64  event specific, see EVENT_TYPES (round-trips any amount exactly, fractional trade money included)
+#   value2  float64
+#
+# Files are only ever appended to, so several batches can share one log, and the reader streams
+# records through a memory map without loading the file.
+
+MAGIC = b"MLOG"
+VERSION = 2 # 1 had a uint16 turn and float32 values
+HEADER = struct.Struct("<4sHH") # magic, version, record size
+RECORD = struct.Struct("<IIBBBBdd")
+NO_SPACE = 255
+FLUSH_RECORDS = 4096 # records buffered by the writer between writes
+READ_RECORDS = 65536 # records unpacked per chunk by the reader
+
+LogRecord = namedtuple("LogRecord", ["game", "turn", "event", "player", "other", "space", "value1", "value2"])
+
+def get_space(location):
+    return location.board_space
+
+# (event class, fields) in id order; fields maps an event to (player, other, space, value1, value2).
+# only append to this list, so existing logs keep their meaning
+EVENT_TYPES = [
+    (TurnStarted, lambda event: (event.player, 0, NO_SPACE, 0, 0)),
+    (DiceRolled, lambda event: (event.player, 0, NO_SPACE, event.die1, event.die2)),
+    (Moving, lambda event: (event.player, 0, get_space(event.location), 0, 0)),
+    (PassedGo, lambda event: (event.player, 0, NO_SPACE, 0, 0)),
+    (Landed, lambda event: (event.player, 0, get_space(event.location), 0, 0)),
+    (MovedBack, lambda event: (event.player, 0, NO_SPACE, event.amount, 0)),
+    (SentToJail, lambda event: (event.player, 0, NO_SPACE, 0, 0)),
+    (ThirdDoubles, lambda event: (event.player, 0, NO_SPACE, 0, 0)),
+    (InJail, lambda event: (event.player, 0, NO_SPACE, 0, 0)),
+    (StayedInJail, lambda event: (event.player, 0, NO_SPACE, event.amount, 0)), # turns left
+    (LeftJail, lambda event: (event.player, 0, NO_SPACE, 0, 0)),
+    (GoojfCardDrawn, lambda event: (event.player, 0, NO_SPACE, 0, 0)),
+    (MoneyGained, lambda event: (event.player, 0, NO_SPACE, event.amount, event.balance)),
+    (MoneyLost, lambda event: (event.player, 0, NO_SPACE, event.amount, event.balance)),
+    (RentPaid, lambda event: (event.player, event.owner, get_space(event.location), event.amount, 0)),
+    (RepairsAssessed, lambda event: (event.player, 0, NO_SPACE, event.house_cost, event.hotel_cost)),
+    (PaidEachPlayer, lambda event: (event.player, 0, NO_SPACE, event.amount, 0)),
+    (CollectedFromEachPlayer, lambda event: (event.player, 0, NO_SPACE, event.amount, 0)),
+    (PropertyBought, lambda event: (event.player, 0, get_space(event.location), 0, 0)),
+    (PropertyMortgaged, lambda event: (event.player, 0, get_space(event.location), 0, 0)),
+    (PropertyUnmortgaged, lambda event: (event.player, 0, get_space(event.location), 0, 0)),
+    (HouseBuilt, lambda event: (event.player, 0, get_space(event.location), 0, 0)),
+    (HouseSold, lambda event: (event.player, 0, get_space(event.location), 0, 0)),
+    (AuctionStarted, lambda event: (0, 0, get_space(event.location), 0, 0)),
+    (BidPlaced, lambda event: (event.player, 0, NO_SPACE, event.amount, 0)),
+    (AuctionDropped, lambda event: (event.player, 0, NO_SPACE, 0, 0)),
+    (AuctionWon, lambda event: (event.player, 0, get_space(event.location), event.amount, 0)),
+    # money each side offers; the properties follow as PropertyTraded records if it's accepted
+    (TradeOffered, lambda event: (event.trade_offer.initiator, event.trade_offer.recipient, NO_SPACE,
+                                  event.trade_offer.initiator_bundle.money, event.trade_offer.recipient_bundle.money)),
+    (TradeAccepted, lambda event: (event.initiator, event.recipient, NO_SPACE, 0, 0)),
+    (TradeDeclined, lambda event: (event.initiator, event.recipient, NO_SPACE, 0, 0)),
+    (PropertyTraded, lambda event: (event.player, event.recipient, get_space(event.location), 0, 0)),
+    (GameOver, lambda event: (event.loser or 0, 0, NO_SPACE, event.turns, event.max_turns or 0)),
+]
+EVENT_IDS = {event_type: i for i, (event_type, _) in enumerate(EVENT_TYPES)}
+EVENT_NAMES = [event_type.__name__ for event_type, _ in EVENT_TYPES]
+
+
+class GameLogWriter(Sink):
+    # event sink that appends every event to a binary log. the game index moves on after each GameOver,
+    # so one writer can be installed for a whole batch of games. first_game: index of the first game
+    # written; by default it carries on from the last game already in the log
+    def __init__(self, path, first_game=None):
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        if new_file:
+            self.file = open(path, "wb")
+            self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+            last_game = -1
+        else:
+            self.file = open(path, "r+b")
+            try:
+                read_header(self.file)
+                # drop a record cut off by a writer that didn't finish, so new records line up
+                end = HEADER.size + count_records(path) * RECORD.size
+                self.file.truncate(end)
+                last_game = -1
+                if end > HEADER.size:
+                    self.file.seek(end - RECORD.size)
+                    last_game = RECORD.unpack(self.file.read(RECORD.size))[0]
+                self.file.seek(end)
+            except Exception:
+                self.file.close()
+                raise
+        self.buffer = bytearray()
+        self.buffered = 0
+        self.game = first_game if first_game is not None else last_game + 1
+        self.turn = 0
+        self.records = 0
+
+    def handle(self, event):
+        event_type = type(event)
+        if event_type is TurnStarted:
+            self.turn += 1
+        player, other, space, value1, value2 = EVENT_TYPES[EVENT_IDS[event_type]][1](event)
+        self.buffer += RECORD.pack(self.game, self.turn, EVENT_IDS[event_type], player, other, space, value1, value2)
+        self.buffered += 1
+        self.records += 1
+        if event_type is GameOver:
+            self.game += 1
+            self.turn = 0
+        if self.buffered >= FLUSH_RECORDS:
+            self.flush()
+
+    def flush(self):
+        self.file.write(self.buffer)
+        self.file.flush()
+        self.buffer = bytearray()
+        self.buffered = 0
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+def read_header(file):
+    header = file.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError("not a game log")
+    magic, version, record_size = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError("not a game log")
+    if version != VERSION or record_size != RECORD.size:
+        raise ValueError(f"unsupported game log version {version}")
+
+# yields each record in the log in order, reading through a memory map (or plain reads with use_mmap
+# False) so only one chunk of records is unpacked at a time
+def read_log(path, use_mmap=True):
+    with open(path, "rb") as file:
+        read_header(file)
+        end = os.path.getsize(path)
+        end -= (end - HEADER.size) % RECORD.size # ignore a record cut off by a writer that didn't finish
+        if end <= HEADER.size:
+            return
+        chunk_size = READ_RECORDS * RECORD.size
+        if use_mmap:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    for start in range(HEADER.size, end, chunk_size):
+                        for values in RECORD.iter_unpack(view[start:min(start + chunk_size, end)]):
+                            yield LogRecord(*values)
+                finally:
+                    view.release()
+        else:
+            position = HEADER.size
+            while position < end:
+                chunk = file.read(min(chunk_size, end - position))
+                position += len(chunk)
+                for values in RECORD.iter_unpack(chunk):
+                    yield LogRecord(*values)
+
+def count_records(path):
+    return max(os.path.getsize(path) - HEADER.size, 0) // RECORD.size
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarise a binary game log")
+    parser.add_argument('log', help='Log written by `python board.py simulate --event-log FILE`')
+    args = parser.parse_args()
+
+    counts = Counter()
+    games = set()
+    for record in read_log(args.log):
+        counts[record.event] += 1
+        games.add(record.game)
+    print(f"Records: {sum(counts.values())} in {len(games)} games")
+    for event_id, count in sorted(counts.items()):
+        print(f"\t{EVENT_NAMES[event_id]}: {count}")
@@ -0,0 +1,285 @@
+import argparse
+import hashlib
+import json
+import os
+from enums import Colors, DeckType, LocationKeys, BUILDABLE_COLORS
+from cards import init_card_effects
+from board_spec import SPACES, BOARD_SPACES, PROPERTIES
+import events
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Landing probabilities from a Markov chain over (board space, doubles rolled this turn) plus one
+# state per turn left in jail. The stationary distribution gives the expected number of landings
+# on each space per turn, which is multiplied by rents to get the ai's income tables.
+
+NUM_SPACES = 40
+JAIL = NUM_SPACES # card/space destination meaning "sent to jail"
+VISITING_JAIL = 10
+JAIL_TURNS = 3
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "income_tables.json")
+
+_tables = {} # solved tables keyed by jail policy, shared by every ai player in the process
+
+
+class CardProbe():
+    # stands in for both the player and the board while a card's effect runs, recording where
+    # the card sends the player (None if they stay put)
+    def __init__(self, board_space):
+        self.board_space = board_space
+        self.destination = None
+        self.player_number = 0
+        self.players = [self]
+        self.properties = {}
+        self.goojf_cards = 0
+
+    def get_space(self, location_key):
+        return BOARD_SPACES[location_key]
+
+    def advance(self, player, space, double_if_owned=False):
+        self.destination = space
+
+    def land(self, player, space, double_if_owned=False):
+        self.destination = space
+
+    def send_to_jail(self, player):
+        self.destination = JAIL
+
+    def add_money(self, amount, other_actions=True):
+        pass
+
+    def charge(self, amount):
+        pass
+
+
+class BoardRules():
+    # the static facts the chain is built from, read off the board spec and the decks
+    def __init__(self, leave_jail_immediately=False):
+        self.space_names = [key.value for key in SPACES]
+        self.go_to_jail = [i for i, key in enumerate(SPACES) if key == LocationKeys.GO_TO_JAIL]
+        self.card_destinations = {} # board space -> list of destinations, one per card
+        for i, key in enumerate(SPACES):
+            if key == LocationKeys.CHANCE:
+                self.card_destinations[i] = self.probe_deck(DeckType.CHANCE, i)
+            elif key == LocationKeys.COMMUNITY_CHEST:
+                self.card_destinations[i] = self.probe_deck(DeckType.COMMUNITY_CHEST, i)
+        self.properties = {} # color -> list of (board space, rent row)
+        for space, key in enumerate(SPACES):
+            if key in PROPERTIES:
+                _, color, _, rent = PROPERTIES[key]
+                self.properties.setdefault(color, []).append((space, list(rent)))
+        self.leave_jail_immediately = leave_jail_immediately
+
+    def probe_deck(self, deck_type, board_space):
+        destinations = []
+        sinks = events.bus.sinks
+        events.bus.set_sinks([]) # the probe isn't a real player, so don't report what the cards do to it
+        try:
+            for effect in init_card_effects(deck_type):
+                probe = CardProbe(board_space)
+                effect(probe, probe)
+                destinations.append(probe.destination)
+        finally:
+            events.bus.set_sinks(sinks)
+        return destinations
+
+    def fingerprint(self):
+        rules = {
+            "spaces": self.space_names,
+            "go_to_jail": self.go_to_jail,
+            "cards": {str(space): destinations for space, destinations in self.card_destinations.items()},
+            "rents": {color.name: rows for color, rows in self.properties.items()},
+            "leave_jail_immediately": self.leave_jail_immediately,
+        }
+        return hashlib.sha1(json.dumps(rules, sort_keys=True).encode()).hexdigest()
+
+
+def dice_matrices():
+    # probability of moving from each space to each space with a non-double and with a double roll
+    non_doubles = np.zeros((NUM_SPACES, NUM_SPACES))
+    doubles = np.zeros((NUM_SPACES, NUM_SPACES))
+    spaces = np.arange(NUM_SPACES)
+    for die1 in range(1, 7):
+        for die2 in range(1, 7):
+            target = doubles if die1 == die2 else non_doubles
+            target[spaces, (spaces + die1 + die2) % NUM_SPACES] += 1 / 36
+    return non_doubles, doubles
+
+def resolution_matrices(rules):
+    # resolve[p, q]: chance that first landing on p leaves the player on q (q == JAIL for jail)
+    # landings[p, s]: expected landings on s caused by first landing on p, including p itself
+    resolve = np.zeros((NUM_SPACES, NUM_SPACES + 1))
+    landings = np.zeros((NUM_SPACES, NUM_SPACES))
+    done = set()
+
+    def resolve_space(space):
+        if space in done:
+            return
+        landings[space, space] = 1
+        if space in rules.go_to_jail:
+            resolve[space, JAIL] = 1
+        elif space in rules.card_destinations:
+            destinations = rules.card_destinations[space]
+            weight = 1 / len(destinations)
+            for destination in destinations:
+                if destination is None:
+                    resolve[space, space] += weight
+                elif destination == JAIL:
+                    resolve[space, JAIL] += weight
+                else:
+                    resolve_space(destination)
+                    resolve[space] += weight * resolve[destination]
+                    landings[space] += weight * landings[destination]
+        else:
+            resolve[space, space] = 1
+        done.add(space)
+
+    for space in range(NUM_SPACES):
+        resolve_space(space)
+    return resolve, landings
+
+def build_transition_matrix(rules):
+    # states 0-119 are (space, doubles so far this turn) as doubles * 40 + space; then one per jail turn left
+    num_moving = NUM_SPACES * 3
+    jail_states = [num_moving + i for i in range(JAIL_TURNS)] # jail_counter 3, 2, 1
+    num_states = num_moving + JAIL_TURNS
+    non_doubles, doubles = dice_matrices()
+    resolve, landings = resolution_matrices(rules)
+
+    transitions = np.zeros((num_states, num_states))
+    expected_landings = np.zeros((num_states, NUM_SPACES))
+
+    def add_moves(rows, move, next_doubles):
+        # spread the resolved end spaces of a move onto board states with the given doubles count, or jail
+        ends = move @ resolve
+        columns = slice(next_doubles * NUM_SPACES, (next_doubles + 1) * NUM_SPACES)
+        transitions[rows, columns] += ends[:, :NUM_SPACES]
+        transitions[rows, jail_states[0]] += ends[:, JAIL]
+
+    for rolled in range(3):
+        rows = slice(rolled * NUM_SPACES, (rolled + 1) * NUM_SPACES)
+        add_moves(rows, non_doubles, 0)
+        expected_landings[rows] += non_doubles @ landings
+        if rolled < 2:
+            add_moves(rows, doubles, rolled + 1)
+            expected_landings[rows] += doubles @ landings
+        else:
+            # third double in a row goes straight to jail without moving
+            transitions[rows, jail_states[0]] += doubles.sum(axis=1)
+
+    for turns_left, state in zip(range(JAIL_TURNS, 0, -1), jail_states):
+        # leaving jail never grants another roll, even on doubles
+        if rules.leave_jail_immediately or turns_left == 1:
+            move = (non_doubles + doubles)[VISITING_JAIL:VISITING_JAIL + 1]
+        else:
+            move = doubles[VISITING_JAIL:VISITING_JAIL + 1]
+            transitions[state, jail_states[JAIL_TURNS - turns_left + 1]] += non_doubles[VISITING_JAIL].sum()
+        add_moves(slice(state, state + 1), move, 0)
+        expected_landings[state] += (move @ landings)[0]
+
+    return transitions, expected_landings, jail_states
+
+def stationary_distribution(transitions):
+    # solve pi (P - I) = 0 with sum(pi) = 1 by replacing one balance equation with the normalisation
+    num_states = transitions.shape[0]
+    system = transitions.T - np.eye(num_states)
+    system[-1] = 1
+    rhs = np.zeros(num_states)
+    rhs[-1] = 1
+    return np.linalg.solve(system, rhs)
+
+def landing_probabilities(rules):
+    # expected landings on each space per turn (a turn can include several rolls and card moves)
+    transitions, expected_landings, jail_states = build_transition_matrix(rules)
+    distribution = stationary_distribution(transitions)
+    turn_starts = distribution[:NUM_SPACES].sum() + distribution[jail_states].sum()
+    return (distribution @ expected_landings) / turn_starts
+
+def expected_rents(rules, probabilities):
+    # expected rent per opponent turn for a whole color set at each house level (0 houses = doubled monopoly rent)
+    rents = {}
+    for color, properties in rules.properties.items():
+        spaces = [space for space, _ in properties]
+        rows = np.array([rent for _, rent in properties], dtype=float)
+        rows[:, 0] *= 2
+        rents[color] = probabilities[spaces] @ rows
+    return rents
+
+def marginal_income_table(rules, probabilities):
+    table = {}
+    for color, rents in expected_rents(rules, probabilities).items():
+        table[color] = [round(float(gain), 2) for gain in np.diff(rents)]
+    return table
+
+def solve_income_tables(rules):
+    probabilities = landing_probabilities(rules)
+    return {
+        "landing_probabilities": [float(p) for p in probabilities],
+        "marginal_income_gains": {color.name: gains for color, gains in marginal_income_table(rules, probabilities).items()},
+    }
+
+def read_cache(cache_path, fingerprint):
+    try:
+        with open(cache_path) as file:
+            return json.load(file).get(fingerprint)
+    except (OSError, ValueError):
+        return None
+
+def write_cache(cache_path, fingerprint, tables):
+    try:
+        with open(cache_path) as file:
+            cache = json.load(file)
+    except (OSError, ValueError):
+        cache = {}
+    cache[fingerprint] = tables
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path, "w") as file:
+            json.dump(cache, file)
+    except OSError:
+        pass # a read-only install just re-solves next time
+
+# tables for the given jail policy, from memory, then the disk cache, then solved with numpy.
+# returns None if they aren't cached and numpy isn't installed.
+def load_income_tables(leave_jail_immediately=False, cache_path=DEFAULT_CACHE_PATH):
+    if leave_jail_immediately in _tables:
+        return _tables[leave_jail_immediately]
+    rules = BoardRules(leave_jail_immediately)
+    fingerprint = rules.fingerprint()
+    tables = read_cache(cache_path, fingerprint) if cache_path else None
+    if tables is None:
+        if np is None:
+            return None
+        tables = solve_income_tables(rules)
+        if cache_path:
+            write_cache(cache_path, fingerprint, tables)
+    _tables[leave_jail_immediately] = tables
+    return tables
+
+# marginal income per opponent turn of each house (index 0 is the first house) for each buildable color
+def load_marginal_income_gains(leave_jail_immediately=False, cache_path=DEFAULT_CACHE_PATH):
+    tables = load_income_tables(leave_jail_immediately, cache_path)
+    if tables is None:
+        return None
+    return {Colors[name]: gains for name, gains in tables["marginal_income_gains"].items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve landing probabilities and ai income tables")
+    parser.add_argument('-l', '--leave-jail', help='Model players leaving jail immediately instead of staying', action="store_true")
+    parser.add_argument('-n', '--no-cache', help='Solve without reading or writing the disk cache', action="store_true")
+    args = parser.parse_args()
+
+    tables = load_income_tables(args.leave_jail, None if args.no_cache else DEFAULT_CACHE_PATH)
+    if tables is None:
+        print("numpy is required to solve the income tables")
+    else:
+        rules = BoardRules(args.leave_jail)
+        print("Landings per turn:")
+        for name, probability in zip(rules.space_names, tables["landing_probabilities"]):
+            print(f"\t{name}: {probability * 100:.2f}%")
+        print("Marginal income per house:")
+        for color in BUILDABLE_COLORS:
+            print(f"\t{color.name}: {tables['marginal_income_gains'][color.name]}")
@@ -0,0 +1,218 @@
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from aiplayer import AIPlayer
+from player import TradeOffer
+from board_spec import COLOR_SPACES
+from compact_state import CompactState, get_board_tables
+import settings
+import events
+import profiling
+
+# An ai that settles trades, auction bids and building by Monte Carlo rollouts. Each candidate is
+# applied to a CompactState copy of the game, and each rollout loads that state into a fresh headless
+# game of regular ai players, plays it on for a few rounds with its own dice, and scores this player's
+# share of the total worth at the end (0 if it went bankrupt). Candidates are picked for rollouts by
+# UCB1, so the promising ones get most of the budget, and the candidate with the best average wins.
+# The budget is a rollout count, a time limit, or both; rollouts can be spread over a process pool.
+# Buying, mortgaging and jail are left to AIPlayer.
+
+BID_FRACTIONS = (0.5, 0.75, 1, 1.25, 1.5) # of the property's cost, as the prices tried in an auction
+
+
+# plays a headless game on from state for up to turns turns, starting with the player after
+# player_i, and returns player_i's share of the total worth at the end
+def run_rollout(state, player_i, turns, trade_threshold, seed):
+    from board import Game, create_ai_players
+    headless, sinks = settings.headless, events.bus.sinks
+    settings.headless = True
+    events.bus.set_sinks([])
+    try:
+        with profiling.suspend(): # a rollout isn't one of the games being profiled
+            players, trade_matrix = create_ai_players(len(state.cash), trade_threshold)
+            game = Game(players, trade_matrix, seed)
+            state.apply_to(game.board)
+            game.curr_player_i = player_i
+            result = game.play(turns)
+    finally:
+        settings.headless = headless
+        events.bus.set_sinks(sinks)
+    if result.loser == player_i + 1:
+        return 0
+    worths = [max(worth, 0) for worth in result.worths.values()]
+    return max(result.worths[player_i + 1], 0) / max(sum(worths), 1)
+
+
+class MCTSPlayer(AIPlayer):
+    # rollouts: most rollouts per decision; time_budget: most seconds per decision (either can be None,
+    # but not both). rollout_turns: player turns each rollout plays. workers: size of a process pool to
+    # run rollouts on, or None to run them in this process. seed: seeds the rollouts' dice
+    def __init__(self, player_number, token, trade_threshold=1000, rollouts=64, time_budget=None, rollout_turns=40,
+                 exploration=0.1, workers=None, seed=None):
+        super().__init__(player_number, token, trade_threshold)
+        if rollouts is None and time_budget is None:
+            raise ValueError("MCTSPlayer needs a rollout count or a time budget")
+        self.rollouts = rollouts
+        self.time_budget = time_budget
+        self.rollout_turns = rollout_turns
+        self.exploration = exploration
+        self.workers = workers
+        self.executor = None
+        self.rng = random.Random(seed if seed is not None else player_number)
+        self.bid_limit = None # highest price to pay in the auction under way, None between auctions
+        self.searches = 0
+        self.total_rollouts = 0
+
+    # shuts down the rollout pool, if one was started
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    """
+    Decisions
+    """
+    def will_accept_trade_offer(self, trade_offer: TradeOffer):
+        # check if money exchange would cause bankruptcy
+        if self.money + trade_offer.initiator_bundle.money - trade_offer.recipient_bundle.money < 0:
+            return False
+        state = self.get_state()
+        return self.choose([(False, state), (True, self.apply_trade(state.copy(), trade_offer))])
+
+    def will_propose_trade_offer(self, trade_offer: TradeOffer):
+        state = self.get_state()
+        return self.choose([(False, state), (True, self.apply_trade(state.copy(), trade_offer))])
+
+    def decide_bid(self, property, current_bid):
+        if self.bid_limit is None:
+            # a new auction: work out once how high to go
+            self.bid_limit = self.decide_bid_limit(property, current_bid)
+        bid = current_bid + 10
+        return bid if bid <= self.bid_limit and bid <= self.money else 0
+
+    def end_auction(self, property):
+        self.bid_limit = None
+
+    # the highest of a few prices at which winning the property does at least as well as dropping out,
+    # which leaves it unowned in the rollouts. 0 if none do
+    def decide_bid_limit(self, property, current_bid):
+        prices = set(price for price in (int(round(property.cost * fraction, -1)) for fraction in BID_FRACTIONS) if current_bid < price <= self.money)
+        if current_bid + 10 <= self.money:
+            prices.add(current_bid + 10)
+        if len(prices) == 0:
+            return 0
+        state = self.get_state()
+        me = self.player_number - 1
+        options = [(0, state)]
+        for price in sorted(prices):
+            won = state.copy()
+            won.owners[property.board_space] = me + 1
+            won.cash[me] -= price
+            options.append((price, won))
+        means = self.search(options)
+        return max((price for (price, _), mean in zip(options, means) if mean >= means[0]), default=0)
+
+    def resolve_development(self):
+        if self.money < 200 or len(self.get_buildable_colors()) == 0:
+            return
+        state = self.get_state()
+        me = self.player_number - 1
+        tables = get_board_tables()
+        options = [(None, state)]
+        for color in self.get_buildable_colors():
+            spaces = COLOR_SPACES[color]
+            if any(state.mortgaged[space] for space in spaces):
+                continue
+            round_cost = tables.build_costs[spaces[0]] * len(spaces)
+            built = state
+            for rounds in range(1, 6 - max(state.houses[space] for space in spaces)):
+                if round_cost * rounds > state.cash[me]:
+                    break
+                built = built.copy()
+                for space in spaces:
+                    built.houses[space] += 1
+                built.cash[me] -= round_cost
+                options.append(((color, rounds), built))
+        if len(options) == 1:
+            return
+        choice = self.choose(options)
+        if choice is None:
+            return
+        color, rounds = choice
+        for _ in range(rounds):
+            for property in self.properties_by_set[color]:
+                property.build_house()
+
+    """
+    Search
+    """
+    # the state of the game as this player sees it; players are indexed by player number - 1
+    def get_state(self):
+        players = [self.trade_matrix.players[number] for number in sorted(self.trade_matrix.players)]
+        return CompactState.from_players(players)
+
+    def apply_trade(self, state, trade_offer: TradeOffer):
+        initiator = trade_offer.initiator - 1
+        recipient = trade_offer.recipient - 1
+        offered = trade_offer.initiator_bundle
+        requested = trade_offer.recipient_bundle
+        for property in offered.properties:
+            state.owners[property.board_space] = recipient + 1
+        for property in requested.properties:
+            state.owners[property.board_space] = initiator + 1
+        state.cash[initiator] += requested.money - offered.money
+        state.cash[recipient] += offered.money - requested.money
+        state.goojf_cards[initiator] += requested.num_goojf_cards - offered.num_goojf_cards
+        state.goojf_cards[recipient] += offered.num_goojf_cards - requested.num_goojf_cards
+        return state
+
+    # options: (choice, state after making it) pairs. returns the choice with the best average rollout
+    def choose(self, options):
+        means = self.search(options)
+        return options[means.index(max(means))][0]
+
+    # runs rollouts from the options' states, picking an option for each by UCB1, until the rollout
+    # count or time budget is spent. returns each option's average reward (-1 if it was never tried)
+    def search(self, options):
+        deadline = None if self.time_budget is None else time.perf_counter() + self.time_budget
+        counts = [0] * len(options)
+        totals = [0.0] * len(options)
+        batch_size = self.workers or 1
+        player_i = self.player_number - 1
+        rollouts = 0
+        while (self.rollouts is None or rollouts < self.rollouts) and (deadline is None or time.perf_counter() < deadline):
+            batch = []
+            pending = list(counts)
+            for _ in range(batch_size if self.rollouts is None else min(batch_size, self.rollouts - rollouts)):
+                i = self.select(pending, totals, rollouts + len(batch))
+                pending[i] += 1
+                batch.append(i)
+            seeds = [self.rng.randrange(2**32) for _ in batch]
+            if self.workers is None:
+                rewards = [run_rollout(options[i][1], player_i, self.rollout_turns, self.trade_threshold, seed) for i, seed in zip(batch, seeds)]
+            else:
+                if self.executor is None:
+                    self.executor = ProcessPoolExecutor(max_workers=self.workers)
+                futures = [self.executor.submit(run_rollout, options[i][1], player_i, self.rollout_turns, self.trade_threshold, seed) for i, seed in zip(batch, seeds)]
+                rewards = [future.result() for future in futures]
+            for i, reward in zip(batch, rewards):
+                counts[i] += 1
+                totals[i] += reward
+            rollouts += len(batch)
+        self.searches += 1
+        self.total_rollouts += rollouts
+        return [totals[i] / counts[i] if counts[i] > 0 else -1 for i in range(len(options))]
+
+    # UCB1: try every option once, then the one with the best average plus exploration bonus
+    def select(self, counts, totals, rollouts):
+        best = 0
+        best_score = -float('inf')
+        for i, count in enumerate(counts):
+            if count == 0:
+                return i
+            score = totals[i] / count + self.exploration * math.sqrt(math.log(rollouts) / count)
+            if score > best_score:
+                best = i
+                best_score = score
+        return best
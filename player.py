@@ -1,9 +1,10 @@
-import time
 from collections import defaultdict
 from abc import abstractmethod
 from enums import Colors, OwnershipDegree
+from board_spec import OWNERSHIP_DEGREES, COLOR_MASKS
+from transposition import property_bit
 from trade_matrix import TradeMatrix, TradeOffer
-import settings
+from events import emit, MoneyLost, MoneyGained
 
 class Player():
     def __init__(self, player_number, token):
@@ -14,8 +15,20 @@ class Player():
         self.properties = {} # keyed by property names
         self.properties_by_set = defaultdict(list)
         self.mortgaged_property_names = set()
+        # the same holdings as masks of board spaces (see transposition.py), for set checks without walking lists
+        self.owned_mask = 0
+        self.mortgaged_mask = 0
+        self.developed_mask = 0 # properties with houses on them
+        # running totals over the player's real estate, recounted a color at a time as it changes (see refresh_ledger)
+        self.real_estate_worth = 0 # what the real estate adds to calculate_total_worth
+        self.house_sale_value = 0 # money from selling every house
+        self.mortgage_yields = defaultdict(int) # OwnershipDegree -> mortgage value of unmortgaged properties without houses, in colors owned to that degree
+        self.ledger_colors = {} # color -> (worth, house sale value, degree, mortgage yield, properties making up that yield) it adds to the totals
         self.goojf_cards = 0
         self.jail_counter = 0
+        self.defer_decisions = False # set by games that run one decision pass per turn (see Game)
+        self.decisions_pending = False # gained money or real estate since the last pass, when decisions are deferred
+        self.trade_pending = False # and at least one of those gains allowed trading
 
     def set_trade_matrix(self, trade_matrix: TradeMatrix):
         self.trade_matrix = trade_matrix
@@ -25,39 +38,61 @@ class Player():
             return
         self.decide_mortgage(amount)
         self.money -= amount
-        print(f"Player {self.player_number} loses ${amount} (${self.money})")
-        if not settings.fast:
-            time.sleep(0.5)
+        emit(MoneyLost, self.player_number, amount, self.money)
     
     def add_money(self, amount, other_actions=True):
         self.money += amount
-        print(f"Player {self.player_number} gains ${amount} (${self.money})")
-        if not settings.fast:
-            time.sleep(0.5)
+        emit(MoneyGained, self.player_number, amount, self.money)
         
         if other_actions:
-            self.decide_trade()
-            self.decide_unmortgage()
-            self.resolve_development()
+            self.make_decisions()
     
-    def calculate_total_worth(self):    
-        total = self.money
-        for property in self.properties.values():
-            if property.is_mortgaged:
-                total += property.mortgage_amount
-            else:
-                total += property.cost
-                if property.can_develop:
-                    total += property.num_houses * property.build_cost
-        return total
+    def calculate_total_worth(self):
+        return self.money + self.real_estate_worth
+
+    # mortgage value of the unmortgaged properties without houses in colors owned to at most max_degree
+    def get_mortgage_yield(self, max_degree):
+        return sum(amount for degree, amount in self.mortgage_yields.items() if degree.value <= max_degree.value)
+
+    # the properties making up get_mortgage_yield(max_degree), sorted like the mortgage planner sorts them
+    def get_mortgageable_properties(self, max_degree):
+        properties = []
+        for _, _, degree, _, mortgageable in self.ledger_colors.values():
+            if degree.value <= max_degree.value:
+                properties.extend(mortgageable)
+        return sorted(properties)
 
     def gain_real_estate(self, property, can_trade=True):
         property.owner = self
         self.properties[property.name] = property
         self.properties_by_set[property.color].append(property)
+        self.owned_mask |= property_bit(property)
         if property.is_mortgaged:
             self.mortgaged_property_names.add(property.name)
-            
+            self.mortgaged_mask |= property_bit(property)
+        if property.can_develop and property.num_houses > 0: # the ai's own trade offers don't check for houses
+            self.developed_mask |= property_bit(property)
+        self.trade_matrix.refresh_color(self.player_number, property.color)
+        self.refresh_ledger(property.color)
+        self.make_decisions(can_trade)
+
+    # the decisions that follow gaining money or real estate. when decisions are deferred they're
+    # only marked as pending, for the game to run once at the end of the turn
+    def make_decisions(self, can_trade=True):
+        if self.defer_decisions:
+            self.decisions_pending = True
+            self.trade_pending = self.trade_pending or can_trade
+            return
+        if can_trade:
+            self.decide_trade()
+        self.decide_unmortgage()
+        self.resolve_development()
+
+    # one pass over everything marked as pending since the last one
+    def run_pending_decisions(self):
+        can_trade = self.trade_pending
+        self.decisions_pending = False
+        self.trade_pending = False
         if can_trade:
             self.decide_trade()
         self.decide_unmortgage()
@@ -69,37 +104,72 @@ class Player():
             self.mortgaged_property_names.remove(property.name)
         del self.properties[property.name]
         self.properties_by_set[property.color].remove(property)
+        self.owned_mask &= ~property_bit(property)
+        self.mortgaged_mask &= ~property_bit(property)
+        self.developed_mask &= ~property_bit(property)
+        self.trade_matrix.refresh_color(self.player_number, property.color)
+        self.refresh_ledger(property.color)
+
+    # recompute the masks and ledger after properties, properties_by_set and mortgaged_property_names are replaced wholesale
+    def rebuild_masks(self):
+        self.owned_mask = 0
+        self.mortgaged_mask = 0
+        self.developed_mask = 0
+        for property in self.properties.values():
+            self.owned_mask |= property_bit(property)
+            if property.is_mortgaged:
+                self.mortgaged_mask |= property_bit(property)
+            if property.can_develop and property.num_houses > 0:
+                self.developed_mask |= property_bit(property)
+        self.real_estate_worth = 0
+        self.house_sale_value = 0
+        self.mortgage_yields.clear()
+        self.ledger_colors.clear()
+        for color in list(self.properties_by_set.keys()):
+            self.refresh_ledger(color)
+
+    # recount one color's share of the ledger after its properties, mortgages or houses change
+    def refresh_ledger(self, color):
+        worth, house_sale_value, degree, mortgage_yield, _ = self.ledger_colors.pop(color, (0, 0, None, 0, None))
+        self.real_estate_worth -= worth
+        self.house_sale_value -= house_sale_value
+        if degree is not None:
+            self.mortgage_yields[degree] -= mortgage_yield
+        properties = self.properties_by_set.get(color) # get, so colors the player doesn't own aren't added as keys
+        if not properties:
+            return
+        worth = 0
+        house_sale_value = 0
+        mortgage_yield = 0
+        mortgageable = []
+        for property in properties:
+            if property.is_mortgaged:
+                worth += property.mortgage_amount
+            elif property.can_develop and property.num_houses > 0:
+                worth += property.cost + property.num_houses * property.build_cost
+                house_sale_value += property.num_houses * (property.build_cost // 2)
+            else:
+                worth += property.cost
+                mortgage_yield += property.mortgage_amount
+                mortgageable.append(property)
+        degree = self.get_degree_of_ownership(color)
+        self.real_estate_worth += worth
+        self.house_sale_value += house_sale_value
+        self.mortgage_yields[degree] += mortgage_yield
+        self.ledger_colors[color] = (worth, house_sale_value, degree, mortgage_yield, mortgageable)
 
     def has_full_set(self, color: Colors):
-        return self.get_degree_of_ownership(color) == OwnershipDegree.MONOPOLY
+        return self.owned_mask & COLOR_MASKS[color] == COLOR_MASKS[color]
     
     def get_degree_of_ownership(self, color: Colors, modifier=0):
-        monopoly_num = 3
-        if color == Colors.BROWN or color == Colors.DARKBLUE or color == Colors.UTILITY:
-            monopoly_num -= 1
-        if color == Colors.RR:
-            monopoly_num += 1
-
-        num_properties = len(self.properties_by_set[color]) + modifier
-        if num_properties == monopoly_num:
-            return OwnershipDegree.MONOPOLY
-        elif num_properties == monopoly_num - 1:
-            # don't treat utility as almost monopoly
-            if color == Colors.UTILITY:
-                return OwnershipDegree.ONE
-            return OwnershipDegree.ALMOST_MONOPOLY
-        elif num_properties == 0:
-            return OwnershipDegree.NONE
-        else:
-            return OwnershipDegree.ONE
+        degrees = OWNERSHIP_DEGREES[color]
+        num_properties = (self.owned_mask & COLOR_MASKS[color]).bit_count() + modifier
+        if 0 <= num_properties < len(degrees):
+            return degrees[num_properties]
+        return OwnershipDegree.ONE
             
     def get_buildable_colors(self):
-        colors = self.trade_matrix.get_colors()
-        buildable_colors = []
-        for color in colors:
-            if self.has_full_set(color):
-                buildable_colors.append(color)
-        return buildable_colors
+        return self.trade_matrix.get_buildable_colors(self.player_number)
     
     # def get_full_sets(self):
     #     sets = self.get_buildable_colors()
@@ -109,6 +179,10 @@ class Player():
     #             sets.append(set)
     #     return sets
     
+    # called on every player once an auction is over, whether or not anyone bid
+    def end_auction(self, property):
+        pass
+
     @abstractmethod
     def decide_mortgage(self, amount):
         # player decides which properties to mortgage and which houses to sell
@@ -0,0 +1,224 @@
+import json
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+
+# Opt-in instrumentation for finding where a game's time goes without an external profiler.
+# enable() wraps the decision methods of every player class, the ai's *_recurse search methods,
+# Board.perform_auction and Game.step with counting versions, and disable() puts the originals back,
+# so nothing is checked or counted while profiling is off. Decision times include anything the
+# decision sets off, e.g. a trade's recipient deciding whether to accept or to build. Games played
+# inside a suspend() block, like the mcts ai's rollouts, aren't counted as games, turns or decisions,
+# though their time still counts towards the decision that played them.
+
+# decision type -> method, on the player classes unless it's a Board method
+DECISIONS = {
+    "purchase": "decide_purchase",
+    "bid": "decide_bid",
+    "auction": "perform_auction",
+    "trade": "decide_trade",
+    "accept_trade": "will_accept_trade_offer",
+    "mortgage": "decide_mortgage",
+    "unmortgage": "decide_unmortgage",
+    "develop": "resolve_development",
+    "jail": "will_get_out_of_jail",
+}
+BOARD_DECISIONS = ("auction",)
+RECURSE_SUFFIX = "_recurse"
+TURN_BUCKETS_MS = (0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000) # upper edges of the turn latency histogram
+
+_active = None # (profile, [(class, name, original method)]) while enabled
+_suspended = 0 # how many suspend() blocks are open; the hooks pass straight through while any are
+
+
+class Profile():
+    def __init__(self):
+        self.calls = defaultdict(int) # decision type -> calls
+        self.seconds = defaultdict(float) # decision type -> wall time
+        self.nodes = defaultdict(int) # *_recurse method -> calls
+        self.turn_counts = [0] * (len(TURN_BUCKETS_MS) + 1) # last bucket is anything slower
+        self.turns = 0
+        self.turn_seconds = 0.0
+        self.max_turn_seconds = 0.0
+        self.games = 0
+        self.worth_hits = 0 # property worth cache lookups over the profiled games (see trade_matrix.WorthCache)
+        self.worth_misses = 0
+
+    def add_turn(self, seconds):
+        self.turns += 1
+        self.turn_seconds += seconds
+        self.max_turn_seconds = max(self.max_turn_seconds, seconds)
+        self.turn_counts[bisect_left(TURN_BUCKETS_MS, seconds * 1000)] += 1
+
+    # adds in another profile, or one's to_dict(), e.g. from a tournament worker
+    def merge(self, other):
+        if isinstance(other, Profile):
+            other = other.to_dict()
+        for decision, stats in other["decisions"].items():
+            self.calls[decision] += stats["calls"]
+            self.seconds[decision] += stats["seconds"]
+        for method, nodes in other["nodes"].items():
+            self.nodes[method] += nodes
+        turns = other["turns"]
+        self.turns += turns["count"]
+        self.turn_seconds += turns["seconds"]
+        self.max_turn_seconds = max(self.max_turn_seconds, turns["max_ms"] / 1000)
+        for i, count in enumerate(turns["histogram"].values()):
+            self.turn_counts[i] += count
+        self.games += other["games"]
+        self.worth_hits += other["worth_cache"]["hits"]
+        self.worth_misses += other["worth_cache"]["misses"]
+
+    def to_dict(self):
+        labels = [f"<={edge}ms" for edge in TURN_BUCKETS_MS] + [f">{TURN_BUCKETS_MS[-1]}ms"]
+        return {
+            "games": self.games,
+            "decisions": {decision: {
+                "calls": self.calls[decision],
+                "seconds": self.seconds[decision],
+                "mean_ms": self.seconds[decision] / self.calls[decision] * 1000,
+            } for decision in sorted(self.calls)},
+            "nodes": dict(sorted(self.nodes.items())),
+            "turns": {
+                "count": self.turns,
+                "seconds": self.turn_seconds,
+                "mean_ms": self.turn_seconds / max(self.turns, 1) * 1000,
+                "max_ms": self.max_turn_seconds * 1000,
+                "histogram": dict(zip(labels, self.turn_counts)),
+            },
+            "worth_cache": {
+                "hits": self.worth_hits,
+                "misses": self.worth_misses,
+                "hit_rate": self.worth_hits / max(self.worth_hits + self.worth_misses, 1),
+            },
+        }
+
+    def to_json(self, indent=4):
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def print_report(self):
+        report = self.to_dict()
+        print(f"{'decision':<14} {'calls':>9} {'total (s)':>10} {'mean (ms)':>10}")
+        for decision, stats in report["decisions"].items():
+            print(f"{decision:<14} {stats['calls']:>9} {stats['seconds']:10.3f} {stats['mean_ms']:10.4f}")
+        for method, nodes in report["nodes"].items():
+            print(f"{method}: {nodes} nodes")
+        turns = report["turns"]
+        print(f"Turns: {turns['count']} over {self.games} games, mean {turns['mean_ms']:.3f}ms, max {turns['max_ms']:.3f}ms")
+        for label, count in turns["histogram"].items():
+            if count > 0:
+                print(f"\t{label}: {count}")
+        print(f"Property worth cache: {self.worth_hits} hits, {self.worth_misses} misses ({report['worth_cache']['hit_rate']:.1%} hit rate)")
+
+
+def time_decision(profile, decision, method):
+    @wraps(method)
+    def timed(*args, **kwargs):
+        if _suspended:
+            return method(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            profile.seconds[decision] += time.perf_counter() - start
+            profile.calls[decision] += 1
+    return timed
+
+def count_nodes(profile, name, method):
+    @wraps(method)
+    def counted(*args, **kwargs):
+        if _suspended:
+            return method(*args, **kwargs)
+        profile.nodes[name] += 1
+        return method(*args, **kwargs)
+    return counted
+
+# a turn runs from the step that starts it to the step that starts the next one (or the end of the game)
+def time_turns(profile, step, finish):
+    turn_seconds = {} # game -> seconds spent in the steps of its current turn so far
+
+    @wraps(step)
+    def timed_step(game):
+        if _suspended:
+            return step(game)
+        if game.is_turn_over() and game in turn_seconds:
+            profile.add_turn(turn_seconds.pop(game))
+        start = time.perf_counter()
+        try:
+            return step(game)
+        finally:
+            turn_seconds[game] = turn_seconds.get(game, 0.0) + time.perf_counter() - start
+
+    @wraps(finish)
+    def timed_finish(game, *args, **kwargs):
+        if _suspended:
+            return finish(game, *args, **kwargs)
+        if game in turn_seconds:
+            profile.add_turn(turn_seconds.pop(game))
+        profile.games += 1
+        profile.worth_hits += game.trade_matrix.worth_cache.hits
+        profile.worth_misses += game.trade_matrix.worth_cache.misses
+        return finish(game, *args, **kwargs)
+
+    return timed_step, timed_finish
+
+def get_player_classes():
+    from player import Player
+    classes = [Player]
+    for cls in classes:
+        classes.extend(cls.__subclasses__())
+    return classes
+
+# starts counting into profile (a new one by default) and returns it
+def enable(profile=None):
+    global _active
+    from board import Board, Game
+    disable()
+    profile = profile or Profile()
+    patched = []
+
+    def patch(cls, name, replacement):
+        patched.append((cls, name, cls.__dict__[name]))
+        setattr(cls, name, replacement)
+
+    for cls in get_player_classes():
+        for name, method in list(cls.__dict__.items()):
+            if name.endswith(RECURSE_SUFFIX) and callable(method):
+                patch(cls, name, count_nodes(profile, name, method))
+        for decision, name in DECISIONS.items():
+            if decision not in BOARD_DECISIONS and name in cls.__dict__:
+                patch(cls, name, time_decision(profile, decision, cls.__dict__[name]))
+    for decision in BOARD_DECISIONS:
+        name = DECISIONS[decision]
+        patch(Board, name, time_decision(profile, decision, Board.__dict__[name]))
+    timed_step, timed_finish = time_turns(profile, Game.__dict__["step"], Game.__dict__["finish"])
+    patch(Game, "step", timed_step)
+    patch(Game, "finish", timed_finish)
+    _active = (profile, patched)
+    return profile
+
+# stops counting and returns the profile that was being counted into, if any
+def disable():
+    global _active
+    if _active is None:
+        return None
+    profile, patched = _active
+    for cls, name, original in reversed(patched):
+        setattr(cls, name, original)
+    _active = None
+    return profile
+
+def is_enabled():
+    return _active is not None
+
+# leaves whatever runs inside the block out of the profile, e.g. games played out inside a decision
+@contextmanager
+def suspend():
+    global _suspended
+    _suspended += 1
+    try:
+        yield
+    finally:
+        _suspended -= 1
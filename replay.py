@@ -0,0 +1,99 @@
+import argparse
+import json
+import settings
+import events
+from board import Game, create_players
+
+# A replay log is everything needed to re-run a game: a json header line with the seed and the
+# players, then one json line per answer a human typed, in the order they were asked. The ai players
+# and the seeded dice and decks are deterministic, so feeding the answers back reproduces the game
+# exactly, with no prompts, printing or pauses. Lines are appended as the game goes, so a log is
+# usable even if the game never finished.
+
+
+class ReplayLogExhausted(Exception):
+    pass
+
+
+class ReplayLog():
+    def __init__(self, seed, player_kinds, answers=None):
+        self.seed = seed
+        self.player_kinds = [tuple(kind) for kind in player_kinds] # ("human" or "ai", token) in turn order
+        self.answers = answers if answers is not None else []
+        self.file = None
+
+    # starts a log at path and records every answer given through settings.prompt until closed
+    @classmethod
+    def record(cls, path, seed, player_kinds):
+        log = cls(seed, player_kinds)
+        log.file = open(path, "w")
+        log.file.write(json.dumps({"seed": seed, "players": log.player_kinds}) + "\n")
+        log.file.flush()
+        settings.input_recorders.append(log.add_answer)
+        return log
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as file:
+            header = json.loads(file.readline())
+            answers = [json.loads(line) for line in file if line.strip()]
+        return cls(header["seed"], header["players"], answers)
+
+    def add_answer(self, answer):
+        self.answers.append(answer)
+        if self.file is not None:
+            self.file.write(json.dumps(answer) + "\n")
+            self.file.flush()
+
+    def close(self):
+        if self.add_answer in settings.input_recorders:
+            settings.input_recorders.remove(self.add_answer)
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    # re-runs the game headlessly. until_turn: stop once that many turns have been played, to inspect the
+    # game at that point; otherwise it runs to the end (or max_turns). raises ReplayLogExhausted if the
+    # game asks for more answers than were recorded
+    def replay(self, until_turn=None, max_turns=None):
+        answers = iter(self.answers)
+        def next_answer(text):
+            try:
+                return next(answers)
+            except StopIteration:
+                raise ReplayLogExhausted(f"the log ran out of answers at turn {game.turns}")
+
+        headless, input_source, sinks = settings.headless, settings.input_source, events.bus.sinks
+        settings.headless = True
+        settings.input_source = next_answer
+        events.bus.set_sinks([])
+        try:
+            players, trade_matrix = create_players(self.player_kinds)
+            game = Game(players, trade_matrix, self.seed)
+            while not game.is_over:
+                if game.is_turn_over():
+                    if until_turn is not None and game.turns >= until_turn:
+                        break
+                    if max_turns is not None and game.turns >= max_turns:
+                        break
+                game.step()
+        finally:
+            settings.headless = headless
+            settings.input_source = input_source
+            events.bus.set_sinks(sinks)
+        return game
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-run a recorded game and show where it got to")
+    parser.add_argument('log', help='Replay log written by `python board.py N H --record FILE`')
+    parser.add_argument('-t', '--turn', type=int, default=None, help='Stop after this many turns instead of playing to the end')
+    args = parser.parse_args()
+
+    game = ReplayLog.load(args.log).replay(args.turn)
+    settings.fast = True
+    if game.is_over:
+        game.finish()
+    else:
+        settings.display(f"After turn {game.turns}:")
+        game.print_game_state()
@@ -1,3 +1,27 @@
+import time
+
+fast = False
+headless = False # no prompts, printing or pauses; used for ai-only simulations
+input_source = None # answers prompts instead of the keyboard, e.g. when replaying a log
+input_recorders = [] # called with every answer, e.g. to append it to a replay log
+
 def init():
-    global fast
-    fast = False
\ No newline at end of file
+    global fast, headless, input_source
+    fast = False
+    headless = False
+    input_source = None
+    input_recorders.clear()
+
+# asks a human player for a decision
+def prompt(text):
+    answer = input_source(text) if input_source is not None else input(text)
+    for recorder in input_recorders:
+        recorder(answer)
+    return answer
+
+def display(text, pace=True):
+    if headless:
+        return
+    print(text)
+    if pace and not fast:
+        time.sleep(0.5)
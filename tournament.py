@@ -0,0 +1,146 @@
+import argparse
+import json
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+import board
+import profiling
+
+SHARDS_PER_WORKER = 4 # more shards than workers keeps the pool busy when game lengths vary
+
+
+class TournamentConfig():
+    def __init__(self, num_players=4, trade_threshold=1000, max_turns=board.SIMULATION_MAX_TURNS, deferred_decisions=False):
+        self.num_players = num_players
+        self.trade_threshold = trade_threshold
+        self.max_turns = max_turns
+        self.deferred_decisions = deferred_decisions # see board.Game
+
+
+class TournamentReport():
+    def __init__(self, config, seed):
+        self.config = config
+        self.seed = seed
+        self.games = 0
+        self.unfinished = 0 # games that hit the turn limit
+        self.total_turns = 0
+        self.wins = defaultdict(int)
+        self.losses = defaultdict(int)
+        self.total_worths = defaultdict(int)
+        self.elapsed = 0
+        self.profile = None # profiling.Profile merged from every shard, if the tournament was profiled
+
+    def add_result(self, result):
+        self.games += 1
+        self.total_turns += result.turns
+        self.wins[result.winner] += 1
+        if result.loser is None:
+            self.unfinished += 1
+        else:
+            self.losses[result.loser] += 1
+        for player_number, worth in result.worths.items():
+            self.total_worths[player_number] += worth
+
+    def merge(self, results):
+        for result in results:
+            self.add_result(result)
+
+    def to_dict(self):
+        games = max(self.games, 1)
+        report = {
+            "seed": self.seed,
+            "num_players": self.config.num_players,
+            "trade_threshold": self.config.trade_threshold,
+            "max_turns": self.config.max_turns,
+            "deferred_decisions": self.config.deferred_decisions,
+            "games": self.games,
+            "unfinished": self.unfinished,
+            "wins": dict(sorted(self.wins.items())),
+            "losses": dict(sorted(self.losses.items())),
+            "average_turns": self.total_turns / games,
+            "average_worths": {player_number: worth / games for player_number, worth in sorted(self.total_worths.items())},
+            "elapsed": self.elapsed,
+            "games_per_second": self.games / max(self.elapsed, 1e-9),
+            "turns_per_second": self.total_turns / max(self.elapsed, 1e-9),
+        }
+        if self.profile is not None:
+            report["profile"] = self.profile.to_dict()
+        return report
+
+    def print_report(self):
+        report = self.to_dict()
+        print(f"Games: {self.games} ({self.unfinished} hit the turn limit), seed {self.seed}")
+        for player_number in range(1, self.config.num_players + 1):
+            print(f"Player {player_number}: {self.wins[player_number]} wins, {self.losses[player_number]} losses, average worth ${report['average_worths'].get(player_number, 0):.0f}")
+        print(f"Average turns: {report['average_turns']:.1f}")
+        print(f"Elapsed: {self.elapsed:.2f}s ({report['games_per_second']:.2f} games/s, {report['turns_per_second']:.1f} turns/s)")
+
+
+# each game is seeded from the tournament seed and its own index, so results don't depend on
+# how the games were sharded or how many workers ran them
+def game_seed(seed, game_index):
+    return f"{seed}:{game_index}"
+
+# returns the shard's results, and its profile as a dict if profile is set (None otherwise)
+def run_shard(config, seed, game_indices, profile=False):
+    if profile:
+        profiling.enable()
+    results = []
+    try:
+        for game_index in game_indices:
+            results.append(board.simulate_game(config.num_players, config.trade_threshold, config.max_turns, seed=game_seed(seed, game_index), deferred_decisions=config.deferred_decisions))
+    finally:
+        shard_profile = profiling.disable() if profile else None
+    return results, shard_profile.to_dict() if shard_profile is not None else None
+
+def shard_games(num_games, num_shards):
+    num_shards = max(1, min(num_shards, num_games))
+    return [range(i, num_games, num_shards) for i in range(num_shards)]
+
+# profile: collect decision timings, search node counts and turn latencies (see profiling.py) into report.profile
+def run_tournament(num_games, config=None, workers=None, seed=0, profile=False):
+    config = config or TournamentConfig()
+    workers = workers or os.cpu_count() or 1
+    report = TournamentReport(config, seed)
+    if profile:
+        report.profile = profiling.Profile()
+    start = time.perf_counter()
+
+    if workers == 1:
+        shard_results = [run_shard(config, seed, range(num_games), profile)]
+    else:
+        shards = shard_games(num_games, workers * SHARDS_PER_WORKER)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(run_shard, config, seed, shard, profile) for shard in shards]
+            shard_results = [future.result() for future in futures]
+    for results, shard_profile in shard_results:
+        report.merge(results)
+        if shard_profile is not None:
+            report.profile.merge(shard_profile)
+
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run headless ai-only games across a process pool")
+    parser.add_argument('-g', '--games', type=int, default=100, help='Number of games to simulate')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='Number of worker processes (default: one per cpu)')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='Tournament seed; each game is seeded from it')
+    parser.add_argument('-p', '--players', type=int, choices=range(2, 9), default=4, help='Number of ai players per game')
+    parser.add_argument('-t', '--trade-threshold', type=int, default=1000, help='Trade threshold of each ai player')
+    parser.add_argument('-m', '--max-turns', type=int, default=board.SIMULATION_MAX_TURNS, help='Turn limit per game')
+    parser.add_argument('-d', '--deferred-decisions', action='store_true', help='Have players trade, unmortgage and build once at the end of each turn')
+    parser.add_argument('-o', '--output', help='Write the merged report as json to this file')
+    parser.add_argument('--profile', action='store_true', help='Time each kind of ai decision and count search nodes and turn latencies (see profiling.py)')
+    args = parser.parse_args()
+
+    config = TournamentConfig(args.players, args.trade_threshold, args.max_turns, args.deferred_decisions)
+    report = run_tournament(args.games, config, args.workers, args.seed, args.profile)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report.to_dict(), file, indent=4)
+    report.print_report()
+    if report.profile is not None:
+        report.profile.print_report()
@@ -1,6 +1,9 @@
-from enums import Colors
+from collections import OrderedDict
+from enums import BUILDABLE_COLORS
+from board_spec import SPACES, COLOR_MASKS
+from transposition import property_mask, get_mask_spaces
 import settings
-import time
+from events import emit, TradeOffered, TradeDeclined, TradeAccepted, PropertyTraded
 
 # class MetaProperty():
 #     def __init__(self, name, cost, color, owner_player_number, is_mortgaged, unmortgage_amount):
@@ -15,35 +18,37 @@ import time
 
 
 class TradeMatrix():
-    def __init__(self, players):
+    def __init__(self, players, declined_cache_size=1024):
         self.players = {}
         for player in players:
             self.players[player.player_number] = player
-        self.declined_trade_offers = set()
+        self.declined_trade_offers = DeclinedTradeCache(declined_cache_size)
+        self.ownership_versions = {player.player_number: 0 for player in players} # set to a new version whenever a player's real estate, houses or mortgages change
+        self.last_version = 0 # never reused, even after restoring a snapshot, so stale declined offers can't match
+        self.worth_cache = WorthCache() # the ai's property worths, valid until last_version moves on
+        # ownership index, kept up to date by refresh_color whenever real estate or houses change hands
+        self.monopolies = {} # player number -> buildable colors they hold the full set of
+        self.locked_colors = {} # player number -> full sets with houses on them, which can't be traded
+        self.monopoly_holders = set() # player numbers with at least one buildable monopoly
+        for player in players:
+            self.monopolies[player.player_number] = set()
+            self.locked_colors[player.player_number] = set()
+            for color in player.properties_by_set.keys():
+                self.refresh_color(player.player_number, color)
     
     """
     Trading
     """
     def get_tradeable_property_names(self, player_number, trade_offer):
-        names = set()
         properties_in_offer = trade_offer.initiator_bundle.properties if player_number == trade_offer.initiator else trade_offer.recipient_bundle.properties
-        names_in_offer = set([property.name for property in properties_in_offer])
-        for color in self.players[player_number].properties_by_set.keys():
-            # check if any properties have houses; if so, don't add
-            if not self.check_if_color_tradeable(player_number, color):
-                continue
-            for property in self.players[player_number].properties_by_set[color]:
-                if property.name in names_in_offer:
-                    continue
-                names.add(property.name)
-        return names
+        mask = self.players[player_number].owned_mask & ~property_mask(properties_in_offer)
+        # sets with houses on them can't be traded
+        for color in self.locked_colors[player_number]:
+            mask &= ~COLOR_MASKS[color]
+        return set(SPACES[space].value for space in get_mask_spaces(mask))
     
     def check_if_color_tradeable(self, player_number, color):
-        if self.players[player_number].has_full_set(color):
-            for property in self.players[player_number].properties_by_set[color]:
-                if property.can_develop and property.num_houses > 0:
-                    return False
-        return True
+        return color not in self.locked_colors[player_number]
     
     def get_player_goojf_cards(self, player_number):
         return self.players[player_number].goojf_cards
@@ -51,24 +56,23 @@ class TradeMatrix():
     def resolve_trade(self, trade_offer):
         initiator = self.players[trade_offer.initiator]
         recipient = self.players[trade_offer.recipient]
-        print(f"\nPlayer {initiator.player_number} offered to trade with player {recipient.player_number}. Here is the offer:")
-        trade_offer.print_offer()
+        emit(TradeOffered, trade_offer)
 
         if not recipient.will_accept_trade_offer(trade_offer):
-            print(f"Player {recipient.player_number} declined the trade")
-            self.declined_trade_offers.add(trade_offer.get_text())
+            emit(TradeDeclined, initiator.player_number, recipient.player_number)
+            self.declined_trade_offers.add(self.get_offer_key(trade_offer))
             return False
         
-        print(f"Player {recipient.player_number} accepted the trade")
+        emit(TradeAccepted, initiator.player_number, recipient.player_number)
         
         # exchange properties
         for property in trade_offer.initiator_bundle.properties:
-            print(f"Player {initiator.player_number} trades {property.name_colored} to player {recipient.player_number}")
+            emit(PropertyTraded, initiator.player_number, recipient.player_number, property)
             property = initiator.properties[property.name]
             initiator.lose_real_estate(property)
             recipient.gain_real_estate(property, False)
         for property in trade_offer.recipient_bundle.properties:
-            print(f"Player {recipient.player_number} trades {property.name_colored} to player {initiator.player_number}")
+            emit(PropertyTraded, recipient.player_number, initiator.player_number, property)
             property = recipient.properties[property.name]
             recipient.lose_real_estate(property)
             initiator.gain_real_estate(property, False)
@@ -90,7 +94,11 @@ class TradeMatrix():
         return True
 
     def has_been_declined_previously(self, trade_offer):
-        return trade_offer.get_text() in self.declined_trade_offers
+        return self.get_offer_key(trade_offer) in self.declined_trade_offers
+
+    # an offer is only remembered as declined until either player's real estate, houses or mortgages change
+    def get_offer_key(self, trade_offer):
+        return (trade_offer.get_fingerprint(), self.ownership_versions[trade_offer.initiator], self.ownership_versions[trade_offer.recipient])
     
     # def add_property_to_bundle(self, bundle, property_name, owner_player_number):
     #     property = self.players[owner_player_number].properties[property_name]
@@ -101,29 +109,69 @@ class TradeMatrix():
     """
     def get_colors(self):
         # doesn't include rr and utility
-        return [Colors.BROWN, Colors.LIGHTBLUE, Colors.PINK, Colors.ORANGE, Colors.RED, Colors.YELLOW, Colors.GREEN, Colors.DARKBLUE]  
+        return list(BUILDABLE_COLORS)
 
     def get_player_property(self, trade_player_number, property_name):
         return self.players[trade_player_number].properties[property_name]
     
     def other_player_has_monopoly(self, active_player_number):
+        return len(self.monopoly_holders) > (1 if active_player_number in self.monopoly_holders else 0)
+
+    # buildable colors the player holds the full set of, in board order
+    def get_buildable_colors(self, player_number):
+        monopolies = self.monopolies[player_number]
+        if len(monopolies) < 2:
+            return list(monopolies)
+        return [color for color in BUILDABLE_COLORS if color in monopolies]
+
+    # recompute the whole index after the players' real estate is replaced wholesale, e.g. by restoring a snapshot
+    def rebuild_index(self, ownership_versions):
+        self.monopoly_holders.clear()
         for player in self.players.values():
-            if player.player_number == active_player_number:
-                continue
-            if len(player.get_buildable_colors()) > 0:
-                return True
+            self.monopolies[player.player_number].clear()
+            self.locked_colors[player.player_number].clear()
+            for color in player.properties_by_set.keys():
+                self.refresh_color(player.player_number, color)
+        self.ownership_versions.update(ownership_versions)
+
+    # called after one of a player's properties is mortgaged or unmortgaged, which changes its worth but not the ownership index
+    def record_mortgage_change(self, player_number):
+        self.last_version += 1
+        self.ownership_versions[player_number] = self.last_version
+
+    # recompute the index for one of a player's colors after they gain or lose a property, or build or sell a house on it
+    def refresh_color(self, player_number, color):
+        player = self.players[player_number]
+        self.last_version += 1
+        self.ownership_versions[player_number] = self.last_version
+        monopolies = self.monopolies[player_number]
+        locked_colors = self.locked_colors[player_number]
+        if player.has_full_set(color):
+            if color in BUILDABLE_COLORS:
+                monopolies.add(color)
+            if player.developed_mask & COLOR_MASKS[color]:
+                locked_colors.add(color)
+            else:
+                locked_colors.discard(color)
+        else:
+            monopolies.discard(color)
+            locked_colors.discard(color)
+        if len(monopolies) > 0:
+            self.monopoly_holders.add(player_number)
+        else:
+            self.monopoly_holders.discard(player_number)
     
     def get_other_player_color_properties(self, color, active_player):
         properties = []
         for player in self.players.values():
-            if player == active_player or color not in player.properties_by_set:
+            if player == active_player:
                 continue
             # check if any properties have houses; if so, don't add
             if not self.check_if_color_tradeable(player.player_number, color):
                 continue
 
-            for property in player.properties_by_set[color]:
-                properties.append(property)
+            for space in get_mask_spaces(player.owned_mask & COLOR_MASKS[color]):
+                properties.append(player.properties[SPACES[space].value])
         return properties
             
     def get_other_players_with_goojf_cards(self, active_player):
@@ -152,17 +200,13 @@ class TradeMatrix():
     Printing
     """
     def print_tradeable_properties(self, player_number, trade_offer):
-        print(f"Here are player {player_number}'s tradeable properties:")
-        if not settings.fast:
-            time.sleep(0.5)
+        settings.display(f"Here are player {player_number}'s tradeable properties:")
         properties_in_offer = set(trade_offer.initiator_bundle.properties) if player_number == trade_offer.initiator else set(trade_offer.recipient_bundle.properties)
         
         for property in self.players[player_number].properties.values():
             if (property.can_develop and property.num_houses > 0) or property in properties_in_offer:
                 continue
-            print(f"{property.name_colored} (value: {property.cost})")
-            if not settings.fast:
-                time.sleep(0.5)
+            settings.display(f"{property.name_colored} (value: {property.cost})")
     
     def print_other_players(self, active_player):
         for player in self.players.values():
@@ -172,22 +216,14 @@ class TradeMatrix():
 
     def print_player_state(self, player_number):
         player = self.players[player_number]
-        print(f"Player {player.player_number} ({player.token}):")
-        if not settings.fast:
-            time.sleep(0.5)
-        print(f"\twealth: {player.money}")
-        if not settings.fast:
-            time.sleep(0.5)
-        print("\tproperties:")
-        if not settings.fast:
-            time.sleep(0.5)
+        settings.display(f"Player {player.player_number} ({player.token}):")
+        settings.display(f"\twealth: {player.money}")
+        settings.display("\tproperties:")
         properties = ""
         for property in player.properties.values():
             properties += f"{property.name_colored}, "
         properties = properties[:-2]
-        print(f"\t\t{properties}")
-        if not settings.fast:
-            time.sleep(0.5)
+        settings.display(f"\t\t{properties}")
 
 
 class TradeOffer():
@@ -199,22 +235,18 @@ class TradeOffer():
         self.recipient_bundle = TradeBundle()
 
     def print_offer(self):
-        print(f"What player {self.initiator} is offering:")
-        if not settings.fast:
-            time.sleep(0.5)
-        self.initiator_bundle.print_bundle()
-        print(f"What player {self.initiator} is requesting:")
-        if not settings.fast:
-            time.sleep(0.5)
-        self.recipient_bundle.print_bundle()
+        for line in self.describe():
+            settings.display(line)
+
+    def describe(self):
+        lines = [f"What player {self.initiator} is offering:"]
+        lines.extend(self.initiator_bundle.describe())
+        lines.append(f"What player {self.initiator} is requesting:")
+        lines.extend(self.recipient_bundle.describe())
+        return lines
     
-    def get_text(self):
-        text = ""
-        text += str(self.initiator)
-        text += str(self.recipient)
-        text += self.initiator_bundle.get_text()
-        text += self.recipient_bundle.get_text()
-        return text
+    def get_fingerprint(self):
+        return (self.initiator, self.recipient, self.initiator_bundle.get_fingerprint(), self.recipient_bundle.get_fingerprint())
 
 
 class TradeBundle():
@@ -224,6 +256,11 @@ class TradeBundle():
         self.num_goojf_cards = 0
 
     def print_bundle(self):
+        for line in self.describe():
+            settings.display(line)
+
+    def describe(self):
+        lines = []
         if len(self.properties) > 0:
             info = "\t Properties: "
             for property in self.properties:
@@ -232,21 +269,81 @@ class TradeBundle():
                     info += "(mortgaged)"
                 info += ", "
             info = info[:-2]
-            print(info)
-            if not settings.fast:
-                time.sleep(0.5)
+            lines.append(info)
         if self.money > 0:
-            print(f"\tMoney: {self.money}")
-            if not settings.fast:
-                time.sleep(0.5)
+            lines.append(f"\tMoney: {self.money}")
         if self.num_goojf_cards > 0:
-            print(f"Get Out of Jail Free cards: {self.num_goojf_cards}")
-            if not settings.fast:
-                time.sleep(0.5)
-
-    def get_text(self):
-        text = ""
-        text += "".join([property.name_colored for property in self.properties])
-        text += str(self.money)
-        text += str(self.num_goojf_cards)
-        return text
\ No newline at end of file
+            lines.append(f"Get Out of Jail Free cards: {self.num_goojf_cards}")
+        return lines
+
+    def get_fingerprint(self):
+        return (property_mask(self.properties), self.money, self.num_goojf_cards)
+
+
+class DeclinedTradeCache():
+    # fixed-size lru set of declined offer keys
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self.keys = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def add(self, key):
+        self.keys[key] = None
+        self.keys.move_to_end(key)
+        if len(self.keys) > self.max_size:
+            self.keys.popitem(last=False)
+
+    def __contains__(self, key):
+        if key in self.keys:
+            self.keys.move_to_end(key)
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def __len__(self):
+        return len(self.keys)
+
+    def clear(self):
+        self.keys.clear()
+
+    def get_stats(self):
+        return {"size": len(self.keys), "max_size": self.max_size, "hits": self.hits, "misses": self.misses}
+
+
+class WorthCache():
+    # property worths for the current ownership version. every change to real estate, houses or
+    # mortgages moves TradeMatrix.last_version on, and the first lookup under a new version drops
+    # everything cached under the old one
+    def __init__(self):
+        self.version = None
+        self.worths = {}
+        self.hits = 0
+        self.misses = 0
+
+    # the worth cached for key under version, or None
+    def get(self, key, version):
+        if version != self.version:
+            self.version = version
+            self.worths.clear()
+        worth = self.worths.get(key)
+        if worth is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return worth
+
+    def add(self, key, worth):
+        self.worths[key] = worth
+
+    def __len__(self):
+        return len(self.worths)
+
+    def clear(self):
+        self.version = None
+        self.worths.clear()
+
+    def get_stats(self):
+        lookups = self.hits + self.misses
+        return {"size": len(self.worths), "hits": self.hits, "misses": self.misses, "hit_rate": self.hits / lookups if lookups > 0 else 0}
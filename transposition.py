@@ -0,0 +1,43 @@
+# Compact integer keys for the ai's searches, so revisited states can be found without building
+# strings. Keys are canonical: the same state always packs to the same int, whatever order it was
+# reached in, and children are derived from their parent's key with one bitwise or.
+
+def property_bit(property):
+    return 1 << property.board_space
+
+# set of properties as a mask of their board spaces
+def property_mask(properties):
+    mask = 0
+    for property in properties:
+        mask |= property_bit(property)
+    return mask
+
+# board spaces in a mask, lowest first
+def get_mask_spaces(mask):
+    while mask:
+        low_bit = mask & -mask
+        yield low_bit.bit_length() - 1
+        mask ^= low_bit
+
+
+class TranspositionTable():
+    # remembers which search states have already been expanded
+    def __init__(self):
+        self.keys = set()
+        self.hits = 0 # lookups that found an already expanded state
+
+    def clear(self):
+        self.keys.clear()
+        self.hits = 0
+
+    def add(self, key):
+        self.keys.add(key)
+
+    def __contains__(self, key):
+        if key in self.keys:
+            self.hits += 1
+            return True
+        return False
+
+    def __len__(self):
+        return len(self.keys)